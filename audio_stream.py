@@ -0,0 +1,81 @@
+import queue
+import logging
+import threading
+import subprocess
+import time
+
+logger = logging.getLogger(__name__)
+
+class AudioStream:
+    """Захват аудио из внешней команды (arecord) в отдельном потоке.
+
+    Поток читает из канала кадры фиксированного размера и складывает их в
+    ограниченную очередь вместе с моментом получения. Если потребитель не
+    успевает, выбрасываются самые старые кадры - канал arecord не
+    переполняется, а задержка не растёт.
+    """
+
+    def __init__(self, cmd, sample_rate=16000, frame_ms=50, max_frames=40):
+        self.cmd = cmd
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        # S16_LE, моно: 2 байта на отсчёт
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+        self._queue = queue.Queue(maxsize=max_frames)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.process = None
+        self.dropped = 0
+
+    def start(self):
+        """Запуск arecord и потока чтения"""
+        self.process = subprocess.Popen(
+            self.cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        if self.process.stdout is None:
+            raise RuntimeError("Нет потока stdout от arecord!")
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._reader,
+            daemon=True,
+            name="AudioReaderThread"
+        )
+        self._thread.start()
+
+    def _reader(self):
+        stdout = self.process.stdout
+        while not self._stop_event.is_set():
+            data = stdout.read(self.frame_bytes)
+            if not data:
+                break
+            self._put((time.monotonic(), data))
+        # Признак конца потока для потребителя
+        self._put(None)
+
+    def _put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                    if self.dropped % 100 == 1:
+                        logger.warning(f"Буфер аудио переполнен, отброшено кадров: {self.dropped}")
+                except queue.Empty:
+                    pass
+
+    def read(self, timeout=None):
+        """Следующий кадр: (время получения, байты) или None в конце потока.
+        По истечении timeout бросает queue.Empty."""
+        return self._queue.get(timeout=timeout)
+
+    def stop(self):
+        self._stop_event.set()
+        if self.process is not None:
+            self.process.terminate()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
@@ -0,0 +1,60 @@
+"""Общие помощники для бенчмарков.
+
+Каждый бенчмарк - отдельный скрипт с функцией run(quick=False) -> dict,
+его можно запускать напрямую: python3 benchmarks/bench_<имя>.py
+Все сразу, с сохранением в results/ и сравнением: python3 benchmarks/run_all.py
+Поддельное оборудование для машин без Raspberry Pi - в fakes.py.
+"""
+import os
+import sys
+import time
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def measure(fn, repeat=200, warmup=10):
+    """Замер времени вызова fn(), результат в микросекундах"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return {
+        'mean_us': statistics.fmean(samples),
+        'p50_us': samples[len(samples) // 2],
+        'p95_us': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'repeat': repeat,
+    }
+
+
+def print_results(title, results):
+    print(f"== {title} ==")
+    for name, row in results.items():
+        if isinstance(row, dict):
+            fields = ", ".join(
+                f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in row.items()
+            )
+            print(f"  {name}: {fields}")
+        else:
+            print(f"  {name}: {row}")
+
+
+def read_wav(path):
+    """PCM S16_LE моно из WAV-файла: (байты, частота)"""
+    import wave
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{path}: нужен моно S16_LE")
+        return wav.readframes(wav.getnframes()), wav.getframerate()
+
+
+def split_frames(pcm, sample_rate=16000, frame_ms=50):
+    """Нарезка PCM на кадры, как их отдаёт AudioStream"""
+    size = int(sample_rate * frame_ms / 1000) * 2
+    return [pcm[i:i + size] for i in range(0, len(pcm) - size + 1, size)]
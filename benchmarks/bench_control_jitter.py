@@ -0,0 +1,100 @@
+"""Джиттер такта управления под нагрузкой OpenCV: без политики и с ResourceManager.
+
+Такт управления - поток, который просыпается каждые 5 мс (как шаги
+set_speed и опрос дальномера); измеряется опоздание пробуждения.
+Нагрузка - потоки «зрения» с размытием и сменой размера кадра 1280x960
+(отпускают GIL и используют пул потоков OpenCV). Каждый режим
+выполняется в отдельном процессе: пул OpenCV и привязка потоков
+наследуются и не сбрасываются внутри процесса.
+"""
+import sys
+import json
+import time
+import threading
+import subprocess
+
+import _common
+
+PERIOD = 0.005
+MODES = ("idle", "load", "load+policy")
+
+
+def _control_loop(iterations, lateness):
+    next_t = time.perf_counter()
+    for _ in range(iterations):
+        next_t += PERIOD
+        time.sleep(max(0.0, next_t - time.perf_counter()))
+        lateness.append((time.perf_counter() - next_t) * 1e6)
+
+
+def _vision_load(stop_event, pin):
+    import cv2
+    import numpy as np
+    if pin is not None:
+        pin()
+    frame = np.random.default_rng(0).integers(0, 255, (960, 1280, 3), dtype=np.uint8)
+    while not stop_event.is_set():
+        blurred = cv2.GaussianBlur(frame, (15, 15), 0)
+        cv2.resize(blurred, (416, 416), interpolation=cv2.INTER_AREA)
+
+
+def _run_mode(mode, iterations):
+    from resource_manager import ResourceManager
+    manager = ResourceManager(control_priority=True) if mode == "load+policy" else None
+    if manager is not None:
+        manager.configure_opencv()
+
+    stop_event = threading.Event()
+    workers = []
+    if mode != "idle":
+        pin = (lambda: manager.pin_current_thread('vision')) if manager else None
+        workers = [threading.Thread(target=_vision_load, args=(stop_event, pin))
+                   for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        time.sleep(0.5)
+
+    lateness = []
+
+    def control():
+        if manager is not None:
+            manager.pin_current_thread('control')
+        _control_loop(iterations, lateness)
+
+    thread = threading.Thread(target=control, name="EventLoopThread")
+    thread.start()
+    thread.join()
+    stop_event.set()
+    for worker in workers:
+        worker.join()
+
+    lateness.sort()
+    n = len(lateness)
+    return {
+        'p50_us': lateness[n // 2],
+        'p95_us': lateness[int(n * 0.95)],
+        'p99_us': lateness[int(n * 0.99)],
+        'max_us': lateness[-1],
+        'pinning': bool(manager and manager.enabled),
+    }
+
+
+def run(quick=False):
+    iterations = 200 if quick else 2000
+    results = {}
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--iterations", str(iterations)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    return results
+
+
+if __name__ == "__main__":
+    if "--mode" in sys.argv:
+        mode = sys.argv[sys.argv.index("--mode") + 1]
+        iterations = int(sys.argv[sys.argv.index("--iterations") + 1])
+        print(json.dumps(_run_mode(mode, iterations)))
+    else:
+        _common.print_results("control loop jitter", run(quick="--quick" in sys.argv))
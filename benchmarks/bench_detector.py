@@ -0,0 +1,41 @@
+"""ObjectDetector.detect_objects целиком и по этапам: preprocess, forward, postprocess.
+
+Если в корне проекта есть yolov3.weights и coco.names - используется
+настоящая сеть, иначе поддельная (fakes.FakeNet): тогда forward почти
+бесплатен, а показательны подготовка кадра, разбор выходов и NMS.
+"""
+import numpy as np
+
+import _common
+import fakes
+
+
+def run(quick=False):
+    fakes.install()
+    repeat = 5 if quick else 30
+    frame = fakes.synthetic_frame()
+    results = {}
+    for size in (416, 320):
+        detector, real = fakes.make_detector(input_size=size)
+        results['network'] = 'yolov3' if real else 'fake'
+        blob = detector.preprocess(frame, size)
+        outs = detector.forward(blob)
+        results[f"{size} preprocess"] = _common.measure(
+            lambda: detector.preprocess(frame, size), repeat=repeat * 4, warmup=2)
+        results[f"{size} forward"] = _common.measure(
+            lambda: detector.forward(blob), repeat=repeat, warmup=1)
+        results[f"{size} postprocess"] = _common.measure(
+            lambda: detector.postprocess(outs, 0.3, (0, 0, 640, 480)), repeat=repeat * 4, warmup=2)
+        results[f"{size} detect_objects"] = _common.measure(
+            lambda: detector.detect_objects(frame, target_label='dog'), repeat=repeat, warmup=1)
+
+    detector, _ = fakes.make_detector(input_size=320, multiscale=True)
+    frames = [fakes.synthetic_frame(seed=i) for i in range(4)]
+    index = iter(np.resize(np.arange(len(frames)), 1 << 16))
+    results["320 multiscale detect_objects"] = _common.measure(
+        lambda: detector.detect_objects(frames[next(index)], target_label='dog'), repeat=repeat, warmup=1)
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("object detector", run())
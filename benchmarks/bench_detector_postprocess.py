@@ -0,0 +1,45 @@
+"""Разбор выходов YOLO: прежний цикл по строкам против векторного postprocess.
+
+Выходы сети имитируются случайными массивами той же формы, что у YOLOv3
+(3 головы, 85 значений на строку), поэтому модель не нужна. Замеры для
+входа 416 (полный кадр), 320 (фрагмент) и 256 (грубый проход).
+"""
+import numpy as np
+
+import _common
+from fakes import yolo_outputs
+from object_detector import ObjectDetector
+
+
+def legacy_postprocess(outs, confidence_threshold, width, height):
+    class_ids, confidences, boxes = [], [], []
+    for out in outs:
+        for detection in out:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+            if confidence > confidence_threshold:
+                center_x = int(detection[0] * width)
+                center_y = int(detection[1] * height)
+                w = int(detection[2] * width)
+                h = int(detection[3] * height)
+                boxes.append([int(center_x - w / 2), int(center_y - h / 2), w, h])
+                confidences.append(float(confidence))
+                class_ids.append(class_id)
+    return boxes, confidences, class_ids
+
+
+def run(quick=False):
+    repeat = 5 if quick else 30
+    results = {}
+    for size in (416, 320, 256):
+        outs = yolo_outputs(size)
+        results[f"legacy {size}"] = _common.measure(
+            lambda: legacy_postprocess(outs, 0.3, 640, 480), repeat=repeat, warmup=1)
+        results[f"vectorized {size}"] = _common.measure(
+            lambda: ObjectDetector.postprocess(outs, 0.3, (0, 0, 640, 480)), repeat=repeat * 10, warmup=3)
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("YOLO postprocess", run())
@@ -0,0 +1,53 @@
+"""DistanceSensor.get_distance на поддельном GPIO: время замера и фильтрация.
+
+Поддельный ECHO отвечает импульсом длины, соответствующей расстоянию, так
+что цикл опроса пина работает как на датчике. Кроме времени (в основном
+паузы между импульсами) замеряется процессорное время: опрос ECHO - это
+активное ожидание. Фильтрация выбросов проверяется на последовательности
+100 см с редкими ложными эхо 20 и 350 см.
+"""
+import time
+import numpy as np
+
+import _common
+import fakes
+
+
+def _timed(fn, repeat):
+    wall = cpu = 0.0
+    values = []
+    for _ in range(repeat):
+        t0, c0 = time.perf_counter(), time.thread_time()
+        values.append(fn())
+        wall += time.perf_counter() - t0
+        cpu += time.thread_time() - c0
+    return {'wall_ms': wall / repeat * 1000, 'cpu_ms': cpu / repeat * 1000}, values
+
+
+def run(quick=False):
+    fakes.install()
+    from distance_sensor import DistanceSensor
+
+    gpio = fakes.gpio()
+    sensor = DistanceSensor()
+    repeat = 5 if quick else 30
+    results = {}
+
+    gpio.set_distance(100.0)
+    for samples in (1, 5):
+        row, _ = _timed(lambda: sensor.get_distance(samples=samples), repeat)
+        results[f"get_distance samples={samples}"] = row
+
+    distances = np.full(50, 100.0)
+    distances[7::11] = 20.0
+    distances[3::17] = 350.0
+    gpio.set_distance(distances)
+    row, values = _timed(lambda: sensor.get_distance(samples=5), repeat)
+    values = np.array([v for v in values if v is not None])
+    row['abs_error_cm'] = float(np.abs(values - 100.0).mean())
+    results["get_distance samples=5, outliers"] = row
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("distance sensor", run())
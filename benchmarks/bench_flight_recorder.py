@@ -0,0 +1,43 @@
+"""Стоимость записи события в бортовой самописец и сброса буфера на диск.
+
+Запись измеряется пачками по 100 событий (время на одно событие), чтобы
+не мерить накладные расходы самого таймера. Сброс - полный буфер
+(65536 записей) в .npy через memmap и обратная загрузка load_dump().
+"""
+import os
+import tempfile
+
+import _common
+from flight_recorder import FlightRecorder, load_dump, KIND_DISTANCE, KIND_MOTOR
+
+BATCH = 100
+
+
+def run(quick=False):
+    repeat = 200 if quick else 2000
+    recorder = FlightRecorder()
+
+    def record_batch():
+        for i in range(BATCH):
+            recorder.record(KIND_DISTANCE, 0, 100.0 + i, 5)
+
+    def record_motor_batch():
+        for _ in range(BATCH):
+            recorder.record(KIND_MOTOR, 2, 30)
+
+    results = {}
+    for name, fn in (('record distance', record_batch), ('record motor', record_motor_batch)):
+        row = _common.measure(fn, repeat=repeat)
+        results[name] = {'us_per_event': row['mean_us'] / BATCH,
+                         'p95_us_per_event': row['p95_us'] / BATCH}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'flight.npy')
+        results['dump 65536'] = _common.measure(lambda: recorder.dump(path), repeat=10 if quick else 50)
+        results['load_dump 65536'] = _common.measure(lambda: load_dump(path), repeat=10 if quick else 50)
+        results['dump size, bytes'] = os.path.getsize(path)
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("flight recorder", run())
@@ -0,0 +1,143 @@
+"""Реакция контроллера следования на движение цели (модель на виртуальном времени).
+
+Мир: робот поворачивается на месте с угловой скоростью TURN_RATE, цель
+задана азимутом. Камера (поле зрения 62°) раз в 1/det_hz с видит цель,
+детекция приходит через det_latency с. Контроллер работает на 20 Гц;
+смена скорости занимает, как у MotorController, 20 мс на ступень ШИМ,
+замер дальномера - 26 мс (эхо и пауза между импульсами), так что такты
+с этими вызовами длиннее периода.
+
+- reaction_ms: цель скачком уходит на 20° вправо - время до первой
+  команды поворота направо;
+- tracking_err: цель движется по кругу со скоростью 0.3 рад/с - среднее
+  |смещение| цели в кадре (доли полуширины);
+- overruns: такты, начавшиеся позже срока (control_overruns_total).
+
+Сравнение: с предсказанием между детекциями и с удержанием последней.
+Время реакции у них одинаковое: скачок цели виден только в следующей
+детекции, предсказание его не ускоряет; выигрыш - в tracking_err.
+"""
+import math
+import asyncio
+
+import _common
+from clock import VirtualClock, VirtualEventLoop
+from follow_controller import FollowController
+
+HFOV = math.radians(62)
+TURN_RATE = 1.5          # рад/с при повороте на месте
+FRAME = (480, 640, 3)
+
+
+class _Motor:
+    MIN_SPEED = 26
+    MAX_SPEED = 30
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.direction = 'stop'
+        self.current_speed = self.MIN_SPEED
+        self._duty = 0
+        self.commands = []
+
+    def _set(self, direction):
+        self.direction = direction
+        self.commands.append((self.clock.monotonic(), direction))
+
+    def set_speed(self, speed):
+        # Как MotorController.set_speed: ступени по 20 мс от MIN_SPEED и выше
+        if speed == self._duty:
+            return
+        if self._duty >= self.MIN_SPEED or speed >= self.MIN_SPEED:
+            start = max(self._duty, self.MIN_SPEED)
+            self.clock.advance(abs(max(speed, self.MIN_SPEED) - start) * 0.02)
+        self._duty = speed
+        self.current_speed = speed
+
+    def move_forward(self, speed=None):
+        self._set('forward')
+
+    def turn_left(self):
+        self._set('left')
+
+    def turn_right(self):
+        self._set('right')
+
+    def stop(self):
+        self.set_speed(0)
+        self._set('stop')
+
+
+class _Sensor:
+    SAMPLE_TIME = 0.026
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def get_distance(self, samples=5, **kwargs):
+        self.clock.advance(self.SAMPLE_TIME * samples)
+        return 200.0
+
+
+def _simulate(predict, det_hz, det_latency, target, duration):
+    clock = VirtualClock()
+    loop = VirtualEventLoop(clock)
+    motor = _Motor(clock)
+    follow = FollowController(motor, _Sensor(clock), clock=clock, predict=predict, max_age=2.0)
+    overruns_before = follow.metric_overruns.value()
+    state = {'heading': 0.0, 'errors': []}
+
+    def offset():
+        return (target(clock.monotonic()) - state['heading']) / (HFOV / 2)
+
+    async def world():
+        dt = 0.005
+        while True:
+            rate = {'left': -TURN_RATE, 'right': TURN_RATE}.get(motor.direction, 0.0)
+            state['heading'] += rate * dt
+            state['errors'].append(abs(offset()))
+            await asyncio.sleep(dt)
+
+    async def camera():
+        while True:
+            t_capture = clock.monotonic()
+            seen = offset()
+            await asyncio.sleep(det_latency)
+            if abs(seen) <= 1.0:
+                width = 0.15
+                x = ((seen + 1) / 2 - width / 2) * FRAME[1]
+                follow.on_detection((x, 200, width * FRAME[1], 100), FRAME, t_capture)
+            await asyncio.sleep(max(0.0, 1.0 / det_hz - det_latency))
+
+    # Следование начинается после подтверждённой детекции
+    follow.on_detection((0.425 * FRAME[1], 200, 0.15 * FRAME[1], 100), FRAME, 0.0)
+    tasks = [loop.create_task(world()), loop.create_task(camera()), loop.create_task(follow.run())]
+    loop.call_later(duration, loop.stop)
+    loop.run_forever()
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    loop.close()
+    return motor.commands, state['errors'], follow.metric_overruns.value() - overruns_before
+
+
+def run(quick=False):
+    results = {}
+    jump_at = 2.25   # между кадрами: в среднем полпериода ожидания
+    for det_hz, det_latency in ((2.0, 0.4), (5.0, 0.15)):
+        for predict in (True, False):
+            name = f"{det_hz:.0f} Hz det, {'predict' if predict else 'hold'}"
+            commands, _, _ = _simulate(predict, det_hz, det_latency,
+                                    lambda t: math.radians(20) if t >= jump_at else 0.0, 5.0)
+            turns = [t for t, d in commands if d == 'right' and t >= jump_at]
+            _, errors, overruns = _simulate(predict, det_hz, det_latency, lambda t: 0.3 * t, 3.0 if quick else 8.0)
+            results[name] = {
+                'reaction_ms': (turns[0] - jump_at) * 1000 if turns else float('nan'),
+                'tracking_err': sum(errors[len(errors) // 4:]) / max(1, len(errors) - len(errors) // 4),
+                'overruns': overruns,
+            }
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("follow controller", run())
@@ -0,0 +1,91 @@
+"""Свободная речь против режима ключевых фраз: задержка и точность.
+
+python3 benchmarks/bench_keywords.py <каталог корпуса>
+В каталоге - WAV-файлы (16 кГц, моно) и labels.tsv со строками
+«файл.wav<TAB>ожидаемая фраза»; пустая фраза - команды в записи нет.
+Нужны vosk и модель vosk_model/vosk-model-small-ru-0.22.
+"""
+import os
+import sys
+import time
+
+import _common
+from voice_commands import match_command, build_grammar
+
+MODEL_PATH = os.path.join(_common.ROOT, "vosk_model/vosk-model-small-ru-0.22")
+FRAME_MS = 50
+
+
+def load_corpus(path):
+    corpus = []
+    with open(os.path.join(path, 'labels.tsv'), encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            name, _, expected = line.rstrip('\n').partition('\t')
+            pcm, rate = _common.read_wav(os.path.join(path, name))
+            corpus.append((name, _common.split_frames(pcm, rate, FRAME_MS), expected.strip() or None))
+    return corpus
+
+
+def _evaluate(model, corpus, keyword_mode):
+    import json
+    from vosk import KaldiRecognizer
+    correct = false_triggers = 0
+    cpu = 0.0
+    latencies = []
+    for name, frames, expected in corpus:
+        if keyword_mode:
+            recognizer = KaldiRecognizer(model, 16000, build_grammar())
+        else:
+            recognizer = KaldiRecognizer(model, 16000)
+        texts = []
+        t_cpu = time.process_time()
+        for frame in frames:
+            if recognizer.AcceptWaveform(frame):
+                texts.append(json.loads(recognizer.Result()).get('text', ''))
+        # Задержка: от последнего кадра до окончательного результата
+        t_end = time.perf_counter()
+        texts.append(json.loads(recognizer.FinalResult()).get('text', ''))
+        latencies.append(time.perf_counter() - t_end)
+        cpu += time.process_time() - t_cpu
+
+        found = None
+        for text in texts:
+            phrase, _ = match_command(text)
+            if phrase:
+                found = phrase
+                break
+        if found == expected:
+            correct += 1
+        elif found is not None and expected is None:
+            false_triggers += 1
+
+    latencies.sort()
+    return {
+        'accuracy': correct / len(corpus),
+        'false_triggers': false_triggers,
+        'cpu_s': cpu,
+        'final_latency_ms_p50': latencies[len(latencies) // 2] * 1000,
+        'final_latency_ms_max': latencies[-1] * 1000,
+    }
+
+
+def run(quick=False, path=None):
+    if not path:
+        return {'skipped': "нужен каталог корпуса с labels.tsv"}
+    try:
+        from vosk import Model
+    except ImportError:
+        return {'skipped': "vosk не установлен"}
+    model = Model(MODEL_PATH)
+    corpus = load_corpus(path)
+    return {
+        'files': len(corpus),
+        'free-form': _evaluate(model, corpus, keyword_mode=False),
+        'keywords': _evaluate(model, corpus, keyword_mode=True),
+    }
+
+
+if __name__ == "__main__":
+    _common.print_results("keywords", run(path=sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,40 @@
+"""Стоимость одного такта локального планировщика (цель - единицы мс на Pi 4)"""
+import numpy as np
+
+import _common
+from occupancy_grid import OccupancyGrid
+from local_planner import LocalPlanner
+
+CONFIGS = (
+    # (n_linear, n_angular, horizon)
+    (6, 15, 1.5),
+    (8, 21, 2.0),
+    (10, 31, 2.0),
+)
+
+
+def _cluttered_grid(cell_cm):
+    grid = OccupancyGrid(size_cm=400, cell_cm=cell_cm)
+    rng = np.random.default_rng(1)
+    bearings = rng.uniform(-np.pi / 2, np.pi / 2, 64)
+    distances = rng.uniform(30, 200, 64)
+    for _ in range(3):
+        grid.update_rays(bearings, distances)
+    return grid
+
+
+def run(quick=False):
+    repeat = 50 if quick else 300
+    results = {}
+    for cell in (5, 10):
+        grid = _cluttered_grid(cell)
+        for n_linear, n_angular, horizon in CONFIGS:
+            planner = LocalPlanner(grid, n_linear=n_linear, n_angular=n_angular, horizon=horizon)
+            row = _common.measure(planner.plan, repeat=repeat)
+            row['candidates'] = len(planner.candidates)
+            results[f"cell={cell}cm v={n_linear} w={n_angular} T={horizon}s"] = row
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("local_planner", run())
@@ -0,0 +1,82 @@
+"""Стоимость логирования в такте управления: прежняя схема против очереди.
+
+Такт имитирует замер дальномера (5 импульсов с записью каждого), смену
+направления мотора и сообщение навигации. Прежняя схема - basicConfig с
+FileHandler и StreamHandler, записи INFO на каждый импульс, мотор и
+навигацию. Новая - setup_logging(): QueueHandler/QueueListener, лимиты
+по подсистемам, все записи такта на уровне DEBUG.
+
+DEBUG при уровне INFO отсекается до создания LogRecord и почти ничего не
+стоит; запись INFO создаёт LogRecord даже тогда, когда лимит её
+отбрасывает (~5 мкс на запись), поэтому на горячем пути INFO не пишется.
+"""
+import os
+import logging
+import tempfile
+
+import _common
+import log_setup
+
+sensor_log = logging.getLogger('distance_sensor')
+motor_log = logging.getLogger('motor_control')
+nav_log = logging.getLogger('navigation')
+
+
+def _tick_legacy():
+    for i in range(5):
+        distance = 100.0 + i
+        sensor_log.info(f"Текущее измерение: {distance:.2f} см")
+    motor_log.info("Движение вперед")
+    nav_log.info("Плавное снижение скорости")
+
+
+def _tick_new():
+    for i in range(5):
+        distance = 100.0 + i
+        sensor_log.debug("Текущее измерение: %.2f см", distance)
+    motor_log.debug("Движение вперед")
+    nav_log.debug("Плавное снижение скорости")
+
+
+def _tick_silent():
+    for i in range(5):
+        distance = 100.0 + i
+    return distance
+
+
+def _reset_root():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def run(quick=False):
+    repeat = 500 if quick else 5000
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        results['no logging'] = _common.measure(_tick_silent, repeat=repeat)
+
+        _reset_root()
+        file_handler = logging.FileHandler(os.path.join(tmp, 'legacy.log'))
+        stream_handler = logging.StreamHandler(devnull)
+        formatter = logging.Formatter(log_setup.LOG_FORMAT)
+        for handler in (file_handler, stream_handler):
+            handler.setFormatter(formatter)
+            logging.getLogger().addHandler(handler)
+        logging.getLogger().setLevel(logging.INFO)
+        results['legacy basicConfig'] = _common.measure(_tick_legacy, repeat=repeat)
+        _reset_root()
+
+        log_setup.setup_logging(os.path.join(tmp, 'queue.log'), stream=False)
+        results['queue + rate limit'] = _common.measure(_tick_new, repeat=repeat)
+        log_setup._stop_listener()
+        _reset_root()
+    base = results['no logging']['mean_us']
+    for row in results.values():
+        row['logging_us_per_tick'] = row['mean_us'] - base
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("logging", run())
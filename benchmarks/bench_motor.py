@@ -0,0 +1,51 @@
+"""MotorController на поддельном GPIO: смена направления и плавная смена скорости.
+
+Переходы (вперёд, влево, вправо, назад) - только записи в пины, их время -
+накладные расходы Python и самописца. set_speed идёт ступенями по 1% с
+паузой 20 мс, поэтому его время - фактическая длительность разгона или
+торможения, которую ждёт вызывающий (в том числе такт навигации).
+"""
+import logging
+
+import _common
+import fakes
+
+
+def run(quick=False):
+    fakes.install()
+    from motor_control import MotorController
+
+    # Переходы пишут в лог INFO; в бенчмарке меряем сам переход
+    logging.getLogger('motor_control').setLevel(logging.WARNING)
+    motor = MotorController()
+    repeat = 200 if quick else 2000
+    results = {}
+
+    transitions = [motor.move_forward, motor.turn_left, motor.turn_right, motor.move_backward]
+    state = {'i': 0}
+
+    def transition():
+        transitions[state['i'] % len(transitions)]()
+        state['i'] += 1
+
+    results['direction transition'] = _common.measure(transition, repeat=repeat)
+    results['move_forward same speed'] = _common.measure(
+        lambda: motor.move_forward(motor.current_speed), repeat=repeat)
+
+    ramps = 3 if quick else 10
+
+    def ramp(start, end):
+        def fn():
+            motor._set_duty(start)   # без плавного перехода к исходной скорости
+            motor.set_speed(end)
+        return fn
+
+    results['set_speed 26->30'] = _common.measure(ramp(26, 30), repeat=ramps, warmup=1)
+    results['set_speed 30->0'] = _common.measure(ramp(30, 0), repeat=ramps, warmup=1)
+    results['emerg_stop reverse=0'] = _common.measure(
+        lambda: (ramp(30, 30)(), motor.emerg_stop(reverse_time=0)), repeat=ramps, warmup=1)
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("motor", run())
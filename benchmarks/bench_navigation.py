@@ -0,0 +1,93 @@
+"""Стоимость такта NavigationSystem.monitor_distance и ObstacleDetector.process_frame.
+
+Такт навигации: дальномер и моторы подменены мгновенными заглушками,
+цикл идёт на виртуальном времени (паузы не ждутся), поэтому время на
+такт - чистая работа: проверка застревания, карта занятости, объединение
+датчиков и выбор режима. Режимы: свободно (200 см) и торможение (60 см).
+
+process_frame: EdgeVision + обновление карты и ObstacleFusion на
+синтетических кадрах, без планировщика (каждый кадр обрабатывается).
+"""
+import time
+import asyncio
+import logging
+
+import _common
+import fakes
+from clock import VirtualClock, VirtualEventLoop
+from metrics import get_metrics
+
+
+class _Motor:
+    MIN_SPEED = 26
+    MAX_SPEED = 30
+    direction = 'forward'
+    current_speed = 30
+
+    def set_speed(self, speed):
+        self.current_speed = speed
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class _Sensor:
+    """Расстояние с небольшим дрожанием, чтобы не срабатывало застревание"""
+
+    def __init__(self, distance):
+        self.distance = distance
+        self._odd = False
+
+    def get_distance(self, samples=5, **kwargs):
+        self._odd = not self._odd
+        return self.distance + (3.0 if self._odd else 0.0)
+
+
+def _tick_cost(distance, seconds):
+    from navigation import NavigationSystem
+
+    clock = VirtualClock()
+    loop = VirtualEventLoop(clock)
+    nav = NavigationSystem(_Motor(), _Sensor(distance), clock=clock)
+    ticks = get_metrics().counter("nav_ticks_total")
+    start = ticks.value()
+    task = loop.create_task(nav.monitor_distance())
+    loop.call_later(seconds, loop.stop)
+    t0 = time.perf_counter()
+    loop.run_forever()
+    wall = time.perf_counter() - t0
+    task.cancel()
+    loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
+    loop.close()
+    n = ticks.value() - start
+    return {'us_per_tick': wall / max(n, 1) * 1e6, 'ticks': n}
+
+
+def run(quick=False):
+    fakes.install()
+    from navigation import NavigationSystem, ObstacleDetector
+
+    logging.getLogger('navigation').setLevel(logging.WARNING)
+    seconds = 20 if quick else 120
+    results = {
+        'monitor_distance cruise': _tick_cost(200.0, seconds),
+        'monitor_distance slow': _tick_cost(60.0, seconds),
+    }
+
+    nav = NavigationSystem(_Motor(), _Sensor(200.0))
+    detector = ObstacleDetector(nav.distance_sensor, nav.motor, nav=nav)
+    detector.vision.skip_static = False
+    detector._due = lambda frame: True
+    frames = [fakes.synthetic_frame(seed=i) for i in range(8)]
+    state = {'i': 0}
+
+    def process():
+        detector.process_frame(frames[state['i'] % len(frames)])
+        state['i'] += 1
+
+    results['process_frame edges'] = _common.measure(process, repeat=50 if quick else 300)
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("navigation", run())
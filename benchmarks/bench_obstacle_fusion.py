@@ -0,0 +1,99 @@
+"""ObstacleFusion: стоимость обновлений и поведение на типичных сценариях.
+
+- update_sonar / update_camera / decide: время вызова;
+- misfire: дальномер видит 150 см, камера один раз (первым кадром или
+  посреди чистых) срабатывает в одном секторе (текстура, блик). decide()
+  должен совпасть с прогоном, где кадр чистый, - иначе одиночный кадр
+  запускает торможение или объезд.
+  misfire_decide_changes - число секторов, где совпадения нет; больше
+  нуля - ошибка бенчмарка (run_all --fail-on-regression её ловит);
+- confirm: камера видит препятствие каждый кадр (10 Гц) при «свободном»
+  дальномере - через сколько кадров оно попадает в decide().
+"""
+import numpy as np
+
+import _common
+from clock import VirtualClock
+from obstacle_fusion import ObstacleFusion
+
+N_SECTORS = 8
+FRAME_DT = 0.1
+SONAR_DT = 0.05
+
+
+def _run_scenario(profiles, duration, sonar=150.0):
+    """decide() по ходу сценария: profiles(i) - профиль i-го кадра камеры"""
+    fusion = ObstacleFusion(n_sectors=N_SECTORS, clock=VirtualClock())
+    decisions = []
+    t, next_frame, frame = 0.0, 0.0, 0
+    while t <= duration:
+        fusion.update_sonar(sonar, now=t)
+        if t >= next_frame:
+            fusion.update_camera(profiles(frame), now=t)
+            frame += 1
+            next_frame += FRAME_DT
+        decisions.append(fusion.decide(now=t))
+        t += SONAR_DT
+    return decisions
+
+
+def _misfire_changes():
+    clean = np.zeros(N_SECTORS, dtype=bool)
+    reference = _run_scenario(lambda i: clean, 1.0)
+    changed = []
+    for sector in range(N_SECTORS):
+        misfire = clean.copy()
+        misfire[sector] = True
+        # Первым кадром (камера ещё ничего не знает) и посреди чистых кадров
+        for at in (0, 3):
+            decisions = _run_scenario(lambda i: misfire if i == at else clean, 1.0)
+            if decisions != reference:
+                changed.append(sector)
+                break
+    return changed
+
+
+def _frames_to_block(sector):
+    profile = np.zeros(N_SECTORS, dtype=bool)
+    profile[sector] = True
+    decisions = _run_scenario(lambda i: profile, 1.0)
+    for step, (distance, _) in enumerate(decisions):
+        if distance is not None and distance < ObstacleFusion.RANGE_CM:
+            return int(step * SONAR_DT / FRAME_DT + 1e-9) + 1
+    return float('nan')
+
+
+def run(quick=False):
+    repeat = 200 if quick else 2000
+    fusion = ObstacleFusion(n_sectors=N_SECTORS, clock=VirtualClock())
+    profile = np.zeros(N_SECTORS, dtype=bool)
+    profile[2] = True
+    distances = np.full(N_SECTORS, np.inf, dtype=np.float32)
+    distances[2] = 45.0
+    state = {'t': 0.0}
+
+    def tick():
+        state['t'] += SONAR_DT
+        return state['t']
+
+    results = {
+        'update_sonar': _common.measure(lambda: fusion.update_sonar(150.0, now=tick()), repeat=repeat),
+        'update_camera': _common.measure(lambda: fusion.update_camera(profile, now=tick()), repeat=repeat),
+        'update_camera distances': _common.measure(
+            lambda: fusion.update_camera(profile, distances, now=tick()), repeat=repeat),
+        'decide': _common.measure(lambda: fusion.decide(now=tick()), repeat=repeat),
+    }
+
+    changed = _misfire_changes()
+    results['misfire'] = {'misfire_decide_changes': len(changed)}
+    results['confirm'] = {
+        'frames_outside_sonar_cone': _frames_to_block(2),
+        'frames_in_sonar_cone': _frames_to_block(3),
+    }
+    if changed:
+        raise RuntimeError(f"одиночное срабатывание камеры меняет decide() в секторах {changed}")
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("obstacle fusion", run())
@@ -0,0 +1,96 @@
+"""Обработка кадра препятствий: исходный путь против EdgeVision и FloorVision.
+
+Кадры: python3 benchmarks/bench_obstacle_vision.py [каталог с .jpg/.png/.npy]
+Без каталога используется синтетическая последовательность 640x480.
+"""
+import os
+import sys
+import time
+import glob
+import cv2
+import numpy as np
+
+import _common
+from obstacle_vision import EdgeVision, FloorVision
+
+
+def legacy_detect(frame):
+    """Исходный путь ObstacleDetector (до оптимизации), без показа окна"""
+    if frame.ndim == 2:
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+    elif frame.shape[2] == 3:
+        frame_rgb = frame.copy()
+    else:
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+    frame_rgb = frame_rgb.copy()
+    height = frame_rgb.shape[0]
+    roi = frame_rgb[int(height * 0.5):, :]
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(blurred, 30, 100)
+    edge_density = cv2.countNonZero(edges) / (roi.size / 3)
+    debug_frame = frame_rgb.copy()
+    cv2.putText(debug_frame, f"Density: {edge_density:.2f}", (10, 30),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    return edge_density > 0.05
+
+
+def load_frames(path=None, count=120):
+    """Записанные кадры из каталога или синтетическая сцена"""
+    if path:
+        frames = []
+        for name in sorted(glob.glob(os.path.join(path, '*'))):
+            if name.endswith('.npy'):
+                frames.append(np.load(name))
+            elif name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                frames.append(cv2.imread(name))
+        if frames:
+            return frames
+    rng = np.random.default_rng(0)
+    base = rng.integers(90, 140, (480, 640, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = base.copy()
+        # Половина кадров - робот стоит (сцена статична), половина - едет
+        if i < count // 2:
+            frame = np.roll(base, 7 * i, axis=1)
+        x = 200 + (7 * i if i < count // 2 else 0) % 300
+        cv2.rectangle(frame, (x, 300), (x + 80, 470), (20, 20, 20), -1)
+        frame += rng.integers(0, 3, frame.shape, dtype=np.uint8)
+        frames.append(frame)
+    return frames
+
+
+def _per_frame(fn, frames, rounds):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            fn(frame)
+    return (time.perf_counter() - t0) * 1000 / (rounds * len(frames))
+
+
+def run(quick=False, path=None):
+    frames = load_frames(path)
+    rounds = 1 if quick else 5
+    results = {'frames': len(frames)}
+    results['legacy'] = {'ms_per_frame': _per_frame(legacy_detect, frames, rounds)}
+    for scale in (1.0, 0.5, 0.25):
+        vision = EdgeVision(downscale=scale, skip_static=False)
+        results[f"edge scale={scale}"] = {'ms_per_frame': _per_frame(vision.process, frames, rounds)}
+    vision = EdgeVision(downscale=0.5, skip_static=True, max_static_age=1e9)
+    skipped = []
+    def process(frame):
+        vision.process(frame)
+        skipped.append(vision.skipped)
+    row = {'ms_per_frame': _per_frame(process, frames, rounds)}
+    row['skipped_ratio'] = float(np.mean(skipped))
+    results["edge scale=0.5 + frame diff"] = row
+    for scale in (0.5, 0.25):
+        floor = FloorVision(downscale=scale)
+        floor.learn(frames[0])
+        results[f"floor scale={scale}"] = {'ms_per_frame': _per_frame(floor.process, frames, rounds)}
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("obstacle_vision", run(path=sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,31 @@
+"""Стоимость обновления карты занятости на один луч при разных разрешениях"""
+import numpy as np
+
+import _common
+from occupancy_grid import OccupancyGrid
+
+RESOLUTIONS_CM = (2, 5, 10)
+BATCH_SIZES = (1, 5, 32)
+
+
+def run(quick=False):
+    repeat = 50 if quick else 300
+    rng = np.random.default_rng(0)
+    results = {}
+    for cell in RESOLUTIONS_CM:
+        grid = OccupancyGrid(size_cm=400, cell_cm=cell)
+        for batch in BATCH_SIZES:
+            bearings = rng.uniform(-np.pi, np.pi, batch).astype(np.float32)
+            distances = rng.uniform(20, 300, batch).astype(np.float32)
+            row = _common.measure(lambda: grid.update_rays(bearings, distances), repeat=repeat)
+            row['per_ray_us'] = row['mean_us'] / batch
+            results[f"cell={cell}cm batch={batch}"] = row
+        results[f"cell={cell}cm freer_direction"] = _common.measure(
+            grid.freer_direction, repeat=repeat)
+        results[f"cell={cell}cm move"] = _common.measure(
+            lambda: grid.move(3.0, 0.01), repeat=repeat)
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("occupancy_grid", run())
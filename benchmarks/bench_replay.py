@@ -0,0 +1,83 @@
+"""Запись и воспроизведение команд моторов (replay.py): круговая проверка.
+
+Один и тот же сценарий команд идёт через SessionRecorder.wrap_motor поверх
+MotorController на поддельном GPIO (реальное время, разгон ступенями по
+20 мс) и через ReplayMotor на виртуальном времени. Потоки (время, код,
+скорость) должны совпасть: иначе compare_streams находит расхождение в
+любой настоящей записи. Расхождение - ошибка бенчмарка.
+
+- commands: длина записанного потока;
+- max_dt_ms: наибольший сдвиг времени команды между записью и прогоном.
+"""
+import time
+import logging
+import tempfile
+
+import numpy as np
+
+import _common
+import fakes
+from clock import VirtualClock
+
+# (метод, аргументы, пауза после, с)
+SCENARIO = [
+    ('move_forward', (30,), 0.1),
+    ('set_speed', (28,), 0.05),
+    ('set_speed', (28,), 0.05),
+    ('turn_left', (), 0.1),
+    ('stop', (), 0.05),
+    ('move_forward', (26,), 0.1),
+    ('set_speed', (26,), 0.05),
+    ('move_backward', (), 0.05),
+    ('emerg_stop', (0.05,), 0.05),
+    ('move_forward', (), 0.05),
+    ('stop', (), 0.0),
+]
+
+
+def _record():
+    from motor_control import MotorController
+    from replay import SessionRecorder
+
+    with tempfile.TemporaryDirectory() as path:
+        session = SessionRecorder(path)
+        motor = session.wrap_motor(MotorController())
+        start = time.time()
+        for name, args, pause in SCENARIO:
+            getattr(motor, name)(*args)
+            time.sleep(pause)
+        session.save()
+        return start, np.array(session.motor, dtype=np.float64).reshape(-1, 3)
+
+
+def _replay(start):
+    from replay import ReplayMotor
+
+    clock = VirtualClock(start=start)
+    motor = ReplayMotor(clock)
+    for name, args, pause in SCENARIO:
+        getattr(motor, name)(*args)
+        clock.advance(pause)
+    return np.array(motor.commands, dtype=np.float64).reshape(-1, 3)
+
+
+def run(quick=False):
+    fakes.install()
+    from replay import compare_streams
+
+    logging.getLogger('motor_control').setLevel(logging.WARNING)
+    start, recorded = _record()
+    replayed = _replay(start)
+    report = compare_streams(recorded, replayed, start, tolerance=0.05)
+    same_speed = len(recorded) == len(replayed) and np.array_equal(recorded[:, 1:], replayed[:, 1:])
+    if report['divergence'] is not None or not same_speed:
+        raise RuntimeError(f"запись и воспроизведение расходятся: {report['divergence']}, "
+                           f"записано {recorded[:, 1:].tolist()}, получено {replayed[:, 1:].tolist()}")
+    return {'round trip': {
+        'commands': len(recorded),
+        'max_dt_ms': float(np.abs(recorded[:, 0] - replayed[:, 0]).max()) * 1000,
+    }}
+
+
+if __name__ == "__main__":
+    _common.print_results("replay", run())
@@ -0,0 +1,84 @@
+"""Нагрузка на CPU голосового канала с VAD и без него.
+
+python3 benchmarks/bench_vad.py [файлы.wav ...]
+Без файлов используется синтетическая запись: тишина с шумом и короткие
+«фразы». Если установлен vosk и есть модель, дополнительно замеряется
+CPU распознавателя на всех кадрах против кадров, прошедших VAD.
+"""
+import os
+import sys
+import time
+import numpy as np
+
+import _common
+from vad import EnergyVAD
+
+MODEL_PATH = os.path.join(_common.ROOT, "vosk_model/vosk-model-small-ru-0.22")
+FRAME_MS = 50
+
+
+def synthetic_pcm(seconds=60, sample_rate=16000):
+    """Фоновый шум и фраза длиной 1 с каждые 10 с"""
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 60, seconds * sample_rate)
+    t = np.arange(sample_rate) / sample_rate
+    phrase = 4000 * np.sin(2 * np.pi * 180 * t) * np.sin(np.pi * t)
+    for start in range(5, seconds - 1, 10):
+        audio[start * sample_rate:(start + 1) * sample_rate] += phrase
+    return np.clip(audio, -32768, 32767).astype('<i2').tobytes()
+
+
+def _recognizer_cpu(frames):
+    from vosk import Model, KaldiRecognizer
+    recognizer = KaldiRecognizer(Model(MODEL_PATH), 16000)
+    t0 = time.process_time()
+    for frame in frames:
+        recognizer.AcceptWaveform(frame)
+    recognizer.FinalResult()
+    return time.process_time() - t0
+
+
+def run(quick=False, paths=()):
+    if paths:
+        pcm = b"".join(_common.read_wav(p)[0] for p in paths)
+    else:
+        pcm = synthetic_pcm(20 if quick else 60)
+    frames = _common.split_frames(pcm, 16000, FRAME_MS)
+    audio_seconds = len(frames) * FRAME_MS / 1000
+
+    vad = EnergyVAD(frame_ms=FRAME_MS)
+    passed = []
+    t0 = time.process_time()
+    for frame in frames:
+        out, _ = vad.push(frame)
+        passed.extend(out)
+    vad_cpu = time.process_time() - t0
+
+    results = {
+        'audio_s': audio_seconds,
+        'vad': {
+            'cpu_ms_per_audio_s': vad_cpu * 1000 / audio_seconds,
+            'us_per_frame': vad_cpu * 1e6 / len(frames),
+            'passed_ratio': len(passed) / len(frames),
+        },
+    }
+    try:
+        import vosk  # noqa: F401
+        have_vosk = os.path.isdir(MODEL_PATH)
+    except ImportError:
+        have_vosk = False
+    if have_vosk:
+        full = _recognizer_cpu(frames)
+        gated = _recognizer_cpu(passed)
+        results['recognizer'] = {
+            'cpu_all_frames_s': full,
+            'cpu_with_vad_s': gated + vad_cpu,
+            'cpu_ratio': (gated + vad_cpu) / full if full else 0.0,
+        }
+    else:
+        results['recognizer'] = "vosk или модель недоступны - пропущено"
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("vad", run(paths=sys.argv[1:]))
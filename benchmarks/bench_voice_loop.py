@@ -0,0 +1,58 @@
+"""Цикл голосовых команд VoiceCommandListener.run на поддельном vosk.
+
+Поток кадров - синтетическая запись из bench_vad (шум и фразы), подаётся
+без пауз; распознаватель - fakes (пустой текст, команды не выполняются).
+Время на кадр 50 мс - накладные расходы цикла, VAD и вызовов
+распознавателя без самого декодирования; с настоящим vosk это время
+добавляется к его собственному.
+"""
+import time
+import logging
+
+import _common
+import fakes
+from bench_vad import synthetic_pcm, FRAME_MS
+
+
+class _Stream:
+    """Как AudioStream.read(): (время захвата, кадр), None - конец"""
+
+    def __init__(self, frames):
+        self._frames = iter(frames)
+
+    def read(self):
+        frame = next(self._frames, None)
+        return None if frame is None else (time.monotonic(), frame)
+
+
+def run(quick=False):
+    fakes.install()
+    from vosk import Model
+    from vad import EnergyVAD
+    from voice_command_listener_sh import VoiceCommandListener, create_recognizer
+
+    frames = _common.split_frames(synthetic_pcm(20 if quick else 60), 16000, FRAME_MS)
+    results = {}
+    for name, use_vad in (('no vad', False), ('vad', True)):
+        recognizer = create_recognizer(Model(), keyword_mode=True)
+        vad = EnergyVAD(sample_rate=16000, frame_ms=FRAME_MS) if use_vad else None
+        listener = VoiceCommandListener(recognizer, _Stream(frames), vad=vad)
+        root = logging.getLogger()
+        level = root.level
+        root.setLevel(logging.ERROR)   # «нет данных от микрофона» в конце записи
+        try:
+            t0, c0 = time.perf_counter(), time.process_time()
+            listener.run()
+            wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+        finally:
+            root.setLevel(level)
+        results[name] = {
+            'us_per_chunk': wall / len(frames) * 1e6,
+            'cpu_ms_per_audio_s': cpu * 1000 / (len(frames) * FRAME_MS / 1000),
+            'recognizer_frames': recognizer.accepted,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    _common.print_results("voice loop", run())
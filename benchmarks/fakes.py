@@ -0,0 +1,300 @@
+"""Поддельное оборудование для бенчмарков на обычной Linux-машине.
+
+install() подставляет в sys.modules модули RPi.GPIO, picamera2 и vosk,
+если настоящих нет (или force=True). Подделки ведут себя достаточно
+похоже, чтобы работал код робота без изменений:
+
+  RPi.GPIO  - пины и ШИМ без эффекта; ECHO дальномера отвечает импульсом
+              по времени, соответствующим echo_distance_cm (см. set_distance)
+  picamera2 - Picamera2, отдающая синтетические кадры нужного размера
+  vosk      - Model / KaldiRecognizer: фраза «распознаётся» каждые
+              phrase_frames кадров, текст пустой (команды не выполняются)
+
+make_detector() - ObjectDetector с настоящими весами, если они лежат в
+корне проекта, иначе с поддельной сетью (forward возвращает случайные
+выходы формы YOLOv3, время forward тогда не показательно).
+"""
+import os
+import sys
+import time
+import json
+import types
+import contextlib
+import importlib.util
+import numpy as np
+
+import _common
+
+
+# --- RPi.GPIO ---
+
+class _FakeGPIO(types.ModuleType):
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    HIGH = 1
+    LOW = 0
+
+    SOUND_CM_S = 34300
+    ECHO_PIN = 24
+    TRIG_PIN = 23
+
+    def __init__(self):
+        super().__init__("RPi.GPIO")
+        self._functions = {}
+        self._levels = {}
+        self.echo_distance_cm = 100.0
+        self._distances = None
+        self._trigger_time = None
+        self.outputs = 0
+
+    def set_distance(self, distance_cm):
+        """Расстояние (или последовательность для циклического перебора), см"""
+        if np.ndim(distance_cm):
+            self._distances = iter(np.resize(np.asarray(distance_cm, dtype=float), 1 << 20))
+        else:
+            self._distances = None
+            self.echo_distance_cm = float(distance_cm)
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, mode, **kwargs):
+        self._functions[pin] = mode
+        self._levels[pin] = 0
+
+    def gpio_function(self, pin):
+        return self._functions.get(pin, self.IN)
+
+    def output(self, pin, value):
+        self.outputs += 1
+        value = int(bool(value))
+        if pin == self.TRIG_PIN and self._levels.get(pin) == 1 and value == 0:
+            # Задний фронт TRIG - датчик посылает импульс
+            self._trigger_time = time.time()
+            if self._distances is not None:
+                self.echo_distance_cm = next(self._distances)
+        self._levels[pin] = value
+
+    def input(self, pin):
+        if pin != self.ECHO_PIN:
+            return self._levels.get(pin, 0)
+        if self._trigger_time is None:
+            return 0
+        # Задержка до эха ~0.5 мс (как у HC-SR04), затем импульс длины ~ расстоянию
+        elapsed = time.time() - self._trigger_time - 0.0005
+        width = 2 * self.echo_distance_cm / self.SOUND_CM_S
+        return 1 if 0 <= elapsed < width else 0
+
+    def cleanup(self, *args):
+        self._levels.clear()
+
+    class PWM:
+        def __init__(self, pin, frequency):
+            self.pin = pin
+            self.frequency = frequency
+            self.duty = 0
+
+        def start(self, duty):
+            self.duty = duty
+
+        def ChangeDutyCycle(self, duty):
+            self.duty = duty
+
+        def ChangeFrequency(self, frequency):
+            self.frequency = frequency
+
+        def stop(self):
+            self.duty = 0
+
+
+# --- picamera2 ---
+
+def synthetic_frame(width=640, height=480, seed=0):
+    """Кадр «пол и препятствие» с небольшим шумом"""
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), (90, 110, 120), dtype=np.uint8)
+    frame[height // 2:] = (60, 80, 100)
+    x = int(width * (0.3 + 0.4 * rng.random()))
+    frame[int(height * 0.55):, x:x + width // 10] = (20, 20, 30)
+    frame += rng.integers(0, 12, frame.shape, dtype=np.uint8)
+    return frame
+
+
+class _FakePicamera2:
+    def __init__(self, *args, **kwargs):
+        self._size = (640, 480)
+        self._frames = None
+        self._index = 0
+        self.frame_interval = 1 / 30   # частота кадров настоящей камеры
+
+    def create_still_configuration(self, main=None, buffer_count=1, **kwargs):
+        return {"main": dict(main or {"size": (640, 480)}), "buffer_count": buffer_count}
+
+    def configure(self, config):
+        self._size = tuple(config["main"]["size"])
+        self._frames = [synthetic_frame(*self._size, seed=i) for i in range(8)]
+
+    def start(self):
+        if self._frames is None:
+            self.configure(self.create_still_configuration())
+
+    def stop(self):
+        pass
+
+    def capture_array(self, *args):
+        time.sleep(self.frame_interval)
+        self._index = (self._index + 1) % len(self._frames)
+        return self._frames[self._index].copy()
+
+
+# --- vosk ---
+
+class _FakeModel:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class _FakeKaldiRecognizer:
+    phrase_frames = 40
+
+    def __init__(self, model, sample_rate, grammar=None):
+        self.sample_rate = sample_rate
+        self.grammar = grammar
+        self._frames = 0
+        self.accepted = 0
+
+    def AcceptWaveform(self, data):
+        # Немного работы, пропорциональной кадру, как у настоящего декодера
+        np.frombuffer(data, dtype='<i2').astype(np.float32).sum()
+        self._frames += 1
+        self.accepted += 1
+        return self._frames % self.phrase_frames == 0
+
+    def Result(self):
+        return json.dumps({"text": ""})
+
+    def PartialResult(self):
+        return json.dumps({"partial": ""})
+
+    def FinalResult(self):
+        self._frames = 0
+        return json.dumps({"text": ""})
+
+    def SetWords(self, flag):
+        pass
+
+
+def _available(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def install(force=False):
+    """Подставить поддельные модули оборудования; возвращает список подменённых"""
+    installed = []
+    if force or not _available("RPi"):
+        gpio = _FakeGPIO()
+        rpi = types.ModuleType("RPi")
+        rpi.GPIO = gpio
+        sys.modules["RPi"] = rpi
+        sys.modules["RPi.GPIO"] = gpio
+        installed.append("RPi.GPIO")
+    if force or not _available("picamera2"):
+        module = types.ModuleType("picamera2")
+        module.Picamera2 = _FakePicamera2
+        sys.modules["picamera2"] = module
+        installed.append("picamera2")
+    if force or not _available("vosk"):
+        module = types.ModuleType("vosk")
+        module.Model = _FakeModel
+        module.KaldiRecognizer = _FakeKaldiRecognizer
+        module.SetLogLevel = lambda level: None
+        sys.modules["vosk"] = module
+        installed.append("vosk")
+    return installed
+
+
+def gpio():
+    """Текущий модуль RPi.GPIO (поддельный после install())"""
+    import RPi.GPIO as GPIO
+    return GPIO
+
+
+# --- YOLO ---
+
+COCO_CLASSES = 80
+DOG_CLASS = 16
+
+
+def yolo_outputs(size, seed=0):
+    """Выходы трёх голов YOLOv3 для входа size x size"""
+    rng = np.random.default_rng(seed)
+    outs = []
+    for stride in (32, 16, 8):
+        rows = (size // stride) ** 2 * 3
+        out = rng.random((rows, 5 + COCO_CLASSES), dtype=np.float32) * 0.05
+        out[:, :4] = rng.random((rows, 4), dtype=np.float32)
+        out[::97, 5 + DOG_CLASS] = 0.9   # несколько уверенных «собак»
+        outs.append(out)
+    return outs
+
+
+class FakeNet:
+    """Замена cv2.dnn_Net: forward отдаёт заранее посчитанные выходы"""
+
+    def __init__(self, *args):
+        self._outs = {}
+        self._size = None
+
+    def getLayerNames(self):
+        return ["yolo_82", "yolo_94", "yolo_106"]
+
+    def getUnconnectedOutLayers(self):
+        return np.array([1, 2, 3])
+
+    def setInput(self, blob):
+        self._size = blob.shape[2]
+
+    def forward(self, layers):
+        if self._size not in self._outs:
+            self._outs[self._size] = yolo_outputs(self._size)
+        return self._outs[self._size]
+
+
+@contextlib.contextmanager
+def _cwd(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def make_detector(**kwargs):
+    """ObjectDetector: (детектор, True если сеть настоящая)"""
+    import tempfile
+    from object_detector import ObjectDetector, cv2
+
+    names = os.path.join(_common.ROOT, 'coco.names')
+    weights = os.path.join(_common.ROOT, 'yolov3.weights')
+    if os.path.exists(weights) and os.path.exists(names):
+        with _cwd(_common.ROOT):
+            return ObjectDetector(**kwargs), True
+
+    read_net = cv2.dnn.readNet
+    cv2.dnn.readNet = FakeNet
+    try:
+        with tempfile.TemporaryDirectory() as tmp, _cwd(tmp):
+            with open('coco.names', 'w') as f:
+                f.write("\n".join("dog" if i == DOG_CLASS else f"class{i}" for i in range(COCO_CLASSES)))
+            return ObjectDetector(**kwargs), False
+    finally:
+        cv2.dnn.readNet = read_net
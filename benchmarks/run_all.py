@@ -0,0 +1,194 @@
+"""Запуск всех бенчмарков с сохранением результатов и сравнением с прошлым прогоном.
+
+    python3 benchmarks/run_all.py [--quick] [--only detector,motor]
+                                  [--baseline PATH] [--threshold 0.15]
+                                  [--fail-on-regression]
+
+Оборудование подменяется поддельным (fakes.install), если настоящего нет,
+так что набор идёт на любой Linux-машине. Результаты пишутся в
+benchmarks/results/<дата>_<время>.json вместе с ревизией git, хостом и
+версией Python. Сравнение - с последним файлом в results/ (или --baseline):
+метрики времени и ошибки (*_us, *_ms, *_s, *error*, us_per_*, ms_per_*),
+выросшие больше порога, считаются регрессией. Сравнивать стоит прогоны
+одного режима (--quick или полный) на одной машине.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import socket
+import platform
+import argparse
+import importlib
+import subprocess
+import traceback
+
+import _common
+import fakes
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Меньше - лучше: время, задержка, ошибка
+LOWER_IS_BETTER = ('us', 'ms', 's', 'seconds', 'error')
+MIN_ABS_US = 1.0   # разница меньше микросекунды - шум, а не регрессия
+
+
+def discover(only=None):
+    names = sorted(
+        os.path.basename(path)[len('bench_'):-len('.py')]
+        for path in glob.glob(os.path.join(BENCH_DIR, 'bench_*.py'))
+    )
+    if only:
+        names = [name for name in names if name in only]
+    return names
+
+
+def run_bench(name, quick):
+    t0 = time.perf_counter()
+    try:
+        module = importlib.import_module(f"bench_{name}")
+        results = module.run(quick=quick)
+        error = None
+    except Exception as e:
+        results = {}
+        error = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    return {
+        'results': results,
+        'error': error,
+        'seconds': time.perf_counter() - t0,
+    }
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=_common.ROOT,
+            capture_output=True, text=True, timeout=10,
+        )
+        revision = out.stdout.strip() or None
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=_common.ROOT,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+        return f"{revision}-dirty" if revision and dirty else revision
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _lower_is_better(key):
+    key = key.lower()
+    if 'error' in key:
+        return True
+    parts = key.split('_')
+    return parts[-1] in LOWER_IS_BETTER or (len(parts) > 1 and parts[0] in ('us', 'ms') and parts[1] == 'per')
+
+
+def _flatten(results, prefix=''):
+    """{'бенчмарк': {'случай': {'метрика': число}}} -> {'бенчмарк/случай/метрика': число}"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def compare(current, baseline, threshold):
+    """Список (метрика, было, стало, отношение) для выросших больше порога"""
+    if current['meta'].get('quick') != baseline['meta'].get('quick'):
+        print("Внимание: базовый прогон в другом режиме (--quick), сравнение неточное")
+    now = _flatten({name: b['results'] for name, b in current['benchmarks'].items()})
+    before = _flatten({name: b['results'] for name, b in baseline['benchmarks'].items()})
+    regressions = []
+    for path, value in now.items():
+        old = before.get(path)
+        if old is None or old <= 0 or not _lower_is_better(path.rsplit('/', 1)[-1]):
+            continue
+        if path.endswith('_us') and value - old < MIN_ABS_US:
+            continue
+        ratio = value / old
+        if ratio > 1 + threshold:
+            regressions.append((path, old, value, ratio))
+    return regressions
+
+
+def latest_results(exclude=None):
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')))
+    paths = [p for p in paths if p != exclude]
+    return paths[-1] if paths else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Все бенчмарки робота")
+    parser.add_argument('--quick', action='store_true', help="короткие прогоны")
+    parser.add_argument('--only', default='', help="через запятую: detector,motor,...")
+    parser.add_argument('--baseline', help="файл результатов для сравнения (по умолчанию последний)")
+    parser.add_argument('--threshold', type=float, default=0.15, help="допустимый рост, доля")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="код выхода 1 при регрессии или ошибке бенчмарка")
+    parser.add_argument('--no-save', action='store_true', help="не сохранять результаты")
+    args = parser.parse_args(argv)
+
+    installed = fakes.install()
+    if installed:
+        print(f"Поддельное оборудование: {', '.join(installed)}")
+
+    only = {name.strip() for name in args.only.split(',') if name.strip()}
+    current = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'revision': _git_revision(),
+            'host': socket.gethostname(),
+            'machine': platform.machine(),
+            'python': platform.python_version(),
+            'quick': args.quick,
+            'fakes': installed,
+        },
+        'benchmarks': {},
+    }
+    for name in discover(only):
+        bench = run_bench(name, args.quick)
+        current['benchmarks'][name] = bench
+        if bench['error']:
+            print(f"== {name} == ОШИБКА: {bench['error']}")
+        else:
+            _common.print_results(name, bench['results'])
+
+    path = None
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, time.strftime('%Y%m%d_%H%M%S') + '.json')
+        with open(path, 'w') as f:
+            json.dump(current, f, ensure_ascii=False, indent=1, default=str)
+        print(f"\nРезультаты: {path}")
+
+    failed = [name for name, b in current['benchmarks'].items() if b['error']]
+    baseline_path = args.baseline or latest_results(exclude=path)
+    regressions = []
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        revision = baseline['meta'].get('revision')
+        print(f"Сравнение с {os.path.basename(baseline_path)} (ревизия {revision}):")
+        for metric, old, new, ratio in regressions:
+            print(f"  РЕГРЕССИЯ {metric}: {old:.2f} -> {new:.2f} (+{(ratio - 1) * 100:.0f}%)")
+        if not regressions:
+            print(f"  регрессий больше {args.threshold * 100:.0f}% нет")
+    else:
+        print("Прошлых результатов нет, сравнивать не с чем")
+    if failed:
+        print(f"Бенчмарки с ошибкой: {', '.join(failed)}")
+
+    if args.fail_on_regression and (regressions or failed):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
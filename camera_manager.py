@@ -1,24 +1,55 @@
 import queue
 import threading
-import time
-from picamera2 import Picamera2
-from libcamera import controls
+import logging
+import numpy as np
+from startup import lazy_import
+from metrics import get_metrics
+from debug_stream import get_debug_stream
+
+logger = logging.getLogger(__name__)
+
+picamera2 = lazy_import("picamera2")
 
 class CameraManager:
     def __init__(self):
-        self.picam2 = Picamera2()
+        self.picam2 = picamera2.Picamera2()
         self._stop_event = threading.Event()
+        self._ready_event = threading.Event()   # получен первый кадр
         self.frame_queue = queue.Queue(maxsize=2)
         self._capture_thread = None
 
+        metrics = get_metrics()
+        self.metric_captured = metrics.counter("camera_frames_total", "Захваченные кадры")
+        self.metric_dropped = metrics.counter("camera_frames_dropped_total", "Кадры, не попавшие в полную очередь")
+        self.metric_capture = metrics.histogram("camera_capture_seconds", "Время capture_array")
+        metrics.gauge("camera_queue_size", "Кадров в очереди", fn=self.frame_queue.qsize)
+
+        self.resolution = (640, 480)
+        self._configure()
+
+        self.start()
+
+    def _configure(self):
         # Настройка камеры (важно: используем RGB888)
         self.config = self.picam2.create_still_configuration(
-            main={"size": (640, 480), "format": "RGB888"},
+            main={"size": self.resolution, "format": "RGB888"},
             buffer_count=2
         )
         self.picam2.configure(self.config)
 
+    def set_resolution(self, size):
+        """Смена разрешения захвата: камера перезапускается"""
+        size = tuple(size)
+        if size == self.resolution:
+            return
+        self.stop()
+        self.resolution = size
+        self._configure()
+        # Кадры прежнего размера потребителям не отдаём
+        while self.get_frame() is not None:
+            pass
         self.start()
+        logger.info(f"Разрешение камеры {size[0]}x{size[1]}")
 
     def start(self):
         """Явный запуск потока захвата"""
@@ -31,15 +62,23 @@ class CameraManager:
                 name="CameraCaptureThread"
             )
             self._capture_thread.start()
-            time.sleep(2)  # Важно: даем камере время на инициализацию
+
+    def is_ready(self):
+        """Камера прогрелась и отдаёт кадры"""
+        return self._ready_event.is_set()
+
+    def wait_ready(self, timeout=2.0):
+        """Ожидание первого кадра вместо фиксированной паузы"""
+        return self._ready_event.wait(timeout)
 
     def _capture_worker(self):
         test_count = 0
         while not self._stop_event.is_set():
             try:
-                frame = self.picam2.capture_array()
+                with self.metric_capture.time():
+                    frame = self.picam2.capture_array()
                 if frame is None:
-                    print("Получен None-кадр")
+                    logger.warning("Получен None-кадр")
                     continue
 
                 #print(f"Размер кадра: {frame.shape}, тип: {frame.dtype}")
@@ -50,13 +89,16 @@ class CameraManager:
                 #    cv2.imwrite(f"test_frame_{test_count}.jpg", frame)
                 #    test_count += 1
 
+                self._ready_event.set()
+                self.metric_captured.inc()
+                get_debug_stream().frame(frame)
                 try:
                     self.frame_queue.put_nowait(frame)
                 except queue.Full:
-                    pass
+                    self.metric_dropped.inc()
 
             except Exception as e:
-                print(f"Ошибка в потоке захвата: {e}")
+                logger.error(f"Ошибка в потоке захвата: {e}")
 
     def get_frame(self):
         """Получение кадра из очереди"""
@@ -0,0 +1,89 @@
+import time
+import asyncio
+import functools
+import selectors
+
+
+class Clock:
+    """Системные часы. Навигация берёт время только через clock, чтобы при
+    воспроизведении записи (replay.py) его можно было подменить виртуальным."""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+REAL_CLOCK = Clock()
+
+
+class VirtualClock(Clock):
+    """Виртуальное время: sleep() не ждёт, а сдвигает часы"""
+
+    def __init__(self, start=0.0):
+        self._start = start
+        self._now = 0.0
+
+    def time(self):
+        return self._start + self._now
+
+    def monotonic(self):
+        return self._now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        if seconds > 0:
+            self._now += seconds
+
+
+class _VirtualSelector:
+    """Селектор, который вместо ожидания таймаута сдвигает виртуальные часы"""
+
+    def __init__(self, clock, selector):
+        self._clock = clock
+        self._selector = selector
+
+    def select(self, timeout=None):
+        if timeout:
+            self._clock.advance(timeout)
+        return self._selector.select(0)
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """Event loop на виртуальном времени.
+
+    asyncio.sleep() и call_later() срабатывают сразу, как только все задачи
+    ждут: loop перескакивает к ближайшему таймеру. Корутины навигации
+    выполняются без изменений, но без реальных пауз.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        super().__init__(_VirtualSelector(clock, selectors.DefaultSelector()))
+
+    def time(self):
+        return self.clock.monotonic()
+
+
+async def run_blocking(clock, fn, *args, **kwargs):
+    """Блокирующий вызов драйвера (плавная смена скорости, замер дальномера)
+    из корутины, не останавливая event loop.
+
+    На реальном времени вызов уходит в пул потоков: корутина ждёт его, а
+    остальные задачи loop (отмена, следование, таймеры) продолжают работать.
+    На виртуальном времени вызов выполняется сразу - его паузы уже идут в
+    часы (ReplayMotor, ReplaySensor).
+    """
+    if isinstance(clock, VirtualClock):
+        return fn(*args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(
+        None, functools.partial(fn, *args, **kwargs))
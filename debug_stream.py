@@ -0,0 +1,225 @@
+import os
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from startup import lazy_import
+
+logger = logging.getLogger(__name__)
+
+cv2 = lazy_import("cv2")
+
+DEBUG_STREAM_HOST = "127.0.0.1"
+DEBUG_STREAM_PORT = 9109
+BOUNDARY = "frame"
+
+
+def draw_overlay(image, items):
+    """Отрисовка примитивов наложения на изображение (на месте).
+
+    Примитивы - кортежи:
+      ('rect', x, y, w, h, color)
+      ('text', x, y, text, color)
+      ('mask', top, mask, color) - закраска пикселей маски (любого размера),
+                                   растянутой на полосу от top до низа кадра
+    """
+    height, width = image.shape[:2]
+    for item in items:
+        kind = item[0]
+        if kind == 'rect':
+            _, x, y, w, h, color = item
+            cv2.rectangle(image, (x, y), (x + w, y + h), color, 2)
+        elif kind == 'text':
+            _, x, y, text, color = item
+            cv2.putText(image, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        elif kind == 'mask':
+            _, top, mask, color = item
+            mask = cv2.resize(mask, (width, height - top), interpolation=cv2.INTER_NEAREST)
+            image[top:][mask > 0] = color
+    return image
+
+
+class DebugStream:
+    """Отладочное видео по HTTP (MJPEG) вместо cv2.imshow.
+
+    Камера отдаёт кадры через frame(), подсистемы - наложения через
+    overlay(): это только сохранение ссылки на последний кадр / список
+    примитивов, без копирования и отрисовки. Сборка кадра, рисование и
+    кодирование в JPEG идут в собственном потоке не чаще fps раз в
+    секунду и только пока подключён хотя бы один клиент; без клиентов
+    кадры и наложения отбрасываются сразу (проверка active).
+    """
+
+    def __init__(self, host=DEBUG_STREAM_HOST, port=DEBUG_STREAM_PORT, fps=5, quality=70,
+                 overlay_ttl=1.0):
+        self.period = 1.0 / fps
+        self.quality = quality
+        self.overlay_ttl = overlay_ttl       # наложение старше этого не рисуется, с
+        self.clients = 0
+        self._frame = None
+        self._frame_time = 0.0
+        self._overlays = {}                  # источник -> (время, примитивы)
+        self._jpeg = None
+        self._jpeg_id = 0
+        self._lock = threading.Lock()
+        self._new_jpeg = threading.Condition()
+        self._has_clients = threading.Event()
+        self._stop_event = threading.Event()
+
+        stream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/stream":
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                stream._client_connected()
+                try:
+                    for jpeg in stream._jpegs():
+                        self.wfile.write(
+                            f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                            f"Content-Length: {len(jpeg)}\r\n\r\n".encode('ascii'))
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    stream._client_disconnected()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True, name="DebugStreamServer")
+        self._compose_thread = threading.Thread(
+            target=self._compose_loop, daemon=True, name="DebugStreamThread")
+
+    @property
+    def active(self):
+        """Есть ли смотрящие (иначе рисовать наложения незачем)"""
+        return self.clients > 0
+
+    def frame(self, frame):
+        """Очередной кадр камеры (ссылка, без копии)"""
+        if self.clients:
+            self._frame, self._frame_time = frame, time.monotonic()
+
+    def overlay(self, source, items):
+        """Наложение подсистемы source: список примитивов draw_overlay"""
+        if self.clients:
+            with self._lock:
+                self._overlays[source] = (time.monotonic(), items)
+
+    def start(self):
+        self._server_thread.start()
+        self._compose_thread.start()
+        host, port = self._server.server_address[:2]
+        logger.info(f"Отладочное видео: http://{host}:{port}/stream")
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._has_clients.set()
+        with self._new_jpeg:
+            self._new_jpeg.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _client_connected(self):
+        with self._lock:
+            self.clients += 1
+            self._has_clients.set()
+
+    def _client_disconnected(self):
+        with self._lock:
+            self.clients -= 1
+            if self.clients == 0:
+                self._has_clients.clear()
+                self._frame = None
+                self._overlays.clear()
+
+    def _jpegs(self):
+        """Новые JPEG по мере сборки (для обработчика клиента)"""
+        last_id = self._jpeg_id   # кадр, собранный до подключения, не отдаём
+        while not self._stop_event.is_set():
+            with self._new_jpeg:
+                self._new_jpeg.wait_for(
+                    lambda: self._jpeg_id != last_id or self._stop_event.is_set(), timeout=1.0)
+                if self._jpeg_id == last_id:
+                    continue
+                jpeg, last_id = self._jpeg, self._jpeg_id
+            yield jpeg
+
+    def compose(self):
+        """Кадр с наложениями в JPEG (None, если кадра нет)"""
+        frame = self._frame
+        if frame is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            overlays = [items for t, items in self._overlays.values() if now - t < self.overlay_ttl]
+        image = frame.copy()
+        for items in overlays:
+            draw_overlay(image, items)
+        ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return jpeg.tobytes() if ok else None
+
+    def _compose_loop(self):
+        last_frame_time = None
+        while not self._stop_event.is_set():
+            # Без клиентов поток спит и ничего не собирает
+            self._has_clients.wait()
+            t0 = time.monotonic()
+            if self._frame_time != last_frame_time:
+                last_frame_time = self._frame_time
+                try:
+                    jpeg = self.compose()
+                except Exception as e:
+                    logger.error(f"Ошибка сборки отладочного кадра: {e}")
+                    jpeg = None
+                if jpeg is not None:
+                    with self._new_jpeg:
+                        self._jpeg = jpeg
+                        self._jpeg_id += 1
+                        self._new_jpeg.notify_all()
+            self._stop_event.wait(max(0.0, self.period - (time.monotonic() - t0)))
+
+
+class _DisabledStream:
+    """Заглушка, когда отладочное видео не запущено"""
+
+    active = False
+
+    def frame(self, frame):
+        pass
+
+    def overlay(self, source, items):
+        pass
+
+
+_stream = _DisabledStream()
+
+def get_debug_stream():
+    """Отладочное видео процесса (заглушка, пока не вызван start_debug_stream)"""
+    return _stream
+
+
+def start_debug_stream(port=None):
+    """Запуск отладочного видео, если задана ROBOT_DEBUG_STREAM=1 (или порт)"""
+    global _stream
+    setting = os.environ.get('ROBOT_DEBUG_STREAM', '')
+    if port is None:
+        if setting in ('', '0'):
+            return _stream
+        port = int(setting) if setting != '1' else DEBUG_STREAM_PORT
+    try:
+        _stream = DebugStream(port=port).start()
+    except OSError as e:
+        logger.warning(f"Отладочное видео не запущено: {e}")
+    return _stream
@@ -0,0 +1,130 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def iou_matrix(a, b):
+    """IoU между рамками (x1, y1, x2, y2): матрица len(a) x len(b)"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class DetectionFusion:
+    """Подтверждение детекций во времени.
+
+    Рамки ObjectDetector связываются между кадрами по IoU в треки. У трека
+    накапливается уверенность с затуханием и битовая история попаданий за
+    последние m обработанных кадров; трек подтверждён, если попаданий не
+    меньше n и накопленная уверенность не ниже min_score. Одиночные ложные
+    срабатывания не проходят, поэтому порог уверенности и размер входа
+    детектора можно снизить.
+
+    Состояние - массивы фиксированного размера max_tracks.
+    """
+
+    def __init__(self, n=3, m=5, iou_threshold=0.3, decay=0.7, min_score=0.6,
+                 max_tracks=16, smoothing=0.5):
+        if not 0 < n <= m <= 16:
+            raise ValueError("нужно 0 < n <= m <= 16")
+        self.n = n
+        self.m = m
+        self.iou_threshold = iou_threshold
+        self.decay = decay
+        self.min_score = min_score
+        self.smoothing = smoothing
+
+        self.boxes = np.zeros((max_tracks, 4), dtype=np.float32)   # нормированные x1, y1, x2, y2
+        self.scores = np.zeros(max_tracks, dtype=np.float32)
+        self.history = np.zeros(max_tracks, dtype=np.uint16)       # бит 0 - текущий кадр
+        self.labels = np.full(max_tracks, -1, dtype=np.int16)
+        self.active = np.zeros(max_tracks, dtype=bool)
+        self._mask = np.uint16((1 << m) - 1)
+        self._popcount = np.array([bin(i).count('1') for i in range(1 << m)], dtype=np.uint8)
+        self._label_ids = {}
+
+    def reset(self):
+        self.scores[:] = 0
+        self.history[:] = 0
+        self.labels[:] = -1
+        self.active[:] = False
+
+    def _label_id(self, label):
+        return self._label_ids.setdefault(label, len(self._label_ids))
+
+    def update(self, detections, frame_shape):
+        """Учесть детекции очередного обработанного кадра.
+
+        detections - результат ObjectDetector.detect_objects. Возвращает
+        подтверждённые треки: список словарей label, score, hits, box
+        (x, y, w, h в пикселях кадра).
+        """
+        height, width = frame_shape[:2]
+        scale = np.array([width, height, width, height], dtype=np.float32)
+
+        self.scores *= self.decay
+        self.history = (self.history << 1) & self._mask
+
+        if detections:
+            det_boxes = np.array(
+                [[x, y, x + w, y + h] for x, y, w, h in (d['box'] for d in detections)],
+                dtype=np.float32) / scale
+            det_conf = np.array([d['confidence'] for d in detections], dtype=np.float32)
+            det_labels = np.array([self._label_id(d['label']) for d in detections], dtype=np.int16)
+            self._associate(det_boxes, det_conf, det_labels)
+
+        # Трек без попаданий за m кадров освобождается
+        self.active &= self.history != 0
+        return self.confirmed(scale)
+
+    def _associate(self, det_boxes, det_conf, det_labels):
+        tracks = np.flatnonzero(self.active)
+        matched = np.zeros(len(det_boxes), dtype=bool)
+        if len(tracks):
+            iou = iou_matrix(self.boxes[tracks], det_boxes)
+            iou[self.labels[tracks][:, None] != det_labels[None, :]] = 0.0
+            # Жадное сопоставление по убыванию IoU
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                t, d = divmod(int(flat), len(det_boxes))
+                if iou[t, d] < self.iou_threshold:
+                    break
+                if matched[d] or np.isnan(iou[t, 0]):
+                    continue
+                slot = tracks[t]
+                self.boxes[slot] += self.smoothing * (det_boxes[d] - self.boxes[slot])
+                self.scores[slot] += det_conf[d]
+                self.history[slot] |= 1
+                matched[d] = True
+                iou[t, :] = np.nan   # трек занят
+
+        for d in np.flatnonzero(~matched):
+            free = np.flatnonzero(~self.active)
+            # Нет свободного места - вытесняем трек с наименьшей уверенностью
+            slot = free[0] if len(free) else int(np.argmin(self.scores))
+            self.boxes[slot] = det_boxes[d]
+            self.scores[slot] = det_conf[d]
+            self.history[slot] = 1
+            self.labels[slot] = det_labels[d]
+            self.active[slot] = True
+
+    def confirmed(self, scale=None):
+        hits = self._popcount[self.history]
+        ok = self.active & (hits >= self.n) & (self.scores >= self.min_score)
+        names = {v: k for k, v in self._label_ids.items()}
+        result = []
+        for slot in np.flatnonzero(ok):
+            x1, y1, x2, y2 = self.boxes[slot] * (scale if scale is not None else 1.0)
+            result.append({
+                'label': names[int(self.labels[slot])],
+                'score': float(self.scores[slot]),
+                'hits': int(hits[slot]),
+                'box': [round(x1), round(y1), round(x2 - x1), round(y2 - y1)],
+            })
+        return result
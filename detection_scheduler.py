@@ -0,0 +1,112 @@
+import logging
+import threading
+from startup import lazy_import
+from clock import REAL_CLOCK
+
+logger = logging.getLogger(__name__)
+
+cv2 = lazy_import("cv2")
+
+DETECTOR = "detector"     # YOLO, поиск собаки
+OBSTACLES = "obstacles"   # детектор препятствий по камере
+
+FOLLOWING = "following"   # режим следования за собакой: YOLO - основной датчик
+
+# Бюджет по состоянию движения: потребитель -> (минимальный интервал, с;
+# доля одного ядра). Едем - приоритет у препятствий, стоим - у YOLO.
+BUDGETS = {
+    'stopped': {DETECTOR: (0.0, 0.8), OBSTACLES: (1.0, 0.1)},
+    'driving': {DETECTOR: (0.5, 0.3), OBSTACLES: (0.1, 0.6)},
+    'turning': {DETECTOR: (1.0, 0.15), OBSTACLES: (0.1, 0.7)},
+    FOLLOWING: {DETECTOR: (0.0, 0.9), OBSTACLES: (1.0, 0.05)},
+}
+
+MOTION_STATES = {
+    'stop': 'stopped',
+    'emerg_stop': 'stopped',
+    'forward': 'driving',
+    'backward': 'driving',
+    'left': 'turning',
+    'right': 'turning',
+}
+
+
+class SceneChange:
+    """Оценка изменения сцены: средняя разность уменьшенных серых кадров (0-255)"""
+
+    def __init__(self, size=(32, 24)):
+        self.size = size
+        self._previous = None
+
+    def small(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+
+    def score(self, small):
+        """Изменение относительно последнего принятого кадра (inf, если его нет)"""
+        if self._previous is None:
+            return float('inf')
+        return float(cv2.absdiff(small, self._previous).mean())
+
+    def accept(self, small):
+        self._previous = small
+
+
+class _Consumer:
+    def __init__(self):
+        self.last_run = float('-inf')
+        self.cost = 0.0                 # скользящее среднее времени обработки, с
+        self.scene = SceneChange()
+        self.lock = threading.Lock()
+
+
+class DetectionScheduler:
+    """Распределение процессорного времени между YOLO и детектором препятствий.
+
+    Перед обработкой кадра потребитель спрашивает should_run(): кадр
+    пропускается, если не прошёл интервал для текущего состояния движения
+    (по MotorController.direction) или если сцена не изменилась с последней
+    обработки. Интервал не меньше cost / share, где cost - среднее время
+    обработки, share - доля ядра по BUDGETS.
+    """
+
+    def __init__(self, motor, clock=REAL_CLOCK, change_threshold=3.0, max_static_age=3.0):
+        self.motor = motor
+        self.clock = clock
+        self.change_threshold = change_threshold
+        self.max_static_age = max_static_age
+        self.mode = None   # режим поведения (FOLLOWING) важнее состояния моторов
+        self.rate_scale = 1.0   # множитель интервалов (QualityGovernor при перегреве)
+        self._consumers = {DETECTOR: _Consumer(), OBSTACLES: _Consumer()}
+
+    @property
+    def motion_state(self):
+        if self.mode is not None:
+            return self.mode
+        return MOTION_STATES.get(getattr(self.motor, 'direction', 'stop'), 'driving')
+
+    def interval(self, name):
+        min_interval, share = BUDGETS[self.motion_state][name]
+        return max(min_interval, self._consumers[name].cost / share) * self.rate_scale
+
+    def should_run(self, name, frame):
+        consumer = self._consumers[name]
+        now = self.clock.monotonic()
+        with consumer.lock:
+            age = now - consumer.last_run
+            if age < self.interval(name):
+                return False
+            small = consumer.scene.small(frame)
+            # При следовании цель нужно видеть постоянно, даже в статичной сцене
+            if (self.mode != FOLLOWING
+                    and consumer.scene.score(small) < self.change_threshold
+                    and age < self.max_static_age):
+                return False
+            consumer.scene.accept(small)
+            consumer.last_run = now
+        return True
+
+    def done(self, name, elapsed):
+        """Учёт времени обработки кадра, с"""
+        consumer = self._consumers[name]
+        consumer.cost = elapsed if consumer.cost == 0.0 else 0.8 * consumer.cost + 0.2 * elapsed
@@ -3,9 +3,8 @@ import logging
 import RPi.GPIO as GPIO
 from statistics import median
 from gpio_manager import GPIOManager
+from flight_recorder import get_recorder, KIND_DISTANCE
 
-# Настройка логов
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DistanceSensor:
@@ -19,6 +18,7 @@ class DistanceSensor:
         self.gpio.setup_pin(self.TRIG, GPIO.OUT, "Ультразвуковой датчик (TRIG)")
         self.gpio.setup_pin(self.ECHO, GPIO.IN, "Ультразвуковой датчик (ECHO)")
         GPIO.output(self.TRIG, False)
+        self.recorder = get_recorder()
 
     def get_distance(self, samples=5, max_deviation=10, timeout=0.1):
         """Измерение расстояния с фильтрацией выбросов"""
@@ -43,7 +43,8 @@ class DistanceSensor:
                 # Расчет расстояния
                 duration = pulse_end - pulse_start
                 current_distance = (duration * 34300) / 2  # в см
-                logger.info(f"[{self.name}] Текущее измерение: {current_distance:.2f} см")
+                # Горячий путь: аргументы форматируются, только если DEBUG включён
+                logger.debug("Текущее измерение: %.2f см", current_distance)
 
                 if 2 <= current_distance <= 400:
                     valid_readings.append(current_distance)
@@ -55,12 +56,15 @@ class DistanceSensor:
                 continue
             
         if not valid_readings:
+            self.recorder.record(KIND_DISTANCE, 0, float('nan'), 0)
             return None
 
         avg_distance = sum(valid_readings) / len(valid_readings)
         filtered = [x for x in valid_readings if abs(x - avg_distance) <= max_deviation]
 
         if not filtered:
-            return round(avg_distance, 2)
-
-        return round(sum(filtered) / len(filtered), 2)
+            result = round(avg_distance, 2)
+        else:
+            result = round(sum(filtered) / len(filtered), 2)
+        self.recorder.record(KIND_DISTANCE, 0, result, len(valid_readings))
+        return result
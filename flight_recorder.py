@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import signal
+import logging
+import itertools
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Компактная запись: время, тип события, код, два значения (18 байт)
+RECORD_DTYPE = np.dtype([
+    ('t', '<f8'),
+    ('kind', 'u1'),
+    ('code', 'u1'),
+    ('a', '<f4'),
+    ('b', '<f4'),
+])
+
+# Типы событий
+KIND_DISTANCE = 1    # a - расстояние, см (nan - нет эха), b - число валидных импульсов
+KIND_MOTOR = 2       # code - команда, a - скорость, %
+KIND_DETECTION = 3   # code - класс COCO (255 - итог кадра), a - уверенность / число объектов, b - x центра / мс
+KIND_NAV_STATE = 4   # code - новое состояние навигации
+
+KIND_NAMES = {
+    KIND_DISTANCE: 'distance',
+    KIND_MOTOR: 'motor',
+    KIND_DETECTION: 'detection',
+    KIND_NAV_STATE: 'nav_state',
+}
+
+MOTOR_CODES = {
+    'speed': 1,
+    'forward': 2,
+    'backward': 3,
+    'left': 4,
+    'right': 5,
+    'stop': 6,
+    'emerg_stop': 7,
+}
+
+NAV_STATES = {
+    'cruise': 1,
+    'slow': 2,
+    'bypass': 3,
+    'emergency': 4,
+    'recovery': 5,
+}
+
+DETECTION_FRAME = 255
+
+
+class FlightRecorder:
+    """Бортовой самописец: кольцевой буфер фиксированного размера.
+
+    Запись события - одно присваивание в заранее выделенный массив, без
+    блокировок (номер слота берётся из itertools.count, атомарного под
+    GIL). По запросу или при падении буфер сбрасывается в .npy-файл через
+    memmap; прочитать его можно load_dump() или
+    python3 flight_recorder.py <файл>.
+    """
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self._counter = itertools.count()
+        self._written = 0
+
+    def record(self, kind, code=0, a=0.0, b=0.0):
+        i = next(self._counter)
+        self._buf[i % self.capacity] = (time.time(), kind, code, a, b)
+        self._written = i + 1
+
+    def snapshot(self):
+        """Копия записей в хронологическом порядке"""
+        written = self._written
+        if written <= self.capacity:
+            return self._buf[:written].copy()
+        start = written % self.capacity
+        return np.concatenate([self._buf[start:], self._buf[:start]])
+
+    def dump(self, path=None):
+        """Сброс буфера в файл .npy (через memmap). Возвращает путь"""
+        if path is None:
+            os.makedirs('logs', exist_ok=True)
+            path = time.strftime('logs/flight_%Y%m%d_%H%M%S.npy')
+        records = self.snapshot()
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=RECORD_DTYPE, shape=records.shape)
+        out[:] = records
+        out.flush()
+        del out
+        logger.info(f"Самописец: {len(records)} записей сохранено в {path}")
+        return path
+
+
+_recorder = None
+
+def get_recorder():
+    """Общий самописец процесса"""
+    global _recorder
+    if _recorder is None:
+        _recorder = FlightRecorder()
+    return _recorder
+
+
+def install_crash_dump(recorder=None):
+    """Сброс самописца при необработанном исключении (в любом потоке) и по SIGUSR1"""
+    recorder = recorder or get_recorder()
+    previous_hook = sys.excepthook
+    previous_thread_hook = threading.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        try:
+            recorder.dump()
+        finally:
+            previous_hook(exc_type, exc, tb)
+
+    def thread_excepthook(args):
+        try:
+            recorder.dump()
+        finally:
+            previous_thread_hook(args)
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_excepthook
+    signal.signal(signal.SIGUSR1, lambda signum, frame: recorder.dump())
+
+
+def load_dump(path):
+    """Загрузка дампа: словарь столбцов NumPy (t, kind, code, a, b)"""
+    records = np.load(path, mmap_mode='r')
+    return {name: np.asarray(records[name]) for name in RECORD_DTYPE.names}
+
+
+def _summary(path, tail=20):
+    data = load_dump(path)
+    n = len(data['t'])
+    print(f"{path}: {n} записей")
+    if n == 0:
+        return
+    print(f"Интервал: {data['t'][-1] - data['t'][0]:.2f} с")
+    for kind, name in KIND_NAMES.items():
+        print(f"  {name}: {int(np.count_nonzero(data['kind'] == kind))}")
+    motor_names = {v: k for k, v in MOTOR_CODES.items()}
+    nav_names = {v: k for k, v in NAV_STATES.items()}
+    t0 = data['t'][0]
+    for i in range(max(0, n - tail), n):
+        kind, code = int(data['kind'][i]), int(data['code'][i])
+        label = KIND_NAMES.get(kind, str(kind))
+        if kind == KIND_MOTOR:
+            label += f" {motor_names.get(code, code)}"
+        elif kind == KIND_NAV_STATE:
+            label += f" {nav_names.get(code, code)}"
+        elif kind == KIND_DETECTION:
+            label += " frame" if code == DETECTION_FRAME else f" class={code}"
+        print(f"  {data['t'][i] - t0:9.3f}  {label:<22} a={data['a'][i]:.2f} b={data['b'][i]:.2f}")
+
+
+if __name__ == "__main__":
+    for dump_path in sys.argv[1:]:
+        _summary(dump_path)
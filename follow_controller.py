@@ -0,0 +1,231 @@
+import bisect
+import asyncio
+import logging
+import threading
+from collections import deque
+from clock import REAL_CLOCK, run_blocking
+from metrics import get_metrics
+from local_planner import LocalPlanner
+from occupancy_grid import OccupancyGrid
+
+logger = logging.getLogger(__name__)
+
+
+class TargetPredictor:
+    """Альфа-бета фильтр положения цели.
+
+    bearing - азимут цели, рад (вправо положительный), size - ширина рамки
+    в долях ширины кадра. Между детекциями положение экстраполируется по
+    оценённой скорости; через max_age без детекций цель считается
+    потерянной.
+    """
+
+    def __init__(self, alpha=0.8, beta=0.6, max_age=1.0):
+        self.alpha = alpha
+        self.beta = beta
+        self.max_age = max_age
+        self.reset()
+
+    def reset(self):
+        self.t = None
+        self.bearing = self.size = 0.0
+        self.bearing_rate = self.size_rate = 0.0
+
+    def update(self, t, bearing, size):
+        if self.t is None or t <= self.t:
+            self.t, self.bearing, self.size = t, bearing, size
+            self.bearing_rate = self.size_rate = 0.0
+            return
+        dt = t - self.t
+        predicted_bearing = self.bearing + self.bearing_rate * dt
+        predicted_size = self.size + self.size_rate * dt
+        r_bearing = bearing - predicted_bearing
+        r_size = size - predicted_size
+        self.bearing = predicted_bearing + self.alpha * r_bearing
+        self.size = predicted_size + self.alpha * r_size
+        self.bearing_rate += self.beta * r_bearing / dt
+        self.size_rate += self.beta * r_size / dt
+        self.t = t
+
+    def predict(self, t):
+        """(bearing, size) на момент t или None, если цель потеряна"""
+        if self.t is None or t - self.t > self.max_age:
+            return None
+        dt = t - self.t
+        return self.bearing + self.bearing_rate * dt, max(0.0, self.size + self.size_rate * dt)
+
+
+class FollowController:
+    """Следование за собакой: рамка цели -> повороты и скорость MotorController.
+
+    Команды выдаются по расписанию rate_hz независимо от (более редких)
+    детекций. Замер дальномера и смена скорости моторов (ступени по 20 мс)
+    выполняются вне event loop, но входят в такт: такт, начавшийся позже
+    своего срока, считается в control_overruns_total.
+
+    Собственный поворот робота счисляется по командам (TURN_RATE),
+    поэтому цель ведётся по азимуту относительно начального курса: детекция,
+    пришедшая с задержкой, пересчитывается на курс в момент захвата кадра,
+    а между кадрами азимут предсказывает TargetPredictor. predict=False -
+    без счисления и предсказания: последняя рамка как есть.
+
+    Дальномер ограничивает движение вперёд: ближе STOP_DISTANCE только
+    повороты, ближе SLOW_DISTANCE - минимальная скорость.
+    """
+
+    TURN_THRESHOLD = 0.25    # смещение цели, после которого доворачиваем
+    CENTER_THRESHOLD = 0.1   # смещение, при котором поворот заканчивается
+    TARGET_SIZE = 0.4        # ширина рамки, при которой цель достаточно близко
+    STOP_DISTANCE = 25       # см
+    SLOW_DISTANCE = 50       # см
+    DISTANCE_EVERY = 2       # замер дальномера раз в столько тактов
+    OVERRUN_TOLERANCE = 0.02 # с, опоздание такта, которое считается просрочкой
+    TURN_RATE = LocalPlanner.MAX_ANGULAR   # рад/с при повороте на месте
+    HALF_FOV = OccupancyGrid.CAMERA_HFOV / 2
+
+    def __init__(self, motor, sensor, clock=REAL_CLOCK, rate_hz=20, predict=True, max_age=1.0):
+        self.motor = motor
+        self.sensor = sensor
+        self.clock = clock
+        self.period = 1.0 / rate_hz
+        self.predict = predict
+        self.predictor = TargetPredictor(max_age=max_age)
+        self._lock = threading.Lock()
+        self._last_detection = None   # время кадра последней детекции
+        self._reacted_to = None
+        self._last_offset = None
+        self._yaw = 0.0                         # счисленный курс, рад (вправо +)
+        self._yaw_times = deque(maxlen=256)     # история курса для задержанных детекций
+        self._yaw_values = deque(maxlen=256)
+        self._last_tick = None
+        self.action = None
+        self.speed = None
+        self.distance = None
+        self.running = False
+
+        metrics = get_metrics()
+        self.metric_reaction = metrics.histogram(
+            "follow_reaction_seconds", "От кадра с детекцией до смены команды моторов")
+        self.metric_ticks = metrics.counter("follow_ticks_total", "Такты контроллера следования")
+        self.metric_overruns = metrics.counter("control_overruns_total",
+                                               "Опоздания такта управления больше допуска")
+
+    def on_detection(self, box, frame_shape, t=None):
+        """Новая рамка цели (x, y, w, h). t - время захвата кадра по clock.monotonic()"""
+        height, width = frame_shape[:2]
+        x, _, w, _ = box
+        offset = (x + w / 2) / width * 2 - 1
+        t = self.clock.monotonic() if t is None else t
+        with self._lock:
+            bearing = offset * self.HALF_FOV + self._yaw_at(t)
+            self.predictor.update(t, bearing, w / width)
+            self._last_offset = (offset, w / width)
+            self._last_detection = t
+
+    def _yaw_at(self, t):
+        """Курс робота в момент t (по истории тактов)"""
+        if not self._yaw_times or t >= self._yaw_times[-1]:
+            return self._yaw
+        i = bisect.bisect_right(self._yaw_times, t)
+        return self._yaw_values[max(0, i - 1)]
+
+    def _integrate_yaw(self, now):
+        if self._last_tick is not None:
+            rate = {'left': -self.TURN_RATE, 'right': self.TURN_RATE}.get(self.action, 0.0)
+            with self._lock:
+                self._yaw += rate * (now - self._last_tick)
+                self._yaw_times.append(now)
+                self._yaw_values.append(self._yaw)
+        self._last_tick = now
+
+    def decide(self, now, distance):
+        """Команда на момент now: (действие, скорость %) или (None, None), если цель потеряна"""
+        with self._lock:
+            target = self.predictor.predict(now)
+            if target is None:
+                return None, None
+            if self.predict:
+                bearing, size = target
+                offset = (bearing - self._yaw) / self.HALF_FOV
+            else:
+                offset, size = self._last_offset
+        motor = self.motor
+
+        # Гистерезис: поворот начинается за TURN_THRESHOLD, заканчивается в CENTER_THRESHOLD
+        turning = self.action in ('left', 'right')
+        threshold = self.CENTER_THRESHOLD if turning else self.TURN_THRESHOLD
+        if abs(offset) > threshold:
+            return ('right' if offset > 0 else 'left'), motor.MAX_SPEED
+
+        if size >= self.TARGET_SIZE or (distance is not None and distance < self.STOP_DISTANCE):
+            return 'stop', 0
+        # Чем меньше рамка (дальше цель), тем быстрее
+        ratio = min(1.0, (self.TARGET_SIZE - size) / self.TARGET_SIZE)
+        speed = motor.MIN_SPEED + (motor.MAX_SPEED - motor.MIN_SPEED) * ratio
+        if distance is not None and distance < self.SLOW_DISTANCE:
+            speed = motor.MIN_SPEED
+        return 'forward', int(round(speed))
+
+    async def _apply(self, action, speed, now):
+        if action == self.action and speed == self.speed:
+            return
+        motor = self.motor
+        if action == 'stop':
+            await run_blocking(self.clock, motor.stop)
+        else:
+            # Сначала направление: разгон ступенями по 20 мс не задерживает поворот
+            if action != self.action:
+                command = {'forward': motor.move_forward, 'left': motor.turn_left, 'right': motor.turn_right}[action]
+                await run_blocking(self.clock, command)
+            if speed != self.speed:
+                await run_blocking(self.clock, motor.set_speed, speed)
+        if action != self.action and self._last_detection is not None \
+                and self._last_detection != self._reacted_to:
+            self.metric_reaction.observe(now - self._last_detection)
+            self._reacted_to = self._last_detection
+        self.action, self.speed = action, speed
+
+    async def run(self):
+        """Цикл управления; завершается при потере цели (возвращает False) или stop()"""
+        self.running = True
+        tick = 0
+        deadline = self.clock.monotonic()   # запланированное начало такта
+        try:
+            while self.running:
+                now = self.clock.monotonic()
+                # Опоздание от расписания: и позднее пробуждение, и долгий
+                # прошлый такт (замер, смена скорости)
+                if now - deadline > self.OVERRUN_TOLERANCE:
+                    self.metric_overruns.inc()
+                    deadline = now   # без серии догоняющих тактов
+                self._integrate_yaw(now)
+                if tick % self.DISTANCE_EVERY == 0:
+                    self.distance = await run_blocking(self.clock, self.sensor.get_distance, samples=1)
+                tick += 1
+                self.metric_ticks.inc()
+
+                action, speed = self.decide(now, self.distance)
+                if action is None:
+                    logger.info("Цель потеряна")
+                    await run_blocking(self.clock, self.motor.stop)
+                    self.action = self.speed = None
+                    return False
+                await self._apply(action, speed, now)
+                deadline += self.period
+                await asyncio.sleep(max(0.0, deadline - self.clock.monotonic()))
+            return True
+        finally:
+            self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def reset(self):
+        with self._lock:
+            self.predictor.reset()
+            self._last_detection = self._reacted_to = self._last_offset = None
+            self._yaw = 0.0
+            self._yaw_times.clear()
+            self._yaw_values.clear()
+        self._last_tick = None
+        self.action = self.speed = None
@@ -0,0 +1,110 @@
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class LocalPlanner:
+    """Локальный планировщик в духе DWA.
+
+    На каждом такте перебирает пачку команд (линейная, угловая скорость),
+    векторно прокатывает их по модели unicycle на горизонт и оценивает по
+    карте занятости. Робот поворачивает только на месте, поэтому дуга
+    исполняется разделением такта: часть времени - поворот, остаток - прямо.
+    Отсюда ограничение допустимых команд: |v|/V_MAX + |w|/W_MAX <= 1.
+    """
+
+    # Калибровка привода (при MAX_SPEED мотора)
+    MAX_LINEAR = 30.0         # см/с
+    MAX_ANGULAR = 1.5         # рад/с при повороте на месте
+    ROBOT_HALF_WIDTH = 10.0   # см
+    OCCUPIED_LOG_ODDS = 0.85  # порог занятости клетки (p ~ 0.7)
+
+    # Веса оценки траектории
+    W_PROGRESS = 1.0
+    W_CLEARANCE = 0.6
+    W_VELOCITY = 0.3
+
+    def __init__(self, grid, n_linear=6, n_angular=15, horizon=1.5, dt=0.1):
+        self.grid = grid
+        self.dt = dt
+        self.horizon = horizon
+
+        v = np.linspace(0.0, self.MAX_LINEAR, n_linear, dtype=np.float32)
+        w = np.linspace(-self.MAX_ANGULAR, self.MAX_ANGULAR, n_angular, dtype=np.float32)
+        vv, ww = np.meshgrid(v, w)
+        admissible = (vv / self.MAX_LINEAR + np.abs(ww) / self.MAX_ANGULAR) <= 1.0 + 1e-6
+        self.candidates = np.stack([vv[admissible], ww[admissible]], axis=1)
+
+        # Предрасчёт формы траекторий: они зависят только от (v, w), а не от карты
+        t = np.arange(1, int(round(horizon / dt)) + 1, dtype=np.float32) * dt
+        v = self.candidates[:, :1]
+        w = self.candidates[:, 1:]
+        theta = w * t
+        straight = np.abs(w) < 1e-6
+        w_safe = np.where(straight, 1.0, w)
+        xs = np.where(straight, v * t, v / w_safe * np.sin(theta))
+        ys = np.where(straight, 0.0, v / w_safe * (1.0 - np.cos(theta)))
+        # Бортовые точки корпуса: центр и два борта
+        nx, ny = -np.sin(theta), np.cos(theta)
+        self._xs = np.concatenate([xs, xs + nx * self.ROBOT_HALF_WIDTH, xs - nx * self.ROBOT_HALF_WIDTH], axis=1)
+        self._ys = np.concatenate([ys, ys + ny * self.ROBOT_HALF_WIDTH, ys - ny * self.ROBOT_HALF_WIDTH], axis=1)
+        self._final_x = xs[:, -1]
+        self._final_y = ys[:, -1]
+
+        self.last_scores = None
+
+    def plan(self, goal_heading=None):
+        """Выбор лучшей команды (v см/с, w рад/с) для текущего состояния карты"""
+        if goal_heading is None:
+            goal_heading = self.grid.heading
+
+        occ = self.grid.lookup(self._xs, self._ys)
+        worst = occ.max(axis=1)
+        collision = worst >= self.OCCUPIED_LOG_ODDS
+
+        # Прогресс вдоль заданного курса (в системе робота)
+        rel_goal = goal_heading - self.grid.heading
+        progress = (self._final_x * math.cos(rel_goal) + self._final_y * math.sin(rel_goal))
+        progress /= self.MAX_LINEAR * self.horizon
+        clearance = 1.0 - 1.0 / (1.0 + np.exp(-np.maximum(worst, 0.0)))
+        velocity = self.candidates[:, 0] / self.MAX_LINEAR
+
+        scores = (self.W_PROGRESS * progress
+                  + self.W_CLEARANCE * clearance
+                  + self.W_VELOCITY * velocity)
+        scores[collision] = -np.inf
+        self.last_scores = scores
+
+        if np.isneginf(scores).all():
+            # Все траектории блокированы - разворот на месте в свободную сторону
+            sign = 1.0 if self.grid.freer_direction() == 'left' else -1.0
+            logger.debug("Все траектории заблокированы, поворот на месте")
+            return 0.0, sign * self.MAX_ANGULAR
+
+        best = int(np.argmax(scores))
+        v, w = self.candidates[best]
+        return float(v), float(w)
+
+    def path_clear(self, distance_cm=50.0):
+        """Свободен ли коридор прямо перед роботом"""
+        xs = np.arange(0.0, distance_cm, self.grid.cell_cm, dtype=np.float32)
+        xs = np.concatenate([xs, xs, xs])
+        ys = np.repeat(np.array([0.0, self.ROBOT_HALF_WIDTH, -self.ROBOT_HALF_WIDTH], dtype=np.float32),
+                       len(xs) // 3)
+        return bool(self.grid.lookup(xs, ys).max() < self.OCCUPIED_LOG_ODDS)
+
+    def split_command(self, v, w):
+        """Разделение такта на поворот на месте и прямолинейное движение.
+
+        Возвращает (направление поворота или None, время поворота,
+        время движения вперёд, скорость вперёд в долях MAX_LINEAR)."""
+        turn_time = min(self.dt, abs(w) / self.MAX_ANGULAR * self.dt)
+        direction = None
+        if turn_time > 1e-3:
+            direction = 'left' if w > 0 else 'right'
+        forward_time = self.dt - turn_time
+        forward_ratio = 0.0
+        if v > 0 and forward_time > 1e-3:
+            forward_ratio = min(1.0, v * self.dt / forward_time / self.MAX_LINEAR)
+        return direction, turn_time, forward_time, forward_ratio
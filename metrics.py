@@ -0,0 +1,302 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+
+# Границы гистограмм длительностей, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _PerThread:
+    """Ячейки значений по потокам: каждый поток пишет только в свою ячейку,
+    поэтому запись идёт без блокировок; читатель суммирует ячейки"""
+
+    def __init__(self, size):
+        self._size = size
+        self._local = threading.local()
+        self._cells = []
+        self._lock = threading.Lock()   # только при первом обращении потока
+
+    def cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0] * self._size
+            with self._lock:
+                self._cells.append(cell)
+            return cell
+
+    def totals(self):
+        with self._lock:
+            cells = list(self._cells)
+        return [sum(values) for values in zip(*cells)] if cells else [0] * self._size
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self._cells = _PerThread(1)
+
+    def inc(self, n=1):
+        self._cells.cell()[0] += n
+
+    def value(self):
+        return self._cells.totals()[0]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help="", fn=None):
+        self.name = name
+        self.help = help
+        self._fn = fn          # значение вычисляется при чтении
+        self._value = 0.0
+
+    def set(self, value):
+        self._value = value
+
+    def value(self):
+        return self._fn() if self._fn is not None else self._value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # Ячейка: счётчики по корзинам (+Inf последняя), затем сумма
+        self._cells = _PerThread(len(self.buckets) + 2)
+
+    def observe(self, value):
+        cell = self._cells.cell()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self):
+        """Замер длительности блока: with histogram.time(): ..."""
+        return _Timer(self)
+
+    def snapshot(self):
+        """(счётчики по корзинам, количество, сумма)"""
+        totals = self._cells.totals()
+        counts = totals[:-1]
+        return counts, sum(counts), totals[-1]
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.t0
+        self.histogram.observe(self.elapsed)
+
+
+def thread_cpu_times():
+    """Процессорное время потоков процесса из /proc/self/task: {имя: секунды}"""
+    ticks = os.sysconf('SC_CLK_TCK')
+    names = {t.native_id: t.name for t in threading.enumerate()}
+    result = {}
+    try:
+        tids = os.listdir('/proc/self/task')
+    except OSError:
+        return result
+    for tid in tids:
+        try:
+            with open(f'/proc/self/task/{tid}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue  # поток уже завершился
+        # Имя потока в скобках может содержать пробелы - поля считаем после ')'
+        fields = stat[stat.rfind(')') + 2:].split()
+        utime, stime = int(fields[11]), int(fields[12])
+        name = names.get(int(tid), stat[stat.find('(') + 1:stat.rfind(')')])
+        result[name] = result.get(name, 0.0) + (utime + stime) / ticks
+    return result
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса: счётчики, показатели и гистограммы"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help="", fn=None):
+        return self._get(Gauge, name, help, fn)
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self):
+        """Текстовый формат Prometheus"""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if metric.kind == "histogram":
+                counts, count, total = metric.snapshot()
+                cumulative = 0
+                for bound, n in zip(metric.buckets + (float('inf'),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float('inf') else repr(bound)
+                    lines.append(f'{metric.name}_bucket{{le="{le}"}} {cumulative}')
+                lines.append(f"{metric.name}_sum {total}")
+                lines.append(f"{metric.name}_count {count}")
+            else:
+                lines.append(f"{metric.name} {metric.value()}")
+        lines.append("# HELP robot_thread_cpu_seconds_total Процессорное время потока")
+        lines.append("# TYPE robot_thread_cpu_seconds_total counter")
+        for name, seconds in sorted(thread_cpu_times().items()):
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'robot_thread_cpu_seconds_total{{thread="{label}"}} {seconds:.2f}')
+        return "\n".join(lines) + "\n"
+
+
+_registry = None
+
+def get_metrics():
+    """Общий реестр метрик процесса"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
+
+
+class MetricsServer:
+    """Локальная HTTP-точка /metrics для Prometheus (или curl)"""
+
+    def __init__(self, registry=None, host=METRICS_HOST, port=METRICS_PORT):
+        registry = registry or get_metrics()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="MetricsServer")
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"Метрики: http://{self._server.server_address[0]}:{self._server.server_address[1]}/metrics")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class MetricsLogger:
+    """Периодическая компактная строка лога: частоты счётчиков (/с),
+    показатели, средние гистограмм (мс) и загрузка CPU по потокам (%)"""
+
+    def __init__(self, registry=None, interval=10.0):
+        self.registry = registry or get_metrics()
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="MetricsLogger")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _snapshot(self):
+        values = {}
+        for metric in self.registry.metrics():
+            if metric.kind == "histogram":
+                _, count, total = metric.snapshot()
+                values[metric.name] = (count, total)
+            else:
+                values[metric.name] = metric.value()
+        return time.monotonic(), values, thread_cpu_times()
+
+    def line(self, previous, current):
+        t0, before, cpu_before = previous
+        t1, after, cpu_after = current
+        dt = max(t1 - t0, 1e-9)
+        parts = []
+        for metric in self.registry.metrics():
+            name = metric.name
+            if name not in after:
+                continue   # зарегистрирована после снимка - будет в следующей строке
+            if metric.kind == "counter":
+                parts.append(f"{name}={(after[name] - before.get(name, 0)) / dt:.1f}/с")
+            elif metric.kind == "gauge":
+                parts.append(f"{name}={after[name]:.4g}")
+            else:
+                count0, total0 = before.get(name, (0, 0.0))
+                count1, total1 = after[name]
+                if count1 > count0:
+                    parts.append(f"{name}={(total1 - total0) / (count1 - count0) * 1000:.1f}мс")
+        cpu = [
+            f"{name}={(seconds - cpu_before.get(name, 0.0)) / dt * 100:.0f}%"
+            for name, seconds in sorted(cpu_after.items())
+            if seconds - cpu_before.get(name, 0.0) > 0
+        ]
+        return " ".join(parts) + (" | cpu " + " ".join(cpu) if cpu else "")
+
+    def _run(self):
+        previous = self._snapshot()
+        while not self._stop_event.wait(self.interval):
+            try:
+                current = self._snapshot()
+                logger.info(self.line(previous, current))
+                previous = current
+            except Exception:
+                # Поток не должен умирать молча из-за одной строки
+                logger.exception("Ошибка строки метрик")
+
+
+def start_metrics(port=METRICS_PORT, log_interval=10.0):
+    """HTTP-точка и периодическая строка в лог (из точки входа процесса)"""
+    try:
+        MetricsServer(port=port).start()
+    except OSError as e:
+        logger.warning(f"HTTP-точка метрик не запущена: {e}")
+    return MetricsLogger(interval=log_interval).start()
@@ -1,21 +1,25 @@
 import RPi.GPIO as GPIO
 import time
 import logging
+import functools
+import threading
 from gpio_manager import GPIOManager
+from flight_recorder import get_recorder, KIND_MOTOR, MOTOR_CODES
 
-# Настройка логов
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("motor_control.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+def _locked(method):
+    """Команды из разных потоков (навигация в пуле потоков, остановка поведения)
+    выполняются целиком и не перемежаются"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class MotorController:
     def __init__(self):
+        self._lock = threading.RLock()
         
         # Настройка пинов
         self.FRONT_IN1 = 17
@@ -41,6 +45,9 @@ class MotorController:
         self.MIN_SPEED = 26
         self.MAX_SPEED = 30  # Ограничиваем максимальную скорость
         self._current_speed = self.MIN_SPEED  # Начальная скорость
+        self._duty = 0  # Скважность, записанная в ШИМ сейчас
+        self.direction = 'stop'  # Текущее направление движения
+        self.recorder = get_recorder()
 
     # Геттер
     @property
@@ -53,6 +60,12 @@ class MotorController:
         value = max(self.MIN_SPEED, min(self.MAX_SPEED, value))
         self._current_speed = value
 
+    def _record(self, command):
+        """Запись команды в бортовой самописец"""
+        if command != 'speed':
+            self.direction = command
+        self.recorder.record(KIND_MOTOR, MOTOR_CODES[command], self._current_speed)
+
     def _setup_pins(self):
         """Настраивает все GPIO пины как OUTPUT"""
         GPIO.setmode(GPIO.BCM)
@@ -86,31 +99,46 @@ class MotorController:
             logger.error(f"Ошибка инициализации ШИМ: {e}")
             raise  
 
+    def _set_duty(self, duty):
+        self.pwm_front_A.ChangeDutyCycle(duty)
+        self.pwm_front_B.ChangeDutyCycle(duty)
+        self.pwm_back_A.ChangeDutyCycle(duty)
+        self.pwm_back_B.ChangeDutyCycle(duty)
+        self._duty = duty
+
+    @_locked
     def set_speed(self, speed):
-        if self.current_speed is None:
-            self.current_speed = 0
-        """Плавное изменение скорости с защитой от float"""
+        """Плавное изменение скорости с защитой от float.
+
+        Сравнение идёт с фактической скважностью ШИМ, а не с current_speed
+        (он не бывает ниже MIN_SPEED): после stop() set_speed(MIN_SPEED)
+        действительно запускает моторы. Ступени по 1% - только в рабочем
+        диапазоне; ниже MIN_SPEED моторы не вращаются, туда и оттуда ШИМ
+        переключается сразу.
+        """
         speed = int(round(max(0, min(self.MAX_SPEED, speed)))) 
 
-        if speed == self.current_speed:
+        if speed == self._duty:
             return
 
-        step = 1 if speed > self.current_speed else -1
-
-        # Преобразуем в целые числа для range()
-        start = int(round(self.current_speed))
-        end = int(round(speed))
-        
-        for s in range(start, end, step):
-            self.pwm_front_A.ChangeDutyCycle(s)
-            self.pwm_front_B.ChangeDutyCycle(s)
-            self.pwm_back_A.ChangeDutyCycle(s)
-            self.pwm_back_B.ChangeDutyCycle(s)
-            time.sleep(0.02)  # 20ms на каждый шаг
+        level = self._duty
+        if level < self.MIN_SPEED <= speed:
+            level = self.MIN_SPEED  # Трогаемся сразу с минимальной скорости
+            self._set_duty(level)
+        if level >= self.MIN_SPEED:
+            target = max(speed, self.MIN_SPEED)
+            while level != target:
+                time.sleep(0.02)  # 20ms на каждый шаг
+                level += 1 if target > level else -1
+                self._set_duty(level)
+        if level != speed:
+            self._set_duty(speed)
         
         self.current_speed = speed
-        print(f"Установлена скорость: {speed}%")
+        self._record('speed')
+        logger.debug("Установлена скорость: %d%%", speed)
 
+    @_locked
     def move_forward(self, speed=None):
         """Движение вперед с указанной или текущей скоростью"""
         # Инициализация current_speed, если её нет
@@ -132,7 +160,8 @@ class MotorController:
         GPIO.output(self.BACK_IN3, GPIO.HIGH)
         GPIO.output(self.BACK_IN4, GPIO.LOW)
 
-        logger.info("Движение вперед")
+        self._record('forward')
+        logger.debug("Движение вперед")  # на каждом такте навигации и следования
         #print(f"Состояние пинов: IN1={GPIO.input(self.FRONT_IN1)}, IN2={GPIO.input(self.FRONT_IN2)}")
         
     def calibrate_min_speed(self):
@@ -163,8 +192,10 @@ class MotorController:
                 return
         print("Мотор не запустился! Проверьте питание и подключение.")
 
+    @_locked
     def move_backward(self):
         
+        self._record('backward')
         logger.info("Движение назад")
         # Передние моторы
         GPIO.output(self.FRONT_IN1, GPIO.LOW)
@@ -177,8 +208,10 @@ class MotorController:
         GPIO.output(self.BACK_IN3, GPIO.LOW)
         GPIO.output(self.BACK_IN4, GPIO.HIGH)
     
+    @_locked
     def turn_left(self):
         
+        self._record('left')
         logger.info("Поворот налево")
         # левое колесо - назад
         GPIO.output(self.FRONT_IN1, GPIO.LOW)
@@ -191,8 +224,10 @@ class MotorController:
         GPIO.output(self.BACK_IN3, GPIO.LOW)
         GPIO.output(self.BACK_IN4, GPIO.HIGH)
     
+    @_locked
     def turn_right(self):
         
+        self._record('right')
         logger.info("Поворот направо")
         # левое колесо - вперед
         GPIO.output(self.FRONT_IN1, GPIO.HIGH)
@@ -205,8 +240,10 @@ class MotorController:
         GPIO.output(self.BACK_IN3, GPIO.HIGH)
         GPIO.output(self.BACK_IN4, GPIO.LOW)
     
+    @_locked
     def stop(self):
         self.set_speed(0)
+        self._record('stop')
         logger.info("Остановка")
         # Остановка всех моторов
         GPIO.output(self.FRONT_IN1, GPIO.LOW)
@@ -218,7 +255,9 @@ class MotorController:
         GPIO.output(self.BACK_IN3, GPIO.LOW)
         GPIO.output(self.BACK_IN4, GPIO.LOW)
     
+    @_locked
     def emerg_stop(self, reverse_time=0.3):
+        self._record('emerg_stop')
         logger.info("Экстренная остановка")
         # Экстренное торможение с обратным ходом
         GPIO.output(self.FRONT_IN1, GPIO.LOW)
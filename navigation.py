@@ -1,36 +1,37 @@
-import time
 import random
 import logging
-import cv2
-import atexit
 import asyncio
-import threading
-from concurrent.futures import Future
 import numpy as np
-from picamera2 import Picamera2
-from libcamera import controls
-from motor_control import MotorController
-from distance_sensor import DistanceSensor
+from occupancy_grid import OccupancyGrid
+from local_planner import LocalPlanner
+from obstacle_fusion import ObstacleFusion
+from obstacle_vision import EdgeVision, FloorVision
+from flight_recorder import get_recorder, KIND_NAV_STATE, NAV_STATES
+from clock import REAL_CLOCK, run_blocking
+from metrics import get_metrics
+from detection_scheduler import OBSTACLES
+from debug_stream import get_debug_stream
 
-# Настройка логов
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class StuckDetector:
-    def __init__(self, motor, distance_sensor):
+    def __init__(self, motor, distance_sensor, clock=REAL_CLOCK):
         self.motor = motor
         self.distance_sensor = distance_sensor
+        self.clock = clock
         self.last_valid_distance = None
-        self.last_movement_time = time.time()
+        self.last_movement_time = clock.time()
         self.error_count = 0
         self.MAX_ERRORS = 3
         self.STUCK_TIME = 1.5
         self.MIN_CHANGE = 2.0
 
     def check_stuck(self):
-        try:
-            dist = self.distance_sensor.get_distance()
+        return self.check_reading(self.distance_sensor.get_distance())
 
+    def check_reading(self, dist):
+        """Проверка застревания по уже снятому замеру (None - ошибка датчика)"""
+        try:
             if dist is None:
                 self.error_count += 1
                 if self.error_count >= self.MAX_ERRORS:
@@ -40,16 +41,16 @@ class StuckDetector:
             # Первоначальная проверка изменения
             if self.last_valid_distance is None:
                 self.last_valid_distance = dist
-                self.last_movement_time = time.time()
+                self.last_movement_time = self.clock.time()
                 return False
 
             if abs(dist - self.last_valid_distance) >= self.MIN_CHANGE:
                 self.last_valid_distance = dist
-                self.last_movement_time = time.time()
+                self.last_movement_time = self.clock.time()
                 self.error_count = 0
                 return False
 
-            return (time.time() - self.last_movement_time) >= self.STUCK_TIME
+            return (self.clock.time() - self.last_movement_time) >= self.STUCK_TIME
 
         except Exception as e:
             logger.error(f"Ошибка при проверке застревания: {e}")
@@ -62,286 +63,373 @@ class StuckDetector:
         # 1. Отъезд назад
         self.motor.set_speed(self.motor.MIN_SPEED)
         self.motor.move_backward()
-        time.sleep(1.0)
+        self.clock.sleep(1.0)
         
         # 2. Поворот в случайном направлении
         if random.choice([True, False]):
             self.motor.turn_left()
         else:
             self.motor.turn_right()
-        time.sleep(0.8)
+        self.clock.sleep(0.8)
         
         # 3. Попытка движения вперед
         self.motor.move_forward(self.motor.MIN_SPEED)
-        time.sleep(1.5)
+        self.clock.sleep(1.5)
         
         self.reset_detector()
     
     def reset_detector(self):
         """Сброс состояния детектора"""
         self.last_distance = None
-        self.last_change_time = time.time()
+        self.last_change_time = self.clock.time()
 
 class NavigationSystem:
-    def __init__(self, motor, distance_sensor):
+    def __init__(self, motor, distance_sensor, grid=None, clock=REAL_CLOCK):
         self.motor = motor
         self.distance_sensor = distance_sensor
-        self.stuck_detector = StuckDetector(motor, distance_sensor)
+        self.grid = grid if grid is not None else OccupancyGrid()
+        self.planner = LocalPlanner(self.grid)
+        # Единая оценка препятствий: дальномер + профиль камеры (ObstacleDetector)
+        self.fusion = ObstacleFusion(hfov=self.grid.CAMERA_HFOV, sonar_cone=self.grid.SONAR_CONE,
+                                     camera_range_cm=self.grid.CAMERA_RANGE_CM, clock=clock)
+        self.bypassing = False
+        self.BYPASS_MAX_TICKS = 30  # ~3 с при такте 0.1 с
+        self.clock = clock
+        self.stuck_detector = StuckDetector(motor, distance_sensor, clock)
         self.SAFE_DISTANCE = 70  # см (начинать плавное торможение)
         self.EMERGENCY_DISTANCE = 50  # см (начинать объезд)
         self.CRITICAL_DISTANCE = 20  # см (экстренная остановка)
+        self.TICK = 0.15  # с, период такта (замер дальномера из 5 импульсов - ~130 мс)
+        self.OVERRUN_TOLERANCE = 0.02  # с, опоздание от расписания, после которого такт просрочен
+        self._next_tick = None  # срок конца текущего такта; None - отсчёт заново
         self.turn_time = None
+        self._odometry_time = None  # момент последнего счисления пути
+        self.state = None  # cruise / slow / bypass / emergency / recovery
+        self.recorder = get_recorder()
+        metrics = get_metrics()
+        self.metric_ticks = metrics.counter("nav_ticks_total", "Такты monitor_distance")
+        self.metric_distance = metrics.gauge("nav_distance_cm", "Последнее расстояние дальномера, см")
+        self.metric_obstacle = metrics.gauge("nav_obstacle_cm", "Расстояние до препятствия по обоим датчикам, см")
+        self.metric_overruns = metrics.counter("control_overruns_total",
+                                               "Опоздания такта управления больше допуска")
+
+    def _set_state(self, state):
+        """Смена состояния навигации (переходы пишутся в самописец)"""
+        if state != self.state:
+            self.state = state
+            self.recorder.record(KIND_NAV_STATE, NAV_STATES[state])
 
     async def recovery_sequence(self):
         """Полная процедура восстановления после застревания"""
         #logger.info("Запуск комплексного восстановления")
         
         # 1. Экстренный останов
-        self.motor.emerg_stop()
+        await self._motor(self.motor.emerg_stop)
         await asyncio.sleep(1)
         
         # 2. Отъезд назад (1 секундa)
-        self.motor.set_speed(self.motor.MIN_SPEED + 10)
-        self.motor.move_backward()
+        await self._motor(self.motor.set_speed, self.motor.MIN_SPEED + 10)
+        await self._motor(self.motor.move_backward)
         await asyncio.sleep(1)
         
         # 3. Случайный поворот (30-60 градусов)
         self.turn_time = random.uniform(0.5, 1.0)
         if random.choice([True, False]):
-            self.motor.turn_left()
+            await self._motor(self.motor.turn_left)
         else:
-            self.motor.turn_right()
+            await self._motor(self.motor.turn_right)
         await asyncio.sleep(self.turn_time)
-        self.motor.stop()
+        await self._motor(self.motor.stop)
         
         # 4. Плавный старт
-        self.motor.move_forward(self.motor.MIN_SPEED)
+        await self._motor(self.motor.move_forward, self.motor.MIN_SPEED)
         logger.info("Восстановление завершено")
 
+    async def stuck_recovery(self):
+        """StuckDetector.recovery_procedure по шагам: отмена задачи навигации
+        останавливает манёвр между командами, а не после всех 3.3 с"""
+        logger.info("Выполняю процедуру анти-застревания...")
+        motor = self.motor
+
+        # 1. Отъезд назад
+        await self._motor(motor.set_speed, motor.MIN_SPEED)
+        await self._motor(motor.move_backward)
+        await asyncio.sleep(1.0)
+
+        # 2. Поворот в случайном направлении
+        await self._motor(motor.turn_left if random.choice([True, False]) else motor.turn_right)
+        await asyncio.sleep(0.8)
+
+        # 3. Попытка движения вперед
+        await self._motor(motor.move_forward, motor.MIN_SPEED)
+        await asyncio.sleep(1.5)
+
+        self.stuck_detector.reset_detector()
+
+    async def _motor(self, command, *args):
+        """Команда моторам вне event loop (смена скорости идёт ступенями по 20 мс)"""
+        self._dead_reckon()
+        direction, speed = self.motor.direction, self.motor.current_speed
+        result = await run_blocking(self.clock, command, *args)
+        # Пока шла смена скорости, моторы работали в прежнем режиме
+        self._dead_reckon(direction, speed)
+        return result
+
+    def _dead_reckon(self, direction=None, speed=None):
+        """Счисление пути по режиму моторов за фактически прошедшее время.
+
+        Карта прокручивается и при обычной езде, и при объезде. Скорость - по
+        модели планировщика: MIN_SPEED..MAX_SPEED -> 0..MAX_LINEAR вперёд,
+        поворот на месте - MAX_ANGULAR.
+        """
+        now = self.clock.monotonic()
+        last, self._odometry_time = self._odometry_time, now
+        if last is None:
+            return
+        dt = now - last
+        motor = self.motor
+        direction = motor.direction if direction is None else direction
+        speed = motor.current_speed if speed is None else speed
+        if direction in ('forward', 'backward'):
+            ratio = (speed - motor.MIN_SPEED) / (motor.MAX_SPEED - motor.MIN_SPEED)
+            v = min(1.0, max(0.0, ratio)) * self.planner.MAX_LINEAR
+            self.grid.move(v * dt if direction == 'forward' else -v * dt)
+        elif direction in ('left', 'right'):
+            w = self.planner.MAX_ANGULAR if direction == 'left' else -self.planner.MAX_ANGULAR
+            self.grid.move(0.0, w * dt)
+
     async def monitor_distance(self):
+        self._odometry_time = None
+        self._next_tick = None
         while True:
+            if self._next_tick is None:
+                self._next_tick = self.clock.monotonic()
+            self._dead_reckon()
+            # Один замер дальномера на такт, по нему же проверяется застревание
+            sonar = await run_blocking(self.clock, self.distance_sensor.get_distance)
             # Проверка застревания (работает даже при ошибках датчика)
-            if self.stuck_detector.check_stuck():
+            if self.stuck_detector.check_reading(sonar):
                 logger.warning("Застревание обнаружено!")
+                self._set_state('recovery')
                 await self.recovery_sequence()
+                self._next_tick = None
                 continue
                 
             # Основная логика движения
-            distance = self.distance_sensor.get_distance()
-
+            self.metric_ticks.inc()
+            if sonar is not None:
+                self.metric_distance.set(sonar)
+            self.grid.update_range(sonar)
+            self.grid.decay()
+
+            # Решение принимается по объединённой оценке, камера сама объезд не запускает
+            self.fusion.update_sonar(sonar)
+            distance, _ = self.fusion.decide()
+            if distance is not None:
+                self.metric_obstacle.set(distance)
+
+            maneuver = False
             if distance and distance < self.CRITICAL_DISTANCE:
+                maneuver = True
+                self._set_state('emergency')
                 logger.info("Расстояние < см, остановка")
-                self.motor.emerg_stop()  # Плавная остановка
+                await self._motor(self.motor.emerg_stop)  # Плавная остановка
                 await asyncio.sleep(1)
                 logger.info("Расстояние < 10см, объезд")
                 await self.bypass_obstacle()
 
             # Основная логика объезда препятствий
             elif distance and distance < self.EMERGENCY_DISTANCE:
+                maneuver = True
                 logger.info("Объезд")
                 await self.bypass_obstacle()
 
             elif distance and distance < self.SAFE_DISTANCE:
                 # Линейное снижение скорости от 100% до 30% при 70 см -> 50 см
-                logger.info("Плавное снижение скорости")
+                self._set_state('slow')
+                logger.debug("Плавное снижение скорости")  # на каждом такте
                 speed_percent = 30 + (distance - 50) * (70 / (self.SAFE_DISTANCE - 50))
-                self.motor.set_speed(max(30, speed_percent))  # Не ниже 30%
+                await self._motor(self.motor.set_speed, max(30, speed_percent))  # Не ниже 30%
 
-            # Проверка застревания в любом режиме
-            if self.stuck_detector.check_stuck():
-                logger.info("Обнаружено застревание!")
-                self.stuck_detector.recovery_procedure()
-            
-            await asyncio.sleep(0.05)
+            else:
+                self._set_state('cruise')
+
+            if maneuver:
+                # Проверка застревания после манёвра - по свежему замеру
+                if await run_blocking(self.clock, self.stuck_detector.check_stuck):
+                    logger.info("Обнаружено застревание!")
+                    self._set_state('recovery')
+                    await self.stuck_recovery()
+                # Манёвр дольше такта по замыслу, это не опоздание
+                self._next_tick = None
+
+            await self._tick_sleep()
+
+    async def _tick_sleep(self):
+        """Ожидание следующего такта по расписанию (TICK - период, а не пауза).
+
+        Такт, закончившийся позже срока больше чем на OVERRUN_TOLERANCE,
+        просрочен - признак перегрузки (для QualityGovernor). Срок отсчитывается
+        от начала такта, поэтому в опоздание входят и замер, и команды моторам,
+        и позднее пробуждение. После просрочки расписание начинается заново,
+        без серии догоняющих тактов.
+        """
+        now = self.clock.monotonic()
+        if self._next_tick is None:
+            self._next_tick = now
+        self._next_tick += self.TICK
+        if now - self._next_tick > self.OVERRUN_TOLERANCE:
+            self.metric_overruns.inc()
+            self._next_tick = now
+        await asyncio.sleep(max(0.0, self._next_tick - now))
     
     async def bypass_obstacle(self):
-        """Логика объезда препятствия"""
+        """Объезд препятствия по командам локального планировщика"""
+        if self.bypassing:
+            return
+        self.bypassing = True
+        try:
+            await self._bypass()
+        finally:
+            self.bypassing = False
+
+    async def _bypass(self):
         logger.info(f"Препятствие, начинаю объезд...")
-        import traceback
-        # Покажет, откуда идёт вызов
-        #traceback.print_stack()  
+        self._set_state('bypass')
 
         # Торможение
-        self.motor.stop()
+        await self._motor(self.motor.stop)
+        goal_heading = self.grid.heading
 
-        # Маневр объезда
-        self.motor.set_speed(self.motor.MIN_SPEED)
-        self.motor.move_backward()
+        for _ in range(self.BYPASS_MAX_TICKS):
+            v, w = self.planner.plan(goal_heading)
+            await self._execute_command(v, w)
 
-        # Случайный выбор направления
-        turn_direction = random.choice(['right', 'left'])
+            # Обновляем карту свежим замером перед следующим тактом
+            sonar = await run_blocking(self.clock, self.distance_sensor.get_distance, samples=1)
+            self.grid.update_range(sonar)
+            self.fusion.update_sonar(sonar)
+            if abs(w) < 1e-3 and v > 0 and self.planner.path_clear():
+                break
 
-        # Устанавливаем скорость и направление
-        self.motor.set_speed(30)
-        if turn_direction == 'right':
-            self.motor.turn_right()
-        else:
-            self.motor.turn_left()
+        # Продолжаем движение вперед
+        await self._motor(self.motor.move_forward, self.motor.MIN_SPEED)
 
-        # Ждем достаточное время для поворота
-        await asyncio.sleep(0.1)
+        # Если застряли - выполняем процедуру восстановления
+        if await run_blocking(self.clock, self.stuck_detector.check_stuck):
+            logger.info("Обнаружено застревание!")
+            await self.stuck_recovery()
 
-        # Останавливаем моторы после поворота
-        self.motor.stop()
-        
-        # Плавный старт движения вперед
-        self.motor.move_forward(self.motor.MIN_SPEED + 20)  # Импульс для старта
-        await asyncio.sleep(0.3)
-        self.motor.move_forward(self.motor.MIN_SPEED)
+        await asyncio.sleep(0.05)
 
-        # Время начала манёвра
-        #start_time = time.time()
+    async def _execute_command(self, v, w):
+        """Исполнение команды (v, w) в течение одного такта планировщика.
 
-        # Выполняем поворот в течение turn_time с проверкой застревания
-        #while time.time() - start_time < self.turn_time:
-        #    if self.stuck_detector.check_stuck():
-        #        break
-            #await asyncio.sleep(0.05)  # Частота проверки застревания
+        Смена скорости занимает время сверх такта, поэтому карта сдвигается
+        не на v*dt, w*dt, а по фактическому режиму моторов (_dead_reckon).
+        """
+        direction, turn_time, forward_time, forward_ratio = self.planner.split_command(v, w)
 
-        # Если застряли - выполняем процедуру восстановления
-        if self.stuck_detector.check_stuck():
-            logger.info("Обнаружено застревание!")
-            self.stuck_detector.recovery_procedure()
+        if direction is not None:
+            await self._motor(self.motor.set_speed, self.motor.MAX_SPEED)
+            if direction == 'right':
+                await self._motor(self.motor.turn_right)
+            else:
+                await self._motor(self.motor.turn_left)
+            await asyncio.sleep(turn_time)
 
-        await asyncio.sleep(0.05)
+        if forward_ratio > 0:
+            speed = self.motor.MIN_SPEED + (self.motor.MAX_SPEED - self.motor.MIN_SPEED) * forward_ratio
+            await self._motor(self.motor.move_forward, speed)
+            await asyncio.sleep(forward_time)
+        elif direction is None:
+            await self._motor(self.motor.stop)
+            await asyncio.sleep(self.planner.dt)
+
+        self._dead_reckon()
 
 
 class ObstacleDetector:
-    def __init__(self, sensor, motor):
+    def __init__(self, sensor, motor, nav=None, mode="edges", scheduler=None):
         self.sensor = sensor
         self.motor = motor
-        self.nav = NavigationSystem(motor, sensor)
-        self.loop = asyncio.new_event_loop() 
+        # Общая с основной навигацией система (и карта), если передана
+        self.nav = nav if nav is not None else NavigationSystem(motor, sensor)
+        self.clock = self.nav.clock
         self.EMERGENCY_DISTANCE = 50  # см
         self.SAFE_DISTANCE = 70  # см
         self.last_detection_time = 0
         self.detection_interval = 0.5  # Интервал между проверками (сек)
+        # DetectionScheduler: интервал по состоянию движения вместо фиксированного
+        self.scheduler = scheduler
+
+        # Профиль препятствий по секторам кадра (слева направо)
+        # mode: "edges" - плотность границ Canny, "floor" - модель цвета пола
+        if mode == "floor":
+            self.vision = FloorVision(hfov=self.nav.grid.CAMERA_HFOV, clock=self.clock)
+        elif mode == "edges":
+            self.vision = EdgeVision(hfov=self.nav.grid.CAMERA_HFOV, clock=self.clock)
+        else:
+            raise ValueError(f"Неизвестный режим детектора препятствий: {mode}")
 
-        # Запускаем loop в отдельном потоке сразу при инициализации
-        self.thread = threading.Thread(
-            target=self._run_loop, 
-            daemon=True,
-            name="EventLoopThread"
-        )
-        self.thread.start()
-
-    def _run_loop(self):
-        """Запуск event loop в отдельном потоке"""
-        asyncio.set_event_loop(self.loop)
-        self.loop.run_forever()
+        metrics = get_metrics()
+        self.metric_frames = metrics.counter("obstacle_frames_total", "Кадры, обработанные детектором препятствий")
+        self.metric_skipped = metrics.counter("obstacle_frames_skipped_total",
+                                              "Кадры, пропущенные по интервалу или статичной сцене")
+        self.metric_latency = metrics.histogram("obstacle_process_seconds", "Время обработки кадра препятствий")
 
     def process_frame(self, frame):
         """Основной метод обработки кадра"""
-        current_time = time.time()
-        if current_time - self.last_detection_time < self.detection_interval:
+        if not self._due(frame):
+            self.metric_skipped.inc()
             return
             
         try:
-            #cv2.imshow("process_frame", frame)
-            # Конвертация цветового пространства с проверкой
-            frame_rgb = self._convert_frame(frame)
-            
-            if self._detect_obstacles(frame_rgb):
-                logger.info(f"Препятствие, начинаю объезд...")
-                # Детекция препятствий
-                self._avoid_obstacle(frame_rgb)
-        
-                # Продолжаем движение
-                #self.motor.forward(self.motor.MIN_SPEED)      
+            with self.metric_latency.time() as timer:
+                self._detect_obstacles(frame)
+            if self.scheduler is not None:
+                self.scheduler.done(OBSTACLES, timer.elapsed)
+            blocked = self.vision.blocked()
+            if self.vision.skipped:
+                self.metric_skipped.inc()
+            else:
+                self.metric_frames.inc()
+                self.nav.grid.update_camera(blocked, self.vision.sector_distance)
+                # Объезд запускает только NavigationSystem по объединённой оценке;
+                # пропущенный кадр - не новое свидетельство, профиль не повторяем
+                self.nav.fusion.update_camera(blocked, self.vision.sector_distance)
 
         except Exception as e:
             logger.error(f"Критическая ошибка обработки: {e}")
 
-    def _convert_frame(self, frame):
-        """Безопасная конвертация цветового пространства"""
-        try:
-            if frame.ndim == 2:  # Если ч/б кадр
-                return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
-            elif frame.shape[2] == 3:  # Если уже BGR
-                return frame.copy()
-            else:
-                return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-        except Exception as e:
-            self.logger.error(f"Ошибка конвертации: {e}")
-            raise
-
-    def _avoid_obstacle(self, distance):
-        if not hasattr(self, 'loop') or self.loop.is_closed():
-            self.loop = asyncio.new_event_loop()
-
-        future = asyncio.run_coroutine_threadsafe(
-            self.nav.bypass_obstacle(),
-            self.loop
-        )
-        future.add_done_callback(self._obstacle_avoided)
-
-    def _safe_imshow(self, window_name, frame):
-        """Защищённое отображение кадра"""
-        if not self._validate_frame(frame):
-            return
-            
-        try:
-            cv2.imshow(window_name, frame)
-            cv2.waitKey(1)
-        except Exception as e:
-            self.logger.error(f"Ошибка отображения: {e}")
-
-    def _obstacle_avoided(self, future):
-        try:
-            result = future.result()
-            #print(f"Объезд завершен: {result}")
-        except Exception as e:
-            print(f"Ошибка при объезде: {e}")
+    def _due(self, frame):
+        """Пора ли обрабатывать кадр"""
+        if self.scheduler is not None:
+            return self.scheduler.should_run(OBSTACLES, frame)
+        current_time = self.clock.time()
+        if current_time - self.last_detection_time < self.detection_interval:
+            return False
+        self.last_detection_time = current_time
+        return True
 
     def _detect_obstacles(self, frame):
-        """Проверка нависающих препятствий"""
+        """Проверка препятствий перед роботом по границам в нижней части кадра"""
         try:
             if frame is None or not isinstance(frame, np.ndarray) or frame.size == 0:
-                self.logger.warning("Получен невалидный кадр")
+                logger.warning("Получен невалидный кадр")
                 return False
-        
-            # 2. Конвертация в RGB/BGR с проверкой формата
-            if frame.ndim == 2:  # Если кадр ч/б
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
-            elif frame.shape[2] == 4:  # Если RGBA
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
-            else:  # Если уже BGR (3 канала)
-                frame_rgb = frame.copy()
-
-            # 3. Выделение ROI 
-            height, width = frame_rgb.shape[:2]
-            #roi = frame_rgb[:int(height*0.5), :]    #(верхние 50%)
-            roi = frame_rgb[int(height*0.5):, :]    #(нижние 50%)
-
-            # 4. Детекция препятствий
-            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            edges = cv2.Canny(blurred, 30, 100)         # Выделение границ алгоритмом Canny
-
-            # 5. Расчет плотности границ
-            edge_density = cv2.countNonZero(edges) / (roi.size / 3)
-
-            # 6. Отладочное отображение
-            debug_frame = frame_rgb.copy()
-            cv2.putText(debug_frame, f"Density: {edge_density:.2f}", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            if hasattr(self, '_debug_window'):
-                cv2.imshow("Obstacle Debug", debug_frame)
-                cv2.waitKey(1)
-            else:
-                self._debug_window = True
-                cv2.namedWindow("Obstacle Debug", cv2.WINDOW_NORMAL)
-            if edge_density > 0.05:
-                logger.info(f"Препятствие {edge_density}")
-            return edge_density > 0.05
+
+            obstacle = self.vision.process(frame)
+
+            # Наложение для отладочного видео - только пока его кто-то смотрит
+            stream = get_debug_stream()
+            if stream.active and not self.vision.skipped:
+                stream.overlay("obstacles", self.vision.debug_overlay(frame.shape))
+            if obstacle and not self.vision.skipped:
+                logger.info(f"Препятствие {self.vision.density:.2f}, свободно в направлении "
+                            f"{np.degrees(self.vision.free_direction):.0f}°")
+            return obstacle
         
         except Exception as e:
-            self.logger.error(f"Ошибка в _check_overhead: {str(e)}")
+            logger.error(f"Ошибка в _check_overhead: {str(e)}")
             return False
-        
-    def stop(self):
-        """Корректная остановка"""
-        self.stop_event.set()
-        self.loop.call_soon_threadsafe(self.loop.stop)
-        if self.thread.is_alive():
-            self.thread.join(timeout=1)
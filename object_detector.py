@@ -1,9 +1,36 @@
 # object_detector.py
-import cv2
+import time
+import logging
 import numpy as np
+from startup import lazy_import
+from flight_recorder import get_recorder, KIND_DETECTION, DETECTION_FRAME
+from metrics import get_metrics
+from debug_stream import get_debug_stream
+
+logger = logging.getLogger(__name__)
+
+cv2 = lazy_import("cv2")
 
 class ObjectDetector:
-    def __init__(self):
+    def __init__(self, input_size=416, multiscale=False, coarse_size=256, tile_size=240,
+                 max_tiles=2, coarse_threshold=0.1, motion_threshold=12.0):
+        # Размер входа сети (кратен 32): 320 заметно быстрее 416 на Raspberry Pi
+        self.input_size = input_size
+
+        # Многомасштабный режим: грубый проход по всему кадру (coarse_size),
+        # затем вход полного размера только для нескольких фрагментов
+        # tile_size x tile_size пикселей кадра вокруг кандидатов и движения.
+        # Фрагмент 240 px во входе 320 - увеличение x1.33 против x0.5 у
+        # полного кадра 640 px, поэтому далёкая собака видна крупнее.
+        self.multiscale = multiscale
+        self.coarse_size = coarse_size
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.coarse_threshold = coarse_threshold
+        self.motion_threshold = motion_threshold
+        self._prev_small = None
+        self.last_tiles = []
+
         # Загрузка модели YOLO
         self.net = cv2.dnn.readNet('yolov3.weights', 'yolov3.cfg')
         
@@ -18,57 +45,148 @@ class ObjectDetector:
         # Загрузка классов COCO
         with open('coco.names', 'r') as f:
             self.classes = f.read().strip().split('\n')
+
+        self.recorder = get_recorder()
+        metrics = get_metrics()
+        self.metric_frames = metrics.counter("detector_frames_total", "Кадры, обработанные YOLO")
+        self.metric_objects = metrics.counter("detector_objects_total", "Объекты после NMS")
+        self.metric_latency = metrics.histogram("detector_inference_seconds", "Время обработки кадра YOLO")
+        self.metric_tiles = metrics.counter("detector_tiles_total", "Фрагменты высокого разрешения")
+
+    def preprocess(self, image, size):
+        """Кадр (или фрагмент) BGR -> blob для сети"""
+        return cv2.dnn.blobFromImage(image, 0.00392, (size, size), (0, 0, 0), True, crop=False)
+
+    def forward(self, blob):
+        self.net.setInput(blob)
+        return self.net.forward(self.output_layers)
+
+    @staticmethod
+    def postprocess(outs, confidence_threshold, region):
+        """Выходы YOLO -> (рамки x, y, w, h в пикселях кадра, уверенности, классы).
+
+        region - (x0, y0, ширина, высота) области кадра, поданной в сеть.
+        """
+        x0, y0, width, height = region
+        rows = np.concatenate([out.reshape(-1, out.shape[-1]) for out in outs])
+        scores = rows[:, 5:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(rows)), class_ids]
+        keep = confidences > confidence_threshold
+        rows, class_ids, confidences = rows[keep], class_ids[keep], confidences[keep]
+
+        w = (rows[:, 2] * width).astype(np.int32)
+        h = (rows[:, 3] * height).astype(np.int32)
+        x = ((rows[:, 0] * width).astype(np.int32) - w / 2).astype(np.int32) + x0
+        y = ((rows[:, 1] * height).astype(np.int32) - h / 2).astype(np.int32) + y0
+        return np.stack([x, y, w, h], axis=1), confidences.astype(np.float32), class_ids
+
+    def _motion_centers(self, frame):
+        """Центры областей движения (по разности уменьшенных серых кадров)"""
+        small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 48), interpolation=cv2.INTER_AREA)
+        previous, self._prev_small = self._prev_small, small
+        if previous is None:
+            return []
+        diff = cv2.absdiff(small, previous)
+        # Сетка 4x3 ячейки; берём ячейки с наибольшей средней разностью
+        cells = diff.reshape(3, 16, 4, 16).mean(axis=(1, 3))
+        height, width = frame.shape[:2]
+        centers = []
+        for flat in np.argsort(cells, axis=None)[::-1][:self.max_tiles]:
+            row, col = divmod(int(flat), 4)
+            if cells[row, col] < self.motion_threshold:
+                break
+            centers.append(((col + 0.5) * width / 4, (row + 0.5) * height / 3))
+        return centers
+
+    def _tiles(self, frame, boxes, confidences, class_ids, target_id):
+        """Фрагменты высокого разрешения: сначала вокруг кандидатов, затем движение"""
+        height, width = frame.shape[:2]
+        size = min(self.tile_size, width, height)
+        candidates = []
+        order = np.argsort(confidences)[::-1]
+        for i in order:
+            if target_id is None or class_ids[i] == target_id:
+                x, y, w, h = boxes[i]
+                candidates.append((x + w / 2, y + h / 2))
+        candidates += self._motion_centers(frame)
+
+        tiles = []
+        for cx, cy in candidates:
+            if len(tiles) >= self.max_tiles:
+                break
+            # Центр уже внутри выбранного фрагмента
+            if any(tx <= cx < tx + size and ty <= cy < ty + size for tx, ty, _, _ in tiles):
+                continue
+            tx = int(np.clip(cx - size / 2, 0, width - size))
+            ty = int(np.clip(cy - size / 2, 0, height - size))
+            tiles.append((tx, ty, size, size))
+        return tiles
+
+    def _infer(self, frame, confidence_threshold, target_label):
+        height, width = frame.shape[:2]
+        if not self.multiscale:
+            outs = self.forward(self.preprocess(frame, self.input_size))
+            return self.postprocess(outs, confidence_threshold, (0, 0, width, height))
+
+        target_id = self.classes.index(target_label) if target_label in self.classes else None
+        outs = self.forward(self.preprocess(frame, self.coarse_size))
+        coarse = self.postprocess(outs, min(self.coarse_threshold, confidence_threshold),
+                                  (0, 0, width, height))
+        self.last_tiles = self._tiles(frame, *coarse, target_id)
+        self.metric_tiles.inc(len(self.last_tiles))
+
+        parts = [tuple(a[coarse[1] > confidence_threshold] for a in coarse)]
+        for tx, ty, tw, th in self.last_tiles:
+            tile = frame[ty:ty + th, tx:tx + tw]
+            outs = self.forward(self.preprocess(tile, self.input_size))
+            parts.append(self.postprocess(outs, confidence_threshold, (tx, ty, tw, th)))
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
     
     def detect_objects(self, frame, target_label=None, confidence_threshold=0.3):
         """Обнаружение объектов на кадре"""
+        t0 = time.monotonic()
         # Конвертация цветового пространства
         frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
         height, width = frame.shape[:2]
         
-        # Подготовка изображения для YOLO
-        blob = cv2.dnn.blobFromImage(frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
-        self.net.setInput(blob)
-        outs = self.net.forward(self.output_layers)
+        boxes, confidences, class_ids = self._infer(frame, confidence_threshold, target_label)
         
-        # Обработка результатов
-        class_ids, confidences, boxes = [], [], []
-        for out in outs:
-            for detection in out:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-                if confidence > confidence_threshold:
-                    center_x = int(detection[0] * width)
-                    center_y = int(detection[1] * height)
-                    w = int(detection[2] * width)
-                    h = int(detection[3] * height)
-                    x = int(center_x - w / 2)
-                    y = int(center_y - h / 2)
-                    boxes.append([x, y, w, h])
-                    confidences.append(float(confidence))
-                    class_ids.append(class_id)
-        
-        # Применение Non-Maximum Suppression
-        indexes = cv2.dnn.NMSBoxes(boxes, confidences, 0.5, 0.4)
+        # Применение Non-Maximum Suppression (общее для грубого прохода и фрагментов)
+        indexes = cv2.dnn.NMSBoxes(boxes.tolist(), confidences.tolist(), 0.5, 0.4)
         
         results = []
+        stream = get_debug_stream()
+        overlay = [] if stream.active else None
         if len(indexes) > 0:
-            for i in indexes.flatten():
+            for i in np.asarray(indexes).flatten():
                 label = str(self.classes[class_ids[i]])
-                confidence = confidences[i]
-                box = boxes[i]
-                print(f"Обнаружен объект: {label} с уверенностью {confidence:.2f}")
+                confidence = float(confidences[i])
+                box = [int(v) for v in boxes[i]]
+                # a - уверенность, b - центр рамки по x в долях ширины кадра
+                self.recorder.record(KIND_DETECTION, class_ids[i], confidence,
+                                     (box[0] + box[2] / 2) / width)
+                logger.debug("Обнаружен объект: %s с уверенностью %.2f", label, confidence)
                 
                 # Если задан целевой лейбл, фильтруем результаты
                 if target_label is None or label == target_label:
-                    x, y, w, h = box
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                    cv2.putText(frame, f"{label} {confidence:.2f}", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                    cv2.imshow("Object", frame)
+                    if overlay is not None:
+                        x, y, w, h = box
+                        overlay.append(('rect', x, y, w, h, (0, 255, 0)))
+                        overlay.append(('text', x, y - 10, f"{label} {confidence:.2f}", (0, 255, 0)))
                     results.append({
                         'label': label,
                         'confidence': confidence,
                         'box': box
                     })
         
+        if overlay is not None:
+            overlay.extend(('rect', *tile, (255, 0, 0)) for tile in self.last_tiles)
+            stream.overlay("detector", overlay)
+
+        elapsed = time.monotonic() - t0
+        self.recorder.record(KIND_DETECTION, DETECTION_FRAME, len(indexes), elapsed * 1000)
+        self.metric_frames.inc()
+        self.metric_objects.inc(len(indexes))
+        self.metric_latency.observe(elapsed)
         return results
\ No newline at end of file
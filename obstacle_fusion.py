@@ -0,0 +1,162 @@
+import math
+import logging
+import threading
+import numpy as np
+from clock import REAL_CLOCK
+
+logger = logging.getLogger(__name__)
+
+SONAR = 0
+CAMERA = 1
+
+
+class ObstacleFusion:
+    """Единая оценка препятствий по секторам перед роботом из ультразвука и камеры.
+
+    Сектора - те же вертикальные полосы кадра, что у SectorVision (слева
+    направо). Каждый источник хранит по секторам log-odds «в пределах
+    RANGE_CM есть препятствие», расстояние до него и время замера;
+    уверенность затухает с полупериодом источника, поэтому устаревшие
+    данные (например, камера на паузе) перестают влиять сами.
+
+    Веса несимметричны: эхо ультразвука - сильное свидетельство, а его
+    отсутствие - слабое (тонкие ножки стульев конус не видит) и не
+    накапливается. Попадание камеры засчитывается, только если сектор
+    занят в CAMERA_CONFIRM[0] из последних CAMERA_CONFIRM[1] кадров:
+    одиночное срабатывание на текстуре оценку не меняет (в том числе в
+    секторах вне конуса дальномера), а препятствие, которое камера видит
+    несколько кадров, считается занятым даже при «свободном» дальномере.
+
+    Без оценки расстояния (EdgeVision) камера знает только, что препятствие
+    в её поле зрения: расстояние такого сектора - дальняя граница поля
+    camera_range_cm, и то лишь если ни один источник не дал своей оценки.
+
+    Обновляется по мере прихода данных (update_sonar / update_camera) из
+    любых потоков; decide() - единственное решение для NavigationSystem.
+    """
+
+    RANGE_CM = 100             # дальше - препятствие не влияет на движение
+    # (попадание, промах, минимум, максимум, полупериод затухания, с)
+    SOURCES = {
+        SONAR: (1.5, -0.6, -0.6, 3.0, 0.3),
+        CAMERA: (0.6, -0.3, -0.9, 1.5, 1.0),
+    }
+    BLOCK_LOG_ODDS = 0.0       # сектор занят при суммарном log-odds выше этого
+    CAMERA_CONFIRM = (2, 3)    # попадание камеры: N занятых из M последних кадров
+
+    def __init__(self, n_sectors=8, hfov=math.radians(62), sonar_cone=math.radians(15),
+                 camera_range_cm=60, clock=REAL_CLOCK):
+        self.n_sectors = n_sectors
+        self.hfov = hfov
+        # Дальняя граница поля камеры (нижняя половина кадра ~ 60 см)
+        self.camera_range_cm = camera_range_cm
+        self.clock = clock
+
+        self.bearings = (0.5 - (np.arange(n_sectors) + 0.5) / n_sectors) * hfov
+        half_width = hfov / n_sectors / 2
+        # Сектора, которые перекрывает конус дальномера
+        self.sonar_sectors = np.abs(self.bearings) - half_width < sonar_cone / 2
+        quarter = n_sectors // 4
+        self.corridor = np.zeros(n_sectors, dtype=bool)
+        self.corridor[quarter:n_sectors - quarter] = True
+
+        n_sources = len(self.SOURCES)
+        params = np.array([self.SOURCES[s] for s in range(n_sources)], dtype=np.float32)
+        self._l_hit, self._l_miss, self._l_min, self._l_max, self._half_life = params.T
+        self.log_odds = np.zeros((n_sources, n_sectors), dtype=np.float32)
+        self.distance = np.full((n_sources, n_sectors), np.inf, dtype=np.float32)
+        self.updated = np.full(n_sources, -np.inf)
+        self.sonar_distance = None    # последнее показание дальномера, см
+        # Кольцо последних профилей камеры для подтверждения попаданий
+        self._camera_history = np.zeros((self.CAMERA_CONFIRM[1], n_sectors), dtype=bool)
+        self._camera_frame = 0
+        self._lock = threading.Lock()
+
+    def _decay(self, now):
+        """Множители затухания источников на момент now"""
+        age = np.maximum(now - self.updated, 0.0)
+        return np.power(0.5, age / self._half_life).astype(np.float32)[:, None]
+
+    def _update(self, source, now, hits, distances, covered):
+        with self._lock:
+            l = self.log_odds[source]
+            l *= self._decay(now)[source]
+            delta = np.where(hits, self._l_hit[source], self._l_miss[source])
+            l[covered] = np.clip(l[covered] + delta[covered],
+                                 self._l_min[source], self._l_max[source])
+            self.distance[source, covered] = distances[covered]
+            self.updated[source] = now
+
+    def update_sonar(self, distance, now=None):
+        """Показание дальномера (см, None - нет эха или ошибка замера)"""
+        self.sonar_distance = distance
+        if distance is None:
+            return
+        now = self.clock.monotonic() if now is None else now
+        hits = np.full(self.n_sectors, distance < self.RANGE_CM)
+        distances = np.full(self.n_sectors, distance, dtype=np.float32)
+        self._update(SONAR, now, hits, distances, self.sonar_sectors)
+
+    def update_camera(self, blocked, distances=None, now=None):
+        """Профиль препятствий с нового кадра камеры: признак по секторам
+        слева направо и, если известна, оценка расстояния по секторам (см)"""
+        now = self.clock.monotonic() if now is None else now
+        blocked = np.asarray(blocked, dtype=bool)
+        if distances is None:
+            distances = np.full(self.n_sectors, np.inf, dtype=np.float32)
+        else:
+            distances = np.asarray(distances, dtype=np.float32)
+            blocked = blocked & ~(distances >= self.RANGE_CM)
+        with self._lock:
+            history = self._camera_history
+            history[self._camera_frame % len(history)] = blocked
+            self._camera_frame += 1
+            confirmed = history.sum(axis=0) >= self.CAMERA_CONFIRM[0]
+        # Неподтверждённое срабатывание учитывается как свободный сектор
+        covered = np.ones(self.n_sectors, dtype=bool)
+        self._update(CAMERA, now, blocked & confirmed, distances, covered)
+
+    def estimate(self, now=None):
+        """(log-odds, расстояние) по секторам на момент now.
+
+        Расстояние занятого сектора - среднее расстояний источников,
+        видящих препятствие, с весами по их уверенности (источник без
+        оценки расстояния не участвует; если оценок нет ни у кого -
+        camera_range_cm); у свободного - inf.
+        """
+        now = self.clock.monotonic() if now is None else now
+        with self._lock:
+            log_odds = self.log_odds * self._decay(now)
+            distance = self.distance.copy()
+        fused = log_odds.sum(axis=0)
+        positive = np.maximum(log_odds, 0.0)
+        known = np.isfinite(distance)
+        weights = np.where(known, positive, 0.0)
+        total = weights.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (weights * np.where(weights > 0, distance, 0.0)).sum(axis=0) / total
+        mean = np.where(total > 0, mean, self.camera_range_cm)
+        blocked = (fused > self.BLOCK_LOG_ODDS) & (positive.sum(axis=0) > 0)
+        return fused, np.where(blocked, mean, np.inf)
+
+    def decide(self, now=None):
+        """Решение для навигации: (расстояние до препятствия в коридоре, см, или
+        None, если данных нет; угол на самый свободный сектор, рад, + влево)"""
+        fused, distance = self.estimate(now)
+        free_direction = float(self.bearings[int(np.argmin(fused))])
+        nearest = float(distance[self.corridor].min())
+        if math.isfinite(nearest):
+            return nearest, free_direction
+        # Препятствий в коридоре нет - для плавного торможения годится дальномер
+        if self.sonar_distance is not None:
+            return self.sonar_distance, free_direction
+        return None, free_direction
+
+    def reset(self):
+        with self._lock:
+            self.log_odds.fill(0)
+            self.distance.fill(np.inf)
+            self.updated.fill(-np.inf)
+            self._camera_history.fill(False)
+            self._camera_frame = 0
+        self.sonar_distance = None
@@ -0,0 +1,316 @@
+import math
+import logging
+import numpy as np
+from startup import lazy_import
+from clock import REAL_CLOCK
+from debug_stream import draw_overlay
+
+logger = logging.getLogger(__name__)
+
+cv2 = lazy_import("cv2")
+
+class SectorVision:
+    """Общая часть детекторов: профиль препятствий по вертикальным секторам кадра"""
+
+    def __init__(self, n_sectors, hfov, clock=REAL_CLOCK):
+        self.n_sectors = n_sectors
+        self.hfov = hfov
+        self.clock = clock            # при воспроизведении - виртуальное время
+        # Результаты последнего кадра
+        self.profile = np.zeros(n_sectors, dtype=np.float32)
+        self.sector_distance = None   # оценка расстояния по секторам, см (если известна)
+        self.free_direction = 0.0     # угол на самый свободный сектор, рад (+ влево)
+        self.density = 0.0            # максимум профиля по коридору робота
+        self.obstacle = False
+        self.skipped = False          # результат взят с прошлого кадра
+
+    def _corridor(self, values):
+        """Центральные сектора - коридор, по которому поедет робот"""
+        quarter = self.n_sectors // 4
+        return values[quarter:self.n_sectors - quarter]
+
+    def sector_bearing(self, index):
+        """Угол на центр сектора относительно курса (левые столбцы - положительный угол)"""
+        return (0.5 - (index + 0.5) / self.n_sectors) * self.hfov
+
+    def toward_heading(self, candidates):
+        """Угол на сектор из candidates (маска), ближайший к курсу.
+
+        Равноценных секторов бывает несколько (пустые, без препятствия до
+        горизонта) - argmax/argmin выбрал бы самый левый и уводил робота влево.
+        """
+        bearings = self.sector_bearing(np.arange(self.n_sectors))
+        index = np.flatnonzero(candidates)
+        return float(bearings[index[np.argmin(np.abs(bearings[index]))]])
+
+    def set_downscale(self, downscale):
+        """Смена масштаба обработки; буферы пересоздаются на следующем кадре"""
+        self.downscale = downscale
+        self._shape = None
+
+    def draw_debug(self, frame):
+        """Копия кадра с наложением debug_overlay (только для отладки)"""
+        return draw_overlay(frame.copy(), self.debug_overlay(frame.shape))
+
+
+class EdgeVision(SectorVision):
+    """Поиск препятствий по плотности границ Canny в нижней части кадра.
+
+    Быстрый путь: в обработку идёт только ROI, уменьшение выполняется до
+    перевода в оттенки серого, все промежуточные изображения пишутся в
+    заранее выделенные буферы (dst=), а суммы по секторам берутся из
+    интегрального изображения. Если сцена не изменилась, Canny пропускается
+    и возвращается предыдущий результат.
+    """
+
+    def __init__(self, n_sectors=8, downscale=0.5, roi_start=0.5,
+                 hfov=math.radians(62), skip_static=True,
+                 static_threshold=2.0, max_static_age=1.0, clock=REAL_CLOCK):
+        super().__init__(n_sectors, hfov, clock)
+        self.downscale = downscale
+        self.roi_start = roi_start              # ROI - от этой доли высоты до низа кадра
+        self.skip_static = skip_static
+        self.static_threshold = static_threshold  # средняя разница яркости (0-255)
+        self.max_static_age = max_static_age      # не дольше этого времени без пересчёта, с
+        # Толщина границы не зависит от масштаба, поэтому плотность растёт как 1/масштаб
+        self.edge_threshold = 0.05 / downscale
+
+        self.near_profile = np.zeros(n_sectors, dtype=np.float32)  # нижняя половина ROI
+
+        self._shape = None
+        self._last_full_time = 0.0
+
+    def _ensure_buffers(self, frame):
+        """Выделение буферов под размер кадра (один раз)"""
+        if self._shape == frame.shape:
+            return
+        height, width = frame.shape[:2]
+        self._roi_top = int(height * self.roi_start)
+        h = max(1, int(round((height - self._roi_top) * self.downscale)))
+        w = max(self.n_sectors, int(round(width * self.downscale)))
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        self._small = np.empty((h, w, channels) if channels > 1 else (h, w), dtype=np.uint8)
+        self._gray = np.empty((h, w), dtype=np.uint8)
+        self._prev_gray = np.zeros((h, w), dtype=np.uint8)
+        self._diff = np.empty((h, w), dtype=np.uint8)
+        self._blurred = np.empty((h, w), dtype=np.uint8)
+        self._edges = np.empty((h, w), dtype=np.uint8)
+        self._integral = np.empty((h + 1, w + 1), dtype=np.int32)
+        # Границы секторов по столбцам уменьшенного изображения
+        self._bounds = np.linspace(0, w, self.n_sectors + 1).astype(np.int32)
+        self._sector_area = np.diff(self._bounds).astype(np.float32) * h
+        self._near_area = np.diff(self._bounds).astype(np.float32) * (h - h // 2)
+        self._conversion = {1: None, 3: cv2.COLOR_BGR2GRAY, 4: cv2.COLOR_BGRA2GRAY}[channels]
+        self._shape = frame.shape
+        self._has_prev = False
+
+    def process(self, frame):
+        """Обработка кадра. Возвращает True, если в коридоре робота есть препятствие"""
+        self._ensure_buffers(frame)
+        roi = frame[self._roi_top:]     # срез без копирования
+
+        # Уменьшение до перевода в серый: меньше пикселей на конвертацию
+        if self._conversion is None:
+            cv2.resize(roi, (self._gray.shape[1], self._gray.shape[0]),
+                       dst=self._gray, interpolation=cv2.INTER_AREA)
+        else:
+            cv2.resize(roi, (self._small.shape[1], self._small.shape[0]),
+                       dst=self._small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._small, self._conversion, dst=self._gray)
+
+        now = self.clock.monotonic()
+        if self.skip_static and self._has_prev and now - self._last_full_time < self.max_static_age:
+            cv2.absdiff(self._gray, self._prev_gray, dst=self._diff)
+            if cv2.mean(self._diff)[0] < self.static_threshold:
+                self.skipped = True
+                return self.obstacle
+        self._prev_gray, self._gray = self._gray, self._prev_gray
+        self._has_prev = True
+        self._last_full_time = now
+        self.skipped = False
+
+        gray = self._prev_gray
+        cv2.GaussianBlur(gray, (5, 5), 0, dst=self._blurred)
+        cv2.Canny(self._blurred, 30, 100, edges=self._edges)
+
+        # Суммы по секторам из интегрального изображения (границы = 255)
+        cv2.integral(self._edges, sum=self._integral, sdepth=cv2.CV_32S)
+        h = self._edges.shape[0]
+        bottom = self._integral[h, self._bounds]
+        middle = self._integral[h // 2, self._bounds]
+        self.profile = np.diff(bottom).astype(np.float32) / 255.0 / self._sector_area
+        self.near_profile = np.diff(bottom - middle).astype(np.float32) / 255.0 / self._near_area
+
+        self.free_direction = self.toward_heading(self.profile == self.profile.min())
+        self.density = float(self._corridor(self.profile).max())
+        self.obstacle = self.density > self.edge_threshold
+        return self.obstacle
+
+    def set_downscale(self, downscale):
+        super().set_downscale(downscale)
+        self.edge_threshold = 0.05 / downscale
+
+    def blocked(self):
+        """Признак препятствия по каждому сектору"""
+        return self.profile > self.edge_threshold
+
+    def debug_overlay(self, shape):
+        """Профиль последнего кадра как примитивы наложения (debug_stream)"""
+        height, width = shape[:2]
+        items = [('text', 10, 30, f"Density: {self.density:.2f}", (0, 255, 0))]
+        sector_w = width // self.n_sectors
+        for i, density in enumerate(self.profile):
+            bar = int(min(1.0, density / (2 * self.edge_threshold)) * height * 0.5)
+            color = (0, 0, 255) if density > self.edge_threshold else (0, 255, 0)
+            items.append(('rect', i * sector_w, height - bar, sector_w - 2, bar, color))
+        return items
+
+
+class FloorVision(SectorVision):
+    """Поиск препятствий по модели цвета пола.
+
+    Гистограмма H-S пола набирается в трапеции прямо перед роботом, затем
+    каждый кадр переводится в вероятность «пол» через таблицы (LUT) и
+    порог. Для каждого столбца ищется ближайший снизу пиксель «не пол», его
+    строка пересчитывается в расстояние по плоскости пола (камера смотрит
+    горизонтально с известной высоты). Узоры ковра и швы плитки имеют цвет
+    пола и, в отличие от границ Canny, не дают ложных препятствий.
+    """
+
+    def __init__(self, n_sectors=8, downscale=0.25, roi_start=0.5,
+                 hfov=math.radians(62), vfov=math.radians(48.8),
+                 camera_height_cm=15.0, camera_tilt=0.0,
+                 h_bins=30, s_bins=32, floor_threshold=0.05,
+                 block_distance_cm=50.0, learn_rate=0.3, relearn_interval=5.0,
+                 clock=REAL_CLOCK):
+        super().__init__(n_sectors, hfov, clock)
+        self.downscale = downscale
+        self.roi_start = roi_start
+        self.vfov = vfov
+        self.camera_height_cm = camera_height_cm
+        self.camera_tilt = camera_tilt          # наклон камеры вниз, рад
+        self.h_bins = h_bins
+        self.s_bins = s_bins
+        self.floor_threshold = floor_threshold  # ниже этой вероятности - не пол
+        self.block_distance_cm = block_distance_cm
+        self.learn_rate = learn_rate
+        self.relearn_interval = relearn_interval
+
+        self.nearest_distance = math.inf
+        self.column_distance = None
+        self._hist = None                       # модель пола, вероятность на ячейку H-S
+        self._last_learn_time = 0.0
+        self._shape = None
+
+        # LUT канал -> номер корзины (H в OpenCV 0..179, S 0..255)
+        lut = np.zeros((1, 256, 3), dtype=np.uint8)
+        lut[0, :, 0] = np.minimum(np.arange(256) * h_bins // 180, h_bins - 1)
+        lut[0, :, 1] = np.arange(256) * s_bins // 256
+        self._bin_lut = lut
+
+    def _ensure_buffers(self, frame):
+        if self._shape == frame.shape:
+            return
+        height, width = frame.shape[:2]
+        self._roi_top = int(height * self.roi_start)
+        h = max(1, int(round((height - self._roi_top) * self.downscale)))
+        w = max(self.n_sectors, int(round(width * self.downscale)))
+        self._small = np.empty((h, w, 3), dtype=np.uint8)
+        self._hsv = np.empty((h, w, 3), dtype=np.uint8)
+        self._bins = np.empty((h, w, 3), dtype=np.uint8)
+        self._index = np.empty((h, w), dtype=np.int32)
+        self._prob = np.empty((h, w), dtype=np.float32)
+        self._mask = np.empty((h, w), dtype=np.uint8)
+        self._kernel = np.ones((3, 3), dtype=np.uint8)
+        self._bounds = np.linspace(0, w, self.n_sectors + 1).astype(np.int32)
+
+        # Расстояние до пола для каждой строки уменьшенного ROI
+        focal = (height / 2) / math.tan(self.vfov / 2)
+        rows = self._roi_top + (np.arange(h) + 0.5) / self.downscale
+        depression = self.camera_tilt + np.arctan((rows - height / 2) / focal)
+        with np.errstate(divide='ignore'):
+            distance = np.where(depression > 1e-3,
+                                self.camera_height_cm / np.tan(np.maximum(depression, 1e-3)), np.inf)
+        self._row_distance = distance.astype(np.float32)
+
+        # Трапеция для обучения: низ ROI, сужается кверху
+        trapezoid = np.array([
+            [int(w * 0.25), h - 1], [int(w * 0.75), h - 1],
+            [int(w * 0.6), int(h * 0.6)], [int(w * 0.4), int(h * 0.6)],
+        ], dtype=np.int32)
+        self._learn_mask = np.zeros((h, w), dtype=np.uint8)
+        cv2.fillPoly(self._learn_mask, [trapezoid], 255)
+        self._learn_pixels = self._learn_mask.astype(bool)
+        self._shape = frame.shape
+
+    def _to_hsv(self, frame):
+        roi = frame[self._roi_top:]
+        cv2.resize(roi, (self._small.shape[1], self._small.shape[0]),
+                   dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2HSV, dst=self._hsv)
+        return self._hsv
+
+    def learn(self, frame):
+        """Обновление модели пола по трапеции перед роботом"""
+        self._ensure_buffers(frame)
+        hsv = self._to_hsv(frame)
+        hist = cv2.calcHist([hsv], [0, 1], self._learn_mask,
+                            [self.h_bins, self.s_bins], [0, 180, 0, 256])
+        hist /= max(float(hist.sum()), 1.0)
+        if self._hist is None:
+            self._hist = hist
+        else:
+            self._hist = (1 - self.learn_rate) * self._hist + self.learn_rate * hist
+        # Нормировка к максимуму, чтобы типичный цвет пола давал ~1
+        self._lut = (self._hist / max(float(self._hist.max()), 1e-6)).astype(np.float32).reshape(-1)
+        self._last_learn_time = self.clock.monotonic()
+        logger.debug("Модель пола обновлена")
+
+    def process(self, frame):
+        """Обработка кадра. Возвращает True, если в коридоре робота есть препятствие"""
+        if frame.ndim != 3 or frame.shape[2] != 3:
+            raise ValueError("Для модели пола нужен цветной BGR кадр")
+        if self._hist is None:
+            self.learn(frame)
+        hsv = self._to_hsv(frame)
+
+        # Обратная проекция через LUT: пиксель -> корзина -> вероятность пола
+        cv2.LUT(hsv, self._bin_lut, dst=self._bins)
+        np.multiply(self._bins[..., 0], self.s_bins, out=self._index, dtype=np.int32)
+        np.add(self._index, self._bins[..., 1], out=self._index)
+        np.take(self._lut, self._index, out=self._prob)
+        np.less(self._prob, self.floor_threshold, out=self._mask.view(bool))
+        cv2.morphologyEx(self._mask, cv2.MORPH_OPEN, self._kernel, dst=self._mask)
+
+        # Ближайший снизу пиксель «не пол» в каждом столбце
+        flipped = self._mask[::-1]
+        has_obstacle = flipped.any(axis=0)
+        first = flipped.argmax(axis=0)
+        rows = self._mask.shape[0] - 1 - first
+        self.column_distance = np.where(has_obstacle, self._row_distance[rows], np.inf)
+
+        blocked = self.column_distance < self.block_distance_cm
+        widths = np.diff(self._bounds)
+        self.profile = (np.add.reduceat(blocked, self._bounds[:-1]) / widths).astype(np.float32)
+        self.sector_distance = np.minimum.reduceat(self.column_distance, self._bounds[:-1])
+        self.nearest_distance = float(self._corridor(self.sector_distance).min())
+        self.free_direction = self.toward_heading(self.sector_distance == self.sector_distance.max())
+        self.density = float(self._corridor(self.profile).max())
+        self.obstacle = self.nearest_distance < self.block_distance_cm
+
+        # Периодическое дообучение, если трапеция сейчас похожа на пол
+        if (self.clock.monotonic() - self._last_learn_time > self.relearn_interval
+                and self._prob[self._learn_pixels].mean() > 0.5):
+            self.learn(frame)
+        return self.obstacle
+
+    def blocked(self):
+        """Признак препятствия по каждому сектору"""
+        return self.profile > 0.5
+
+    def debug_overlay(self, shape):
+        """Маска «не пол» и расстояние как примитивы наложения (debug_stream)"""
+        return [
+            ('mask', self._roi_top, self._mask.copy(), (0, 0, 255)),
+            ('text', 10, 30, f"Nearest: {self.nearest_distance:.0f} cm", (0, 255, 0)),
+        ]
@@ -0,0 +1,206 @@
+import math
+import random
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class OccupancyGrid:
+    """Локальная карта занятости (log-odds) с центром в роботе.
+
+    Ось X - вперёд по начальному курсу, ось Y - влево. Сетка не вращается
+    вместе с роботом: хранится курс self.heading, а при смещении робота
+    карта прокручивается на целое число клеток.
+    """
+
+    # Приращения log-odds
+    L_FREE = -0.4          # луч прошёл через клетку
+    L_OCC = 0.85           # эхо / граница от ультразвука
+    L_OCC_CAMERA = 0.4     # камера ошибается чаще - вес меньше
+    L_FREE_CAMERA = -0.2
+    L_MIN = -4.0
+    L_MAX = 4.0
+
+    # Параметры датчиков
+    SONAR_CONE = math.radians(15)     # ширина конуса HC-SR04
+    SONAR_RAYS = 5
+    CAMERA_HFOV = math.radians(62)    # горизонтальный угол обзора камеры
+    CAMERA_RANGE_CM = 60              # нижняя половина кадра ~ 60 см перед роботом
+    CAMERA_RAYS = 9
+
+    def __init__(self, size_cm=400, cell_cm=5, max_range_cm=300):
+        self.cell_cm = float(cell_cm)
+        # Нечётный размер, чтобы робот находился в центральной клетке
+        self.size = int(round(size_cm / cell_cm)) | 1
+        self.center = self.size // 2
+        self.max_range_cm = float(max_range_cm)
+        self.log_odds = np.zeros((self.size, self.size), dtype=np.float32)
+        self.heading = 0.0                  # курс робота, рад
+        self._offset = np.zeros(2)          # смещение робота внутри центральной клетки, см
+        self._lock = threading.Lock()
+
+        # Предрасчёт координат клеток относительно центра (для секторных запросов)
+        coords = (np.arange(self.size) - self.center) * self.cell_cm
+        xs, ys = np.meshgrid(coords, coords)
+        self._cell_range = np.hypot(xs, ys).astype(np.float32)
+        self._cell_bearing = np.arctan2(ys, xs).astype(np.float32)
+
+        # Шаг выборки вдоль луча - половина клетки, чтобы не пропускать клетки
+        self._ray_steps = np.arange(0.0, self.max_range_cm, self.cell_cm * 0.5, dtype=np.float32)
+
+    # --- Обновление карты ---
+
+    def update_rays(self, bearings, distances, hits=None, l_occ=None, l_free=None):
+        """Векторное обновление пачки лучей.
+
+        bearings - углы лучей относительно курса робота (рад),
+        distances - дальности (см), hits - был ли конец луча препятствием.
+        """
+        bearings = np.atleast_1d(np.asarray(bearings, dtype=np.float32))
+        distances = np.atleast_1d(np.asarray(distances, dtype=np.float32))
+        distances = np.broadcast_to(distances, bearings.shape)
+        if hits is None:
+            hits = distances < self.max_range_cm
+        hits = np.broadcast_to(np.asarray(hits, dtype=bool), bearings.shape)
+        l_occ = self.L_OCC if l_occ is None else l_occ
+        l_free = self.L_FREE if l_free is None else l_free
+
+        distances = np.minimum(distances, self.max_range_cm)
+        angles = bearings + self.heading
+        cos_a = np.cos(angles)[:, None]
+        sin_a = np.sin(angles)[:, None]
+
+        with self._lock:
+            ox, oy = self._offset
+            r = self._ray_steps[None, :]
+            free_mask = r < (distances[:, None] - self.cell_cm * 0.5)
+            cols = np.rint((ox + r * cos_a) / self.cell_cm).astype(np.int32) + self.center
+            rows = np.rint((oy + r * sin_a) / self.cell_cm).astype(np.int32) + self.center
+            free_mask &= (cols >= 0) & (cols < self.size) & (rows >= 0) & (rows < self.size)
+            free_idx = np.unique(rows[free_mask] * self.size + cols[free_mask])
+
+            end_cols = np.rint((ox + distances * cos_a[:, 0]) / self.cell_cm).astype(np.int32) + self.center
+            end_rows = np.rint((oy + distances * sin_a[:, 0]) / self.cell_cm).astype(np.int32) + self.center
+            hit_mask = hits & (end_cols >= 0) & (end_cols < self.size) & (end_rows >= 0) & (end_rows < self.size)
+            hit_idx = np.unique(end_rows[hit_mask] * self.size + end_cols[hit_mask])
+
+            # Клетка с эхом не должна одновременно считаться свободной
+            free_idx = np.setdiff1d(free_idx, hit_idx, assume_unique=True)
+
+            flat = self.log_odds.reshape(-1)
+            flat[free_idx] += l_free
+            flat[hit_idx] += l_occ
+            flat[free_idx] = np.maximum(flat[free_idx], self.L_MIN)
+            flat[hit_idx] = np.minimum(flat[hit_idx], self.L_MAX)
+
+    def update_range(self, distance_cm):
+        """Учёт показания ультразвукового датчика (конус из нескольких лучей)"""
+        if distance_cm is None:
+            return
+        bearings = np.linspace(-self.SONAR_CONE / 2, self.SONAR_CONE / 2, self.SONAR_RAYS)
+        self.update_rays(bearings, distance_cm)
+
+    def update_camera(self, blocked, distances=None):
+        """Учёт профиля препятствий с камеры.
+
+        blocked - признак препятствия для каждого сектора кадра слева направо
+        (или одно значение на весь кадр), используется, если нет distances.
+        distances - расстояние до препятствия по секторам, см (FloorVision):
+        конечное - препятствие на этом расстоянии, какой бы ни был порог
+        blocked; inf - препятствия не видно, свободно только до
+        CAMERA_RANGE_CM, дальше камера пол не различает.
+        """
+        blocked = np.atleast_1d(np.asarray(blocked, dtype=bool))
+        sectors = len(blocked) if distances is None else len(distances)
+        n = max(sectors, self.CAMERA_RAYS)
+        bearings = (0.5 - (np.arange(n) + 0.5) / n) * self.CAMERA_HFOV
+        # Каждому лучу - значение его сектора
+        sector = (np.arange(n) * sectors) // n
+        if distances is None:
+            hits = blocked[sector]
+            ranges = self.CAMERA_RANGE_CM
+        else:
+            ranges = np.asarray(distances, dtype=np.float32)[sector]
+            seen = np.isfinite(ranges)
+            hits = seen & (ranges < self.max_range_cm)
+            ranges = np.where(seen, np.minimum(ranges, self.max_range_cm), self.CAMERA_RANGE_CM)
+        self.update_rays(
+            bearings, ranges, hits=hits,
+            l_occ=self.L_OCC_CAMERA, l_free=self.L_FREE_CAMERA
+        )
+
+    def move(self, forward_cm=0.0, turn_rad=0.0):
+        """Сдвиг робота: поворот и проезд вперёд. Карта прокручивается целыми клетками"""
+        with self._lock:
+            self.heading = (self.heading + turn_rad + math.pi) % (2 * math.pi) - math.pi
+            self._offset += forward_cm * np.array([math.cos(self.heading), math.sin(self.heading)])
+            shift = np.rint(self._offset / self.cell_cm).astype(int)
+            if shift.any():
+                self._scroll(int(shift[0]), int(shift[1]))
+                self._offset -= shift * self.cell_cm
+
+    def _scroll(self, dc, dr):
+        """Прокрутка карты: робот сместился на dc клеток по X и dr по Y"""
+        g = self.log_odds
+        if abs(dc) >= self.size or abs(dr) >= self.size:
+            g.fill(0)
+            return
+        g[:] = np.roll(g, (-dr, -dc), axis=(0, 1))
+        # Освободившиеся края - неизвестная область
+        if dr > 0:
+            g[-dr:, :] = 0
+        elif dr < 0:
+            g[:-dr, :] = 0
+        if dc > 0:
+            g[:, -dc:] = 0
+        elif dc < 0:
+            g[:, :-dc] = 0
+
+    def decay(self, factor=0.98):
+        """Постепенное забывание устаревших наблюдений"""
+        with self._lock:
+            self.log_odds *= factor
+
+    def reset(self):
+        with self._lock:
+            self.log_odds.fill(0)
+            self._offset[:] = 0
+            self.heading = 0.0
+
+    # --- Запросы ---
+
+    def probability(self):
+        """Вероятность занятости для каждой клетки"""
+        return 1.0 / (1.0 + np.exp(-self.log_odds))
+
+    def lookup(self, xs, ys):
+        """log-odds в точках, заданных в системе координат робота (см).
+        Точки вне карты считаются неизвестными (0)."""
+        xs = np.asarray(xs, dtype=np.float32)
+        ys = np.asarray(ys, dtype=np.float32)
+        c, s = math.cos(self.heading), math.sin(self.heading)
+        ox, oy = self._offset
+        cols = np.rint((ox + xs * c - ys * s) / self.cell_cm).astype(np.int32) + self.center
+        rows = np.rint((oy + xs * s + ys * c) / self.cell_cm).astype(np.int32) + self.center
+        inside = (cols >= 0) & (cols < self.size) & (rows >= 0) & (rows < self.size)
+        out = np.zeros(xs.shape, dtype=np.float32)
+        out[inside] = self.log_odds[rows[inside], cols[inside]]
+        return out
+
+    def sector_cost(self, bearing_from, bearing_to, max_range_cm=150):
+        """Суммарная уверенность в занятости внутри сектора (углы относительно курса)"""
+        rel = (self._cell_bearing - self.heading + np.pi) % (2 * np.pi) - np.pi
+        mask = (rel >= bearing_from) & (rel < bearing_to) & (self._cell_range <= max_range_cm)
+        return float(np.maximum(self.log_odds[mask], 0).sum())
+
+    def freer_direction(self, max_range_cm=150):
+        """Выбор более свободной стороны: 'left' или 'right'"""
+        left = self.sector_cost(0.0, math.pi / 2, max_range_cm)
+        right = self.sector_cost(-math.pi / 2, 0.0, max_range_cm)
+        if abs(left - right) < 1e-3:
+            # Данных нет - поведение как раньше
+            return random.choice(['right', 'left'])
+        direction = 'left' if left < right else 'right'
+        logger.debug(f"Свободнее: {direction} (слева {left:.1f}, справа {right:.1f})")
+        return direction
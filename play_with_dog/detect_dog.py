@@ -1,46 +1,48 @@
-import cv2
 import time
 import threading
 import logging
 import signal
 import sys
-import os
 import subprocess
 import traceback
 import asyncio
 from typing import Optional
-import gc
-from camera_manager import CameraManager
-from motor_control import MotorController
-from distance_sensor import DistanceSensor
-from navigation import NavigationSystem
-from navigation import ObstacleDetector
-from object_detector import ObjectDetector
-
-# Настройка логов
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/detect_dog.log'),
-        logging.StreamHandler()
-    ]
-)
+from startup import robot_components
+from clock import run_blocking
+from log_setup import setup_logging
+from flight_recorder import install_crash_dump
+from metrics import start_metrics
+from debug_stream import start_debug_stream
+from detection_scheduler import DETECTOR, FOLLOWING
+from detection_fusion import DetectionFusion
+from follow_controller import FollowController
+from resource_manager import get_resource_manager
+
 logger = logging.getLogger(__name__)
 
+# Порог уверенности YOLO для кандидатов; подтверждает DetectionFusion
+DOG_CONFIDENCE = 0.2
+
 class RobotSystem:
     def __init__(self):
-        # Инициализация компонентов
-        self.camera = CameraManager()
-        self.motor = MotorController()
-        self.sensor = DistanceSensor()
-        self.detector = ObjectDetector()
+        # Инициализация компонентов (параллельно; детектор и камера догружаются в фоне)
+        self.startup = robot_components().start()
+        self.motor = self.startup.get('motor')
+        self.sensor = self.startup.get('sensor')
         self._stop_event = threading.Event()
         self.dog_detected_event = threading.Event()
         self._lock = threading.Lock()
-        self.nav = NavigationSystem(self.motor, self.sensor)
+        self.nav = self.startup.get('nav')
         self.loop = asyncio.new_event_loop()
-        self.detect_obst = ObstacleDetector(self.sensor, self.motor)
+        self.detect_obst = self.startup.get('obstacles')
+        self.scheduler = self.startup.get('scheduler')
+        # Одиночное ложное срабатывание больше не перезапускает систему
+        self.fusion = DetectionFusion()
+        # Найденную собаку сопровождаем в этом же процессе
+        self.follow = FollowController(self.motor, self.sensor)
+        self.following = False
+        self._nav_task = None
+        threading.Thread(target=self._log_startup_report, daemon=True).start()
         self._last_detection = time.time()
                 
         # Флаги состояния
@@ -58,32 +60,52 @@ class RobotSystem:
             name="EventLoopThread"
         )
         self.thread.start()
+        get_resource_manager().pin_thread(self.thread)
 
     def _run_loop(self):
         """Запуск event loop в отдельном потоке"""
         asyncio.set_event_loop(self.loop)
         self.loop.run_forever()
 
+    def _log_startup_report(self):
+        self.startup.wait_all()
+        logger.info("Запуск компонентов:\n" + self.startup.report())
+
+    @property
+    def camera(self):
+        return self.startup.get('camera')
+
+    @property
+    def detector(self):
+        return self.startup.get('detector')
+
     def moving(self):
-        """Поток движения и объезда"""
+        """Движение и объезд: одна задача monitor_distance в event loop"""
         try:
-            while not self._stop_event.is_set():
-                distance = self.sensor.get_distance()
-                logger.info(f"Текущее измерение: {distance:.2f} см")
-                if distance is not None:
-                    # Запускаем асинхронную задачу
-                    future = asyncio.run_coroutine_threadsafe(
-                        self.nav.monitor_distance(),
-                        self.loop
-                    )
-                    try:
-                        future.result(timeout=0.1)  # Ожидаем завершения
-                    except asyncio.TimeoutError:
-                        pass  # Продолжаем цикл
-                time.sleep(0.1)
-
+            self._nav_task = asyncio.run_coroutine_threadsafe(
+                self._start_navigation(), self.loop
+            ).result(timeout=1.0)
         except Exception as e:
-            logger.error(f"Ошибка в потоке движения и объезда: {e}")        
+            logger.error(f"Ошибка запуска движения и объезда: {e}")
+
+    async def _start_navigation(self):
+        return asyncio.ensure_future(self.nav.monitor_distance())
+
+    @staticmethod
+    async def _cancel(task):
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    def _stop_navigation(self):
+        """Отмена задачи навигации: при следовании моторами управляет только FollowController"""
+        if self._nav_task is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    self._cancel(self._nav_task), self.loop
+                ).result(timeout=1.0)
+            except Exception as e:
+                logger.warning(f"Навигация не остановилась вовремя: {e}")
+            self._nav_task = None
 
     def detect_objects(self):
         """Поток обнаружения объектов"""
@@ -96,13 +118,23 @@ class RobotSystem:
                     logger.info("Нет кадра, пропускаем итерацию")
                     continue
 
+                if not self.scheduler.should_run(DETECTOR, frame):
+                    time.sleep(0.01)
+                    continue
+
                 if frame is not None:
-                    detections = self.detector.detect_objects(frame, target_label='dog')
+                    t_frame = time.monotonic()
+                    t0 = time.perf_counter()
+                    detections = self.detector.detect_objects(
+                        frame, target_label='dog', confidence_threshold=DOG_CONFIDENCE)
+                    self.scheduler.done(DETECTOR, time.perf_counter() - t0)
 
-                    if detections:
-                        cv2.imshow("dog", frame)
-                        self.dog_detected_event.set()
-                        break
+                    confirmed = self.fusion.update(detections, frame.shape)
+                    if confirmed:
+                        target = max(confirmed, key=lambda track: track['score'])
+                        self.follow.on_detection(target['box'], frame.shape, t_frame)
+                        if not self.following:
+                            self.dog_detected_event.set()
 
             except Exception as e:
                 logger.error(f"Ошибка в потоке обнаружения: {e}")
@@ -117,7 +149,6 @@ class RobotSystem:
                 if frame is None:
                     continue
                 if frame is not None:
-                    #cv2.imshow("detect_obstacles", frame)
                     self.detect_obst.process_frame(frame)
                 else:
                     logger.info("Временное отсутствие кадров (ожидание...)")
@@ -127,28 +158,39 @@ class RobotSystem:
                 break
 
     def handle_dog_detection(self):
-        """Обработка обнаружения собаки"""
+        """Обработка обнаружения собаки: следование за ней в этом же процессе"""
+        self.dog_detected_event.clear()
         try:
             self.game_script_running = True
+            self._stop_navigation()
+            self.following = True
+            self.scheduler.mode = FOLLOWING
+            logger.info("Собака обнаружена! Следую за ней.")
+            asyncio.run_coroutine_threadsafe(self._follow(), self.loop)
+        except Exception as e:
+            self.following = False
+            logger.error(f"Ошибка запуска следования: {e}")
 
-            # Остановить в основном процессе
-            self.stop()
-            time.sleep(2)
-            gc.collect()
-
-            # Запуск в новом процессе с отсоединением
-            logger.info("Собака обнаружена! Запуск игры.")
-            subprocess.Popen(
-                [sys.executable, "play_with_dog.py"],
-                start_new_session=True
-            )
-            
-            # Гарантированный выход
-            logging.info("Игра успешно запущена, завершаю основной скрипт")
-            os._exit(0)
+    async def _follow(self):
+        try:
+            stopped = await self.follow.run()
+        finally:
+            self._follow_finished()
+        if stopped or self._stop_event.is_set():
+            return
+        # Цель потеряна - снова поиск
+        logger.info("Возвращаюсь к поиску собаки")
+        await run_blocking(self.nav.clock, self.motor.move_forward, 30)
+        self._nav_task = asyncio.ensure_future(self.nav.monitor_distance())
 
-        except Exception as e:
-            logger.error(f"Ошибка запуска игры: {e}")
+    def _follow_finished(self):
+        """Следование закончилось (цель потеряна или остановка)"""
+        self.following = False
+        self.game_script_running = False
+        self.scheduler.mode = None
+        self.fusion.reset()
+        self.follow.reset()
+        self.dog_detected_event.clear()
 
     def start(self):
         """Запуск системы"""
@@ -166,7 +208,8 @@ class RobotSystem:
         # Старт движения
         self.motor.move_forward(30)
         logger.info("Робот начал движение")
-        robot.moving()
+        # Движение и объезд - задача в event loop (его поток закреплён в __init__)
+        self.moving()
 
         # Запуск потока обнаружения
         detection_thread = threading.Thread(
@@ -174,12 +217,12 @@ class RobotSystem:
             name="DetectionThread"
         )
         detection_thread.start()
+        get_resource_manager().pin_thread(detection_thread)
 
         # Ожидаем событие обнаружения или остановки
         while not self._stop_event.is_set():
-            if self.dog_detected_event.wait(timeout=0.5):
+            if self.dog_detected_event.wait(timeout=0.5) and not self.following:
                 self.handle_dog_detection()  # Вызывается в главном потоке!
-                break
 
         detection_thread.join(timeout=1)
         logger.info("Основной цикл завершен")
@@ -195,7 +238,11 @@ class RobotSystem:
             logger.info("Инициирована остановка")
 
             # Остановка моторов
+            self.follow.stop()
+            self._stop_navigation()
             self.motor.emerg_stop()
+            if self.startup.is_ready('governor'):
+                self.startup.get('governor').stop()
             self.camera.stop()
             self.loop.call_soon_threadsafe(self.loop.stop)
             if self.loop.is_running():
@@ -243,6 +290,11 @@ def dump_threads():
                 logger.info(f"    {line.strip()}")
 
 if __name__ == "__main__":
+    setup_logging('logs/detect_dog.log')
+    install_crash_dump()
+    start_metrics()
+    # ROBOT_DEBUG_STREAM=1 - отладочное видео http://127.0.0.1:9109/stream
+    start_debug_stream()
     robot = RobotSystem()
         
     # Регистрация обработчиков сигналов
@@ -0,0 +1,171 @@
+import glob
+import logging
+import threading
+from clock import REAL_CLOCK
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Уровни качества от полного к минимальному. Значения относительные: от
+# исходных настроек компонентов. Сначала дешёвые шаги (реже YOLO), последним
+# - разрешение камеры (требует перезапуска захвата).
+QUALITY_LEVELS = [
+    # имя, уменьшение входа YOLO, множитель интервалов детекции,
+    # масштаб разрешения камеры, масштаб зрения препятствий
+    ("full",    0,  1.0, 1.0, 1.0),
+    ("rate",    0,  1.5, 1.0, 1.0),
+    ("input",   64, 2.0, 1.0, 0.75),
+    ("vision",  96, 3.0, 1.0, 0.5),
+    ("camera",  96, 3.0, 0.5, 1.0),
+]
+
+MIN_INPUT_SIZE = 128
+
+
+class ThermalSource:
+    """Температура процессора из /sys/class/thermal, °C"""
+
+    def __init__(self, path=None):
+        if path is None:
+            zones = sorted(glob.glob('/sys/class/thermal/thermal_zone*/temp'))
+            path = zones[0] if zones else None
+        self.path = path
+
+    def read(self):
+        """Температура или None, если датчика нет"""
+        if self.path is None:
+            return None
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip()) / 1000.0
+        except (OSError, ValueError):
+            return None
+
+
+class FakeThermalSource:
+    """Подставная температура для проверки регулятора без нагрева"""
+
+    def __init__(self, temperature=50.0):
+        self.temperature = temperature
+
+    def set(self, temperature):
+        self.temperature = temperature
+
+    def read(self):
+        return self.temperature
+
+
+class QualityGovernor:
+    """Снижение качества зрения ради сроков контура управления.
+
+    Раз в interval секунд смотрит температуру и число опозданий такта
+    управления (счётчик control_overruns_total, его пишут
+    NavigationSystem и FollowController). Перегрев или опоздания - шаг
+    вниз по QUALITY_LEVELS (не чаще step_hold); остыл и опозданий нет
+    recover_hold секунд - шаг вверх. Каждая смена уровня пишется в лог.
+
+    Любой из компонентов может быть None - соответствующий шаг пропускается.
+    """
+
+    HOT_C = 75.0               # троттлинг Raspberry Pi начинается около 80 °C
+    COOL_C = 65.0
+    MAX_OVERRUN_RATE = 0.5     # опозданий в секунду
+
+    def __init__(self, camera=None, detector=None, scheduler=None, vision=None,
+                 thermal=None, clock=REAL_CLOCK, interval=2.0, step_hold=5.0, recover_hold=30.0):
+        self.camera = camera
+        self.detector = detector
+        self.scheduler = scheduler
+        self.vision = vision
+        self.thermal = thermal if thermal is not None else ThermalSource()
+        self.clock = clock
+        self.interval = interval
+        self.step_hold = step_hold
+        self.recover_hold = recover_hold
+
+        # Исходные настройки - уровень "full"
+        self.base_input_size = getattr(detector, 'input_size', None)
+        self.base_resolution = getattr(camera, 'resolution', None)
+        self.base_downscale = getattr(vision, 'downscale', None)
+
+        self.level = 0
+        self._changed_at = clock.monotonic()
+        self._calm_since = clock.monotonic()
+        metrics = get_metrics()
+        self._overruns = metrics.counter("control_overruns_total",
+                                         "Опоздания такта управления больше допуска")
+        self._last_overruns = self._overruns.value()
+        self._last_step = clock.monotonic()
+        metrics.gauge("governor_level", "Уровень снижения качества (0 - полное)", fn=lambda: self.level)
+        self.temperature = None
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="QualityGovernor")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.step()
+            except Exception as e:
+                logger.error(f"Ошибка регулятора качества: {e}")
+
+    def step(self, now=None):
+        """Одна проверка; возвращает текущий уровень"""
+        now = self.clock.monotonic() if now is None else now
+        self.temperature = self.thermal.read()
+        overruns = self._overruns.value()
+        new_overruns = overruns - self._last_overruns
+        rate = new_overruns / max(now - self._last_step, 1e-9)
+        self._last_overruns, self._last_step = overruns, now
+
+        hot = self.temperature is not None and self.temperature >= self.HOT_C
+        late = rate > self.MAX_OVERRUN_RATE
+        cool = self.temperature is None or self.temperature < self.COOL_C
+        if not cool or new_overruns:
+            self._calm_since = now
+
+        if (hot or late) and self.level < len(QUALITY_LEVELS) - 1 \
+                and now - self._changed_at >= self.step_hold:
+            reason = []
+            if hot:
+                reason.append(f"температура {self.temperature:.1f} °C")
+            if late:
+                reason.append(f"опозданий такта {rate:.1f}/с")
+            self.set_level(self.level + 1, ", ".join(reason), now)
+        elif self.level > 0 and now - self._calm_since >= self.recover_hold \
+                and now - self._changed_at >= self.recover_hold:
+            temperature = "нет данных" if self.temperature is None else f"{self.temperature:.1f} °C"
+            self.set_level(self.level - 1, f"остыл ({temperature}), опозданий нет", now)
+        return self.level
+
+    def set_level(self, level, reason="", now=None):
+        name, input_cut, detection_scale, resolution_scale, vision_scale = QUALITY_LEVELS[level]
+        changes = []
+        if self.scheduler is not None:
+            self.scheduler.rate_scale = detection_scale
+            changes.append(f"интервалы детекции x{detection_scale:g}")
+        if self.detector is not None and self.base_input_size:
+            size = max(MIN_INPUT_SIZE, (self.base_input_size - input_cut) // 32 * 32)
+            self.detector.input_size = size
+            changes.append(f"вход YOLO {size}")
+        if self.vision is not None and self.base_downscale:
+            downscale = self.base_downscale * vision_scale
+            self.vision.set_downscale(downscale)
+            changes.append(f"масштаб препятствий {downscale:g}")
+        if self.camera is not None and self.base_resolution:
+            width, height = self.base_resolution
+            resolution = (int(width * resolution_scale), int(height * resolution_scale))
+            self.camera.set_resolution(resolution)
+            changes.append(f"камера {resolution[0]}x{resolution[1]}")
+
+        direction = "снижено" if level > self.level else "повышено"
+        logger.warning(f"Качество {direction}: уровень {level} '{name}' ({reason}): " + ", ".join(changes))
+        self.level = level
+        self._changed_at = self.clock.monotonic() if now is None else now
@@ -0,0 +1,392 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import threading
+import numpy as np
+from startup import lazy_import
+from clock import VirtualClock, VirtualEventLoop
+from flight_recorder import MOTOR_CODES
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+cv2 = lazy_import("cv2")
+
+SESSION_FILE = "session.npz"
+FRAMES_FILE = "frames.mjpeg"
+
+# Метод MotorController -> код команды (общие с самописцем)
+MOTOR_METHODS = {
+    'set_speed': 'speed',
+    'move_forward': 'forward',
+    'move_backward': 'backward',
+    'turn_left': 'left',
+    'turn_right': 'right',
+    'stop': 'stop',
+    'emerg_stop': 'emerg_stop',
+}
+
+
+class SessionRecorder:
+    """Запись входов реального заезда: дальномер, кадры камеры, команды моторов.
+
+    Датчики оборачиваются прокси (wrap_*), которые пишут каждое значение с
+    меткой времени; кадры сжимаются в JPEG и дописываются в frames.mjpeg.
+    save() сохраняет индексы в session.npz.
+    """
+
+    def __init__(self, path, jpeg_quality=90):
+        self.path = path
+        self.jpeg_quality = jpeg_quality
+        os.makedirs(path, exist_ok=True)
+        self._frames_file = open(os.path.join(path, FRAMES_FILE), 'wb')
+        self._lock = threading.Lock()
+        self.distances = []   # (начало, конец, см или nan)
+        self.frames = []      # (время, смещение, длина)
+        self.motor = []       # (время, код команды, скорость)
+
+    def wrap_sensor(self, sensor):
+        return _RecordingSensor(sensor, self)
+
+    def wrap_camera(self, camera):
+        return _RecordingCamera(camera, self)
+
+    def wrap_motor(self, motor):
+        return _RecordingMotor(motor, self)
+
+    def add_frame(self, t, frame):
+        ok, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        with self._lock:
+            if self._frames_file.closed:
+                return
+            offset = self._frames_file.tell()
+            self._frames_file.write(data.tobytes())
+            self.frames.append((t, offset, len(data)))
+
+    def save(self):
+        with self._lock:
+            self._frames_file.close()
+            np.savez(
+                os.path.join(self.path, SESSION_FILE),
+                distances=np.array(self.distances, dtype=np.float64).reshape(-1, 3),
+                frames=np.array(self.frames, dtype=np.float64).reshape(-1, 3),
+                motor=np.array(self.motor, dtype=np.float64).reshape(-1, 3),
+            )
+        logger.info(f"Запись заезда сохранена в {self.path}: {len(self.distances)} замеров, "
+                    f"{len(self.frames)} кадров, {len(self.motor)} команд")
+
+
+class _RecordingSensor:
+    def __init__(self, sensor, session):
+        self._sensor = sensor
+        self._session = session
+
+    def get_distance(self, *args, **kwargs):
+        t0 = time.time()
+        distance = self._sensor.get_distance(*args, **kwargs)
+        self._session.distances.append((t0, time.time(), np.nan if distance is None else distance))
+        return distance
+
+    def __getattr__(self, name):
+        return getattr(self._sensor, name)
+
+
+class _RecordingCamera:
+    def __init__(self, camera, session):
+        self._camera = camera
+        self._session = session
+
+    def get_frame(self):
+        frame = self._camera.get_frame()
+        if frame is not None:
+            self._session.add_frame(time.time(), frame)
+        return frame
+
+    def __getattr__(self, name):
+        return getattr(self._camera, name)
+
+
+class _RecordingMotor:
+    def __init__(self, motor, session):
+        self._motor = motor
+        self._session = session
+
+    def __getattr__(self, name):
+        attr = getattr(self._motor, name)
+        command = MOTOR_METHODS.get(name)
+        if command is None:
+            return attr
+
+        def call(*args, **kwargs):
+            t = time.time()
+            speed = self._motor.current_speed
+            result = attr(*args, **kwargs)
+            # set_speed без изменения скорости ничего не делает - не пишем
+            if command != 'speed' or self._motor.current_speed != speed:
+                self._session.motor.append((t, MOTOR_CODES[command], self._motor.current_speed))
+            return result
+        return call
+
+
+class Session:
+    """Загруженная запись заезда"""
+
+    def __init__(self, path):
+        self.path = path
+        data = np.load(os.path.join(path, SESSION_FILE))
+        self.distances = data['distances']
+        self.frames = data['frames']
+        self.motor = data['motor']
+        starts = [a[0, 0] for a in (self.distances, self.frames, self.motor) if len(a)]
+        ends = [a[-1, 0] for a in (self.distances, self.frames, self.motor) if len(a)]
+        if not starts:
+            raise ValueError(f"{path}: пустая запись")
+        self.start = min(starts)
+        self.duration = max(ends) - self.start
+        self._frames_path = os.path.join(path, FRAMES_FILE)
+
+    def frame(self, index):
+        _, offset, length = self.frames[index]
+        with open(self._frames_path, 'rb') as f:
+            f.seek(int(offset))
+            data = np.frombuffer(f.read(int(length)), dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+
+class ReplaySensor:
+    """Дальномер из записи: последнее значение на текущий момент виртуального
+    времени; вызов «длится» столько же, сколько реальный замер"""
+
+    def __init__(self, session, clock):
+        self.clock = clock
+        self._records = session.distances
+        self._times = session.distances[:, 0]
+
+    def get_distance(self, samples=5, max_deviation=10, timeout=0.1):
+        if not len(self._records):
+            return None
+        i = max(0, np.searchsorted(self._times, self.clock.time(), 'right') - 1)
+        t0, t1, distance = self._records[i]
+        self.clock.advance(t1 - t0)
+        return None if np.isnan(distance) else float(distance)
+
+
+class ReplayCamera:
+    """Камера из записи: каждый кадр отдаётся один раз, как из очереди"""
+
+    def __init__(self, session, clock):
+        self.session = session
+        self.clock = clock
+        self._times = session.frames[:, 0]
+        self._last = -1
+
+    def get_frame(self):
+        i = np.searchsorted(self._times, self.clock.time(), 'right') - 1
+        if i < 0 or i == self._last:
+            return None
+        self._last = i
+        return self.session.frame(i)
+
+
+class ReplayMotor:
+    """MotorController без GPIO: команды пишутся в commands, паузы - в
+    виртуальное время"""
+
+    MIN_SPEED = 26
+    MAX_SPEED = 30
+
+    def __init__(self, clock):
+        self.clock = clock
+        self._current_speed = self.MIN_SPEED
+        self._duty = 0
+        self.direction = 'stop'
+        self.commands = []
+
+    @property
+    def current_speed(self):
+        return self._current_speed
+
+    @current_speed.setter
+    def current_speed(self, value):
+        self._current_speed = max(self.MIN_SPEED, min(self.MAX_SPEED, value))
+
+    def _record(self, command, action=None, *args):
+        """Команда верхнего уровня, как её пишет _RecordingMotor: время - до
+        вызова, скорость - после; set_speed внутри move_forward / stop
+        отдельной командой не пишется (прокси его не видит)"""
+        t = self.clock.time()
+        speed = self._current_speed
+        if action is not None:
+            action(*args)
+        if command != 'speed':
+            self.direction = command
+        if command != 'speed' or self._current_speed != speed:
+            self.commands.append((t, MOTOR_CODES[command], self._current_speed))
+
+    def _ramp(self, speed):
+        # Как MotorController.set_speed: ступени по 20 мс только от MIN_SPEED и выше
+        speed = int(round(max(0, min(self.MAX_SPEED, speed))))
+        if speed == self._duty:
+            return
+        if self._duty >= self.MIN_SPEED or speed >= self.MIN_SPEED:
+            start = max(self._duty, self.MIN_SPEED)
+            self.clock.advance(abs(max(speed, self.MIN_SPEED) - start) * 0.02)
+        self._duty = speed
+        self.current_speed = speed
+
+    def set_speed(self, speed):
+        self._record('speed', self._ramp, speed)
+
+    def move_forward(self, speed=None):
+        if speed is None:
+            self._record('forward')
+        else:
+            self._record('forward', self._ramp, speed)
+
+    def move_backward(self):
+        self._record('backward')
+
+    def turn_left(self):
+        self._record('left')
+
+    def turn_right(self):
+        self._record('right')
+
+    def stop(self):
+        self._record('stop', self._ramp, 0)
+
+    def emerg_stop(self, reverse_time=0.3):
+        self._record('emerg_stop', self._emerg_stop, reverse_time)
+
+    def _emerg_stop(self, reverse_time):
+        self.clock.advance(reverse_time)
+        self._ramp(0)
+
+
+class Replayer:
+    """Прогон записи через NavigationSystem и ObstacleDetector на виртуальном
+    времени: заезд проигрывается с максимальной скоростью процессора"""
+
+    def __init__(self, session, mode="edges", seed=0):
+        self.session = session
+        self.mode = mode
+        self.seed = seed
+
+    async def _camera_loop(self, camera, detector):
+        # Как поток препятствий демона: кадр раз в 50 мс
+        while True:
+            frame = camera.get_frame()
+            if frame is None:
+                await asyncio.sleep(0.01)
+                continue
+            detector.process_frame(frame)
+            await asyncio.sleep(0.05)
+
+    def run(self):
+        from navigation import NavigationSystem, ObstacleDetector
+
+        random.seed(self.seed)
+        clock = VirtualClock(start=self.session.start)
+        loop = VirtualEventLoop(clock)
+        asyncio.set_event_loop(loop)
+        motor = ReplayMotor(clock)
+        sensor = ReplaySensor(self.session, clock)
+        camera = ReplayCamera(self.session, clock)
+        nav = NavigationSystem(motor, sensor, clock=clock)
+        detector = ObstacleDetector(sensor, motor, nav=nav, mode=self.mode)
+
+        motor.move_forward(30)  # как при запуске поведения
+        tasks = [
+            loop.create_task(nav.monitor_distance()),
+            loop.create_task(self._camera_loop(camera, detector)),
+        ]
+        loop.call_later(self.session.duration, loop.stop)
+        t0 = time.perf_counter()
+        try:
+            loop.run_forever()
+        finally:
+            wall = time.perf_counter() - t0
+            # Незавершённые задачи (в том числе объезд) отменяем
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            asyncio.set_event_loop(None)
+            loop.close()
+        return {
+            'commands': np.array(motor.commands, dtype=np.float64).reshape(-1, 3),
+            'virtual_s': clock.monotonic(),
+            'wall_s': wall,
+        }
+
+
+def compare_streams(expected, produced, start, tolerance=0.25):
+    """Сравнение потоков команд моторов (время, код, скорость).
+
+    Команды сравниваются по порядку; расхождение - другой код или сдвиг
+    времени больше tolerance секунд.
+    """
+    names = {code: name for name, code in MOTOR_CODES.items()}
+    counts = {}
+    for label, stream in (('expected', expected), ('produced', produced)):
+        codes, n = np.unique(stream[:, 1].astype(int), return_counts=True)
+        for code, count in zip(codes, n):
+            counts.setdefault(names.get(code, code), {'expected': 0, 'produced': 0})[label] = int(count)
+
+    n = min(len(expected), len(produced))
+    divergence = None
+    for i in range(n):
+        same_code = expected[i, 1] == produced[i, 1]
+        dt = abs(expected[i, 0] - produced[i, 0])
+        if not same_code or dt > tolerance:
+            divergence = {
+                'index': i,
+                't': float(expected[i, 0] - start),
+                'expected': names.get(int(expected[i, 1])),
+                'produced': names.get(int(produced[i, 1])),
+                'dt': float(dt),
+            }
+            break
+    if divergence is None and len(expected) != len(produced):
+        divergence = {'index': n, 't': None, 'expected': None, 'produced': None, 'dt': None}
+    return {
+        'expected': len(expected),
+        'produced': len(produced),
+        'matched_prefix': n if divergence is None else divergence['index'],
+        'divergence': divergence,
+        'counts': counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение записанного заезда")
+    parser.add_argument("session", help="каталог записи (ROBOT_RECORD_DIR демона)")
+    parser.add_argument("--mode", default="edges", choices=("edges", "floor"))
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допуск по времени команд, с")
+    args = parser.parse_args()
+
+    session = Session(args.session)
+    result = Replayer(session, mode=args.mode).run()
+    report = compare_streams(session.motor, result['commands'], session.start, args.tolerance)
+
+    print(f"Заезд {result['virtual_s']:.1f} с воспроизведён за {result['wall_s']:.2f} с "
+          f"(x{result['virtual_s'] / max(result['wall_s'], 1e-9):.0f})")
+    print(f"Команды: записано {report['expected']}, получено {report['produced']}, "
+          f"совпадает первых {report['matched_prefix']}")
+    for name, row in report['counts'].items():
+        print(f"  {name:<11} {row['expected']:5d} {row['produced']:5d}")
+    if report['divergence'] is not None:
+        print(f"Первое расхождение: {report['divergence']}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    setup_logging(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Раскладка по ядрам Raspberry Pi (4 ядра):
+#   0    - прочее: голос, логи, метрики, сокет демона
+#   1    - управление: event loop навигации, дальномер, моторы и потоки ШИМ
+#   2, 3 - зрение: захват камеры, YOLO, детектор препятствий, пул OpenCV
+ROLE_CORES = {
+    'io': {0},
+    'control': {1},
+    'vision': {2, 3},
+}
+
+# Известные потоки по имени -> роль
+THREAD_ROLES = {
+    'MainThread': 'io',
+    'EventLoopThread': 'control',
+    'CameraCaptureThread': 'vision',
+    'DetectionThread': 'vision',
+    'ObstacleThread': 'vision',
+}
+
+MIN_CORES = 4
+
+
+class ResourceManager:
+    """Политика использования ядер: потоки OpenCV, привязка потоков к ядрам
+    и приоритет потока управления.
+
+    Дочерние потоки (в том числе пул OpenCV и потоки ШИМ RPi.GPIO) наследуют
+    привязку создавшего потока, поэтому компоненты создаются уже внутри
+    потока с нужной ролью (см. startup.robot_components).
+    """
+
+    def __init__(self, cv_threads=2, control_priority=False, control_nice=-5,
+                 fifo_priority=10, role_cores=ROLE_CORES):
+        self.cv_threads = cv_threads
+        self.control_priority = control_priority
+        self.control_nice = control_nice
+        self.fifo_priority = fifo_priority
+        available = os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else set()
+        # На машинах с меньшим числом ядер (стенд разработчика) не привязываем
+        self.enabled = len(available) >= MIN_CORES and all(
+            cores <= available for cores in role_cores.values())
+        self.role_cores = role_cores
+        if not self.enabled:
+            logger.info(f"Привязка к ядрам отключена: доступно ядер {len(available)}")
+
+    def configure_opencv(self):
+        import cv2
+        cv2.setNumThreads(self.cv_threads)
+        logger.info(f"OpenCV: потоков {cv2.getNumThreads()}")
+
+    def pin(self, tid, role):
+        """Привязка потока (native_id; 0 - текущий) к ядрам роли"""
+        if not self.enabled:
+            return
+        try:
+            os.sched_setaffinity(tid, self.role_cores[role])
+        except OSError as e:
+            logger.warning(f"Не удалось привязать поток {tid} к роли '{role}': {e}")
+            return
+        if role == 'control' and self.control_priority:
+            self._raise_priority(tid)
+
+    def pin_current_thread(self, role):
+        self.pin(0, role)
+
+    def pin_thread(self, thread, role=None):
+        role = role or THREAD_ROLES.get(thread.name)
+        if role is not None and thread.native_id is not None:
+            self.pin(thread.native_id, role)
+
+    def _raise_priority(self, tid):
+        """SCHED_FIFO (нужен CAP_SYS_NICE), иначе пониженный nice.
+
+        FIFO ставится с SCHED_RESET_ON_FORK: потоки, созданные потоком
+        управления, его не наследуют. Иначе потоки пула run_blocking (замер
+        дальномера - активное ожидание эха) и потоки программного ШИМ
+        RPi.GPIO, созданные при запуске моторов, получили бы FIFO на том же
+        ядре 1, и дальномер вытеснял бы ШИМ. Привязку к ядру они наследуют.
+        """
+        try:
+            policy = os.SCHED_FIFO | getattr(os, 'SCHED_RESET_ON_FORK', 0)
+            os.sched_setscheduler(tid, policy, os.sched_param(self.fifo_priority))
+            logger.info(f"Поток управления {tid}: SCHED_FIFO {self.fifo_priority}")
+            return
+        except (OSError, AttributeError):
+            pass
+        try:
+            os.setpriority(os.PRIO_PROCESS, tid or threading.get_native_id(), self.control_nice)
+            logger.info(f"Поток управления {tid}: nice {self.control_nice}")
+        except OSError as e:
+            logger.warning(f"Не удалось повысить приоритет потока управления: {e}")
+
+
+_manager = None
+
+def get_resource_manager():
+    """Общий менеджер ресурсов процесса"""
+    global _manager
+    if _manager is None:
+        _manager = ResourceManager(control_priority=os.environ.get('ROBOT_RT_PRIORITY') == '1')
+    return _manager
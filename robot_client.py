@@ -0,0 +1,20 @@
+import socket
+
+# Локальный сокет управления демоном робота
+SOCKET_PATH = "/tmp/robot_iskin.sock"
+
+# Ответ приходит после выполнения команды: смена поведения включает
+# торможение моторов и остановку навигации, это может занять секунды
+COMMAND_TIMEOUT = 10.0
+
+def send_command(command, path=SOCKET_PATH, timeout=COMMAND_TIMEOUT):
+    """Отправка команды демону.
+
+    FileNotFoundError / ConnectionRefusedError - демон не запущен,
+    socket.timeout - демон запущен, но не ответил вовремя.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(command.encode('utf-8') + b"\n")
+        return sock.makefile('r', encoding='utf-8').readline().strip()
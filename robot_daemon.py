@@ -0,0 +1,305 @@
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import threading
+import socketserver
+from robot_client import SOCKET_PATH
+from clock import run_blocking
+from startup import robot_components
+from detection_scheduler import DETECTOR, FOLLOWING
+from detection_fusion import DetectionFusion
+from follow_controller import FollowController
+from resource_manager import get_resource_manager
+from log_setup import setup_logging
+from flight_recorder import get_recorder, install_crash_dump
+from metrics import start_metrics
+from debug_stream import start_debug_stream
+
+logger = logging.getLogger(__name__)
+
+# Порог уверенности YOLO для кандидатов; подтверждает DetectionFusion
+DOG_CONFIDENCE = 0.2
+
+class PlayWithDogBehaviour:
+    """Езда с объездом препятствий и поиск собаки; найденную собаку робот
+    сопровождает (FollowController), потеряв - возвращается к поиску"""
+
+    name = "play_with_dog"
+
+    def __init__(self, robot):
+        self.robot = robot
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._nav_task = None
+        self._follow_task = None
+        self.fusion = DetectionFusion()
+        self.follow = FollowController(robot.motor, robot.sensor)
+        self.following = False
+
+    def start(self):
+        robot = self.robot
+        self._stop_event.clear()
+        robot.motor.move_forward(30)
+        self._nav_task = asyncio.run_coroutine_threadsafe(
+            self._start_navigation(), robot.loop
+        ).result(timeout=1.0)
+        self._threads = [
+            threading.Thread(target=self._detect_objects, daemon=True, name="DetectionThread"),
+            threading.Thread(target=self._detect_obstacles, daemon=True, name="ObstacleThread"),
+        ]
+        for thread in self._threads:
+            thread.start()
+            get_resource_manager().pin_thread(thread)
+
+    async def _start_navigation(self):
+        return asyncio.ensure_future(self.robot.nav.monitor_distance())
+
+    @staticmethod
+    async def _cancel(task):
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    def _stop_navigation(self):
+        if self._nav_task is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    self._cancel(self._nav_task), self.robot.loop
+                ).result(timeout=1.0)
+            except Exception as e:
+                logger.warning(f"Навигация не остановилась вовремя: {e}")
+            self._nav_task = None
+
+    def _start_following(self):
+        """Собака подтверждена: объезд и поиск - на паузу, управление у FollowController"""
+        self._stop_navigation()
+        self.following = True
+        self.robot.scheduler.mode = FOLLOWING
+        self._follow_task = asyncio.run_coroutine_threadsafe(self._follow(), self.robot.loop)
+
+    async def _follow(self):
+        stopped = await self.follow.run()
+        self.following = False
+        self.robot.scheduler.mode = None
+        self.fusion.reset()
+        self.follow.reset()
+        if stopped or self._stop_event.is_set():
+            return
+        # Цель потеряна - снова поиск
+        logger.info("Возвращаюсь к поиску собаки")
+        await run_blocking(self.robot.nav.clock, self.robot.motor.move_forward, 30)
+        self._nav_task = asyncio.ensure_future(self.robot.nav.monitor_distance())
+
+    def stop(self):
+        self._stop_event.set()
+        self.follow.stop()
+        if self._follow_task is not None:
+            try:
+                self._follow_task.result(timeout=1.0)
+            except Exception as e:
+                logger.warning(f"Следование не остановилось вовремя: {e}")
+            self._follow_task = None
+        self._stop_navigation()
+        self.robot.motor.stop()
+        # Потоки видят событие на следующей итерации; долго не ждём
+        for thread in self._threads:
+            thread.join(timeout=0.1)
+
+    def _detect_objects(self):
+        while not self._stop_event.is_set():
+            frame = self.robot.camera.get_frame()
+            # Кадр пропускается, если бюджет YOLO в текущем состоянии движения
+            # исчерпан или сцена не изменилась
+            if frame is None or not self.robot.scheduler.should_run(DETECTOR, frame):
+                time.sleep(0.01)
+                continue
+            t_frame = time.monotonic()
+            t0 = time.perf_counter()
+            try:
+                detections = self.robot.detector.detect_objects(
+                    frame, target_label='dog', confidence_threshold=DOG_CONFIDENCE)
+            except Exception as e:
+                logger.error(f"Ошибка в потоке обнаружения: {e}")
+                continue
+            finally:
+                self.robot.scheduler.done(DETECTOR, time.perf_counter() - t0)
+            confirmed = self.fusion.update(detections, frame.shape)
+            if not confirmed or self._stop_event.is_set():
+                continue
+            target = max(confirmed, key=lambda track: track['score'])
+            self.follow.on_detection(target['box'], frame.shape, t_frame)
+            if not self.following:
+                logger.info(f"Собака обнаружена! Попаданий {target['hits']}, "
+                            f"уверенность {target['score']:.2f}")
+                self._start_following()
+
+    def _detect_obstacles(self):
+        while not self._stop_event.is_set():
+            frame = self.robot.camera.get_frame()
+            # При следовании движение ведёт FollowController, объезд не запускаем
+            if frame is None or self.following:
+                time.sleep(0.01)
+                continue
+            self.robot.detect_obst.process_frame(frame)
+            time.sleep(0.05)
+
+
+class RobotDaemon:
+    """Долгоживущий процесс робота.
+
+    Камера, моторы, дальномер и YOLO загружаются один раз при старте
+    (параллельно, см. startup.py); голосовые команды переключают поведения
+    через локальный сокет, без запуска интерпретатора и повторной загрузки
+    модели.
+    """
+
+    BEHAVIOURS = {
+        PlayWithDogBehaviour.name: PlayWithDogBehaviour,
+    }
+
+    def __init__(self, record_dir=None):
+        self.startup = robot_components(record_dir).start()
+        # Движение и дальномер нужны сразу; камера и детектор - по готовности
+        self.motor = self.startup.get('motor')
+        self.sensor = self.startup.get('sensor')
+        self.nav = self.startup.get('nav')
+        self.detect_obst = self.startup.get('obstacles')
+        self.scheduler = self.startup.get('scheduler')
+        threading.Thread(target=self._log_startup_report, daemon=True).start()
+
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._run_loop,
+            daemon=True,
+            name="EventLoopThread"
+        )
+        self._loop_thread.start()
+        # Навигация (и дальномер) - на ядре управления
+        get_resource_manager().pin_thread(self._loop_thread)
+
+        self._lock = threading.Lock()
+        self.behaviour = None
+        self._server = None
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _log_startup_report(self):
+        self.startup.wait_all()
+        logger.info("Запуск компонентов:\n" + self.startup.report())
+
+    @property
+    def camera(self):
+        return self.startup.get('camera')
+
+    @property
+    def detector(self):
+        return self.startup.get('detector')
+
+    @property
+    def state(self):
+        return self.behaviour.name if self.behaviour else "idle"
+
+    def start_behaviour(self, name):
+        if name not in self.BEHAVIOURS:
+            raise ValueError(f"неизвестное поведение: {name}")
+        with self._lock:
+            if self.behaviour is not None:
+                if self.behaviour.name == name:
+                    return
+                self.behaviour.stop()
+            t0 = time.monotonic()
+            self.behaviour = self.BEHAVIOURS[name](self)
+            self.behaviour.start()
+            logger.info(f"Поведение '{name}' запущено за {(time.monotonic() - t0) * 1000:.0f} мс")
+
+    def stop_behaviour(self):
+        with self._lock:
+            if self.behaviour is None:
+                return
+            t0 = time.monotonic()
+            self.behaviour.stop()
+            logger.info(f"Поведение '{self.behaviour.name}' остановлено за "
+                        f"{(time.monotonic() - t0) * 1000:.0f} мс")
+            self.behaviour = None
+
+    def handle(self, line):
+        """Обработка одной команды протокола. Возвращает строку ответа"""
+        parts = line.split()
+        if not parts:
+            return "error пустая команда"
+        command, args = parts[0], parts[1:]
+        try:
+            if command == "start" and len(args) == 1:
+                self.start_behaviour(args[0])
+            elif command == "stop":
+                self.stop_behaviour()
+            elif command == "status":
+                loading = [name for name in ('camera', 'detector') if not self.startup.is_ready(name)]
+                suffix = f" (загружаются: {', '.join(loading)})" if loading else ""
+                return f"ok {self.state}{suffix}"
+            elif command == "dump":
+                return f"ok {get_recorder().dump(args[0] if args else None)}"
+            elif command == "shutdown":
+                threading.Thread(target=self.shutdown, daemon=True).start()
+            else:
+                return f"error неизвестная команда: {line}"
+        except Exception as e:
+            logger.error(f"Ошибка выполнения '{line}': {e}")
+            return f"error {e}"
+        return "ok"
+
+    def serve(self, path=SOCKET_PATH):
+        """Приём команд через Unix-сокет (блокирует до shutdown)"""
+        if os.path.exists(path):
+            os.remove(path)
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw in self.rfile:
+                    line = raw.decode('utf-8').strip()
+                    if line:
+                        self.wfile.write((daemon.handle(line) + "\n").encode('utf-8'))
+
+        self._server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        self._server.daemon_threads = True
+        logger.info(f"Демон робота ожидает команды на {path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(path):
+                os.remove(path)
+
+    def shutdown(self):
+        self.stop_behaviour()
+        if self._server is not None:
+            self._server.shutdown()
+        # Регулятор качества не должен перезапустить камеру во время остановки
+        if self.startup.is_ready('governor'):
+            self.startup.get('governor').stop()
+        self.camera.stop()
+        if self.startup.session is not None:
+            self.startup.session.save()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        logger.info("Демон остановлен")
+
+
+if __name__ == "__main__":
+    setup_logging('logs/robot_daemon.log')
+    install_crash_dump()
+    start_metrics()
+    # ROBOT_DEBUG_STREAM=1 - отладочное видео http://127.0.0.1:9109/stream
+    start_debug_stream()
+    # ROBOT_RECORD_DIR=<каталог> - записать входы заезда для replay.py
+    robot = RobotDaemon(record_dir=os.environ.get('ROBOT_RECORD_DIR'))
+    signal.signal(signal.SIGTERM, lambda s, f: threading.Thread(target=robot.shutdown).start())
+    try:
+        robot.serve()
+    except KeyboardInterrupt:
+        robot.shutdown()
+    sys.exit(0)
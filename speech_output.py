@@ -0,0 +1,178 @@
+import os
+import queue
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class SpeechOutput:
+    """Синтез речи с кэшем готового PCM и постоянно открытым потоком воспроизведения.
+
+    Фраза синтезируется RHVoice один раз, переводится в 16 кГц S16_LE моно
+    и хранится в кэше по хэшу (голос + текст): в памяти и на диске, оба
+    уровня вытесняются по LRU. Воспроизведение идёт через один долгоживущий
+    процесс aplay, в stdin которого пишется сырой PCM, поэтому повторная
+    фраза начинает звучать без запуска процессов и работы с диском.
+
+    aplay читает stdin целыми периодами и начинает играть, только когда
+    заполнен буфер, поэтому после каждой фразы дописывается тишина длиной
+    буфер + период - иначе короткая фраза и хвост любой фразы ждали бы
+    следующую фразу или close().
+    """
+
+    SAMPLE_RATE = 16000
+    BUFFER_MS = 200     # буфер устройства aplay (-B)
+    PERIOD_MS = 50      # период aplay (-F)
+
+    def __init__(self, device, voice="Anna", cache_dir="cache/tts",
+                 memory_limit=8 * 1024 * 1024, disk_limit=64 * 1024 * 1024):
+        self.device = device
+        self.voice = voice
+        self.cache_dir = cache_dir
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._memory = OrderedDict()    # ключ -> PCM
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._player = None
+        # Тишина, проталкивающая хвост фразы через буфер aplay
+        self._flush_pcm = bytes(self.SAMPLE_RATE * 2 * (self.BUFFER_MS + self.PERIOD_MS) // 1000)
+        self._thread = threading.Thread(
+            target=self._playback_worker,
+            daemon=True,
+            name="SpeechOutputThread"
+        )
+        self._thread.start()
+
+    # --- Кэш ---
+
+    def _key(self, text):
+        return hashlib.sha1(f"{self.voice}|{self.SAMPLE_RATE}|{text}".encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pcm")
+
+    def _remember(self, key, pcm):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = pcm
+            self._memory_bytes += len(pcm)
+            while self._memory_bytes > self.memory_limit and len(self._memory) > 1:
+                _, old = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old)
+
+    def _load_disk(self, key):
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                pcm = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # отметка использования для LRU
+        return pcm
+
+    def _store_disk(self, key, pcm):
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pcm)
+        os.replace(tmp, self._disk_path(key))
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pcm'):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_limit:
+                break
+            os.remove(path)
+            total -= size
+
+    def _synthesize(self, text):
+        """RHVoice -> WAV во временном файле -> sox -> сырой PCM 16 кГц"""
+        with tempfile.TemporaryDirectory() as tmp:
+            wav = os.path.join(tmp, 'speech.wav')
+            subprocess.run(["RHVoice-test", "-p", self.voice, "-o", wav],
+                           input=text.encode('utf-8'), check=True)
+            result = subprocess.run(
+                ["sox", wav, "-t", "raw", "--rate", str(self.SAMPLE_RATE),
+                 "--bits", "16", "--channels", "1", "--encoding", "signed-integer", "-"],
+                stdout=subprocess.PIPE, check=True
+            )
+        return result.stdout
+
+    def render(self, text):
+        """PCM фразы: из памяти, с диска или после синтеза"""
+        key = self._key(text)
+        with self._lock:
+            pcm = self._memory.get(key)
+            if pcm is not None:
+                self._memory.move_to_end(key)
+                return pcm
+        pcm = self._load_disk(key)
+        if pcm is None:
+            logger.info(f"Синтез фразы: '{text}'")
+            pcm = self._synthesize(text)
+            self._store_disk(key, pcm)
+        self._remember(key, pcm)
+        return pcm
+
+    def prerender(self, phrases):
+        """Заранее синтезировать фразы (например, при старте)"""
+        for text in phrases:
+            try:
+                self.render(text)
+            except Exception as e:
+                logger.error(f"Ошибка синтеза '{text}': {e}")
+
+    # --- Воспроизведение ---
+
+    def say(self, text):
+        """Поставить фразу в очередь воспроизведения"""
+        self._queue.put(self.render(text))
+
+    def _open_player(self):
+        self._player = subprocess.Popen(
+            ["aplay", "-q", "-D", self.device, "-t", "raw", "-f", "S16_LE",
+             "-r", str(self.SAMPLE_RATE), "-c", "1",
+             "-B", str(self.BUFFER_MS * 1000), "-F", str(self.PERIOD_MS * 1000), "-"],
+            stdin=subprocess.PIPE
+        )
+
+    def _playback_worker(self):
+        while True:
+            pcm = self._queue.get()
+            if pcm is None:
+                break
+            for attempt in range(2):
+                try:
+                    if self._player is None or self._player.poll() is not None:
+                        self._open_player()
+                    self._player.stdin.write(pcm)
+                    self._player.stdin.write(self._flush_pcm)
+                    self._player.stdin.flush()
+                    break
+                except (BrokenPipeError, OSError) as e:
+                    logger.warning(f"Поток воспроизведения прерван ({e}), переоткрываю")
+                    self._player = None
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=1.0)
+        if self._player is not None:
+            self._player.stdin.close()
+            self._player.wait(timeout=2.0)
@@ -0,0 +1,218 @@
+import os
+import sys
+import time
+import types
+import logging
+import threading
+import importlib
+import importlib.util
+
+logger = logging.getLogger(__name__)
+
+
+class _LazyModule(types.ModuleType):
+    """Заместитель модуля: настоящий импорт при первом обращении к атрибуту.
+
+    importlib.util.LazyLoader не потокобезопасен (на 3.11 параллельные
+    потоки получают AttributeError на полузагруженном модуле), поэтому
+    первый доступ идёт под блокировкой, а после загрузки атрибуты модуля
+    копируются в заместитель и следующие обращения идут напрямую.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+
+    def __getattr__(self, attr):
+        with self._lazy_lock:
+            if self._lazy_module is None:
+                module = importlib.import_module(self.__name__)
+                self.__dict__.update(module.__dict__)
+                self.__dict__['_lazy_module'] = module
+        return getattr(self._lazy_module, attr)
+
+
+def lazy_import(name):
+    """Модуль, который реально загрузится при первом обращении к атрибуту.
+
+    Тяжёлые библиотеки (cv2, picamera2) не тормозят импорт наших модулей
+    и загружаются в том потоке, который первым ими воспользуется.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named '{name}'")
+    return _LazyModule(name)
+
+
+class _Component:
+    def __init__(self, name, factory, deps, ready, ready_timeout):
+        self.name = name
+        self.factory = factory
+        self.deps = tuple(deps)
+        self.ready = ready
+        self.ready_timeout = ready_timeout
+        self.instance = None
+        self.error = None
+        self.done = threading.Event()
+        self.started_at = None
+        self.created_at = None
+        self.ready_at = None
+
+
+class StartupOrchestrator:
+    """Параллельная инициализация компонентов робота.
+
+    Каждый компонент создаётся в своём потоке, как только готовы его
+    зависимости, поэтому загрузка модели YOLO идёт одновременно с прогревом
+    камеры, а моторы и дальномер доступны, не дожидаясь детектора.
+    Вместо фиксированных пауз готовность проверяется функцией ready.
+    """
+
+    def __init__(self):
+        self._components = {}
+        self._t0 = None
+
+    def add(self, name, factory, deps=(), ready=None, ready_timeout=5.0):
+        """factory(orchestrator) создаёт компонент; ready(instance) -> bool - проба готовности"""
+        self._components[name] = _Component(name, factory, deps, ready, ready_timeout)
+
+    def start(self):
+        self._t0 = time.monotonic()
+        for component in self._components.values():
+            threading.Thread(
+                target=self._init_component,
+                args=(component,),
+                daemon=True,
+                name=f"Init-{component.name}"
+            ).start()
+        return self
+
+    def _init_component(self, component):
+        try:
+            for dep in component.deps:
+                self.get(dep)
+            component.started_at = time.monotonic()
+            component.instance = component.factory(self)
+            component.created_at = time.monotonic()
+
+            if component.ready is not None:
+                deadline = component.created_at + component.ready_timeout
+                while not component.ready(component.instance):
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"{component.name} не готов за {component.ready_timeout} с")
+                    time.sleep(0.01)
+            component.ready_at = time.monotonic()
+            logger.info(f"Компонент '{component.name}' готов через "
+                        f"{component.ready_at - self._t0:.2f} с после старта")
+        except Exception as e:
+            component.error = e
+            logger.error(f"Ошибка инициализации '{component.name}': {e}")
+        finally:
+            component.done.set()
+
+    def get(self, name, timeout=None):
+        """Готовый компонент (ждёт окончания инициализации)"""
+        component = self._components[name]
+        if not component.done.wait(timeout):
+            raise TimeoutError(f"Компонент '{name}' ещё не готов")
+        if component.error is not None:
+            raise RuntimeError(f"Компонент '{name}' не запустился: {component.error}")
+        return component.instance
+
+    def is_ready(self, name):
+        component = self._components[name]
+        return component.done.is_set() and component.error is None
+
+    def wait_all(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for component in self._components.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            component.done.wait(remaining)
+
+    def report(self):
+        """Таблица времени запуска: начало, создание, готовность (с от старта)"""
+        def offset(t):
+            return f"{t - self._t0:6.2f}" if t is not None else "     -"
+        lines = ["Компонент       начало  создан  готов"]
+        for c in sorted(self._components.values(),
+                        key=lambda c: c.ready_at or c.created_at or float('inf')):
+            status = "" if c.error is None else f"  ОШИБКА: {c.error}"
+            lines.append(f"{c.name:<14} {offset(c.started_at)} {offset(c.created_at)} "
+                         f"{offset(c.ready_at)}{status}")
+        return "\n".join(lines)
+
+
+def robot_components(record_dir=None):
+    """Стандартный набор компонентов робота.
+
+    record_dir - каталог для записи входов заезда (replay.py): дальномер,
+    камера и моторы оборачиваются записывающими прокси.
+    """
+    from resource_manager import get_resource_manager
+    resources = get_resource_manager()
+    startup = StartupOrchestrator()
+    session = None
+    if record_dir:
+        from replay import SessionRecorder
+        session = SessionRecorder(record_dir)
+    startup.session = session
+
+    # Компоненты создаются в потоке уже с нужной привязкой к ядрам: её
+    # наследуют поток захвата камеры, пул OpenCV и потоки ШИМ RPi.GPIO
+    def camera(_):
+        from camera_manager import CameraManager
+        resources.pin_current_thread('vision')
+        cam = CameraManager()
+        return session.wrap_camera(cam) if session else cam
+
+    def motor(_):
+        from motor_control import MotorController
+        resources.pin_current_thread('control')
+        controller = MotorController()
+        return session.wrap_motor(controller) if session else controller
+
+    def sensor(_):
+        from distance_sensor import DistanceSensor
+        resources.pin_current_thread('control')
+        distance_sensor = DistanceSensor()
+        return session.wrap_sensor(distance_sensor) if session else distance_sensor
+
+    def detector(_):
+        from object_detector import ObjectDetector
+        resources.configure_opencv()
+        resources.pin_current_thread('vision')
+        # Меньший вход сети: ложные срабатывания отсекает DetectionFusion.
+        # ROBOT_MULTISCALE=1 - грубый проход и фрагменты высокого разрешения
+        return ObjectDetector(input_size=320, multiscale=os.environ.get('ROBOT_MULTISCALE') == '1')
+
+    def scheduler(s):
+        from detection_scheduler import DetectionScheduler
+        return DetectionScheduler(s.get('motor'))
+
+    def nav(s):
+        from navigation import NavigationSystem
+        return NavigationSystem(s.get('motor'), s.get('sensor'))
+
+    def obstacles(s):
+        from navigation import ObstacleDetector
+        return ObstacleDetector(s.get('sensor'), s.get('motor'), nav=s.get('nav'),
+                                scheduler=s.get('scheduler'))
+
+    def governor(s):
+        from quality_governor import QualityGovernor
+        resources.pin_current_thread('io')
+        return QualityGovernor(camera=s.get('camera'), detector=s.get('detector'),
+                               scheduler=s.get('scheduler'), vision=s.get('obstacles').vision).start()
+
+    startup.add('camera', camera, ready=lambda cam: cam.is_ready())
+    startup.add('motor', motor)
+    # Настройка GPIO последовательно после моторов
+    startup.add('sensor', sensor, deps=('motor',))
+    startup.add('detector', detector)
+    startup.add('nav', nav, deps=('motor', 'sensor'))
+    startup.add('scheduler', scheduler, deps=('motor',))
+    startup.add('obstacles', obstacles, deps=('nav', 'scheduler'))
+    startup.add('governor', governor, deps=('camera', 'detector', 'scheduler', 'obstacles'))
+    return startup
@@ -0,0 +1,107 @@
+import math
+import logging
+from collections import deque
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class EnergyVAD:
+    """Детектор речи по энергии и частоте переходов через ноль.
+
+    Стоит между arecord и распознавателем: пока речи нет, кадры только
+    складываются в короткий кольцевой буфер (pre-roll) и в распознаватель не
+    попадают. При начале речи буфер отдаётся целиком, чтобы не обрезать
+    начало слова; после окончания речи ещё hangover_ms кадров пропускаются.
+
+    Уровень шума быстро подстраивается в паузах и медленно во время речи:
+    при скачке фона (запуск моторов) VAD иначе остался бы открытым навсегда.
+    «Речь» длиннее max_speech_ms - это фон, фраза закрывается, а текущий
+    уровень принимается за новый уровень шума.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=50, preroll_ms=300, hangover_ms=600,
+                 threshold_db=9.0, min_level_db=-55.0, max_zcr=0.4, noise_adapt=0.05,
+                 speech_adapt=0.002, max_speech_ms=8000):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db    # превышение над уровнем шума
+        self.min_level_db = min_level_db    # абсолютный минимум уровня речи (dBFS)
+        self.max_zcr = max_zcr              # выше - шипение/щелчки, не речь
+        self.noise_adapt = noise_adapt
+        self.speech_adapt = speech_adapt
+        self.max_speech_frames = max(1, int(math.ceil(max_speech_ms / frame_ms)))
+        self.hangover_frames = max(1, int(math.ceil(hangover_ms / frame_ms)))
+        self._preroll = deque(maxlen=max(1, int(math.ceil(preroll_ms / frame_ms))))
+        self.noise_db = min_level_db - threshold_db
+        self.in_speech = False
+        self._hangover = 0
+        self._speech_frames = 0
+        self._speech_frames = 0
+        self._level_db = self.noise_db
+
+    def level(self, data):
+        """Уровень кадра (dBFS) и доля переходов через ноль"""
+        samples = np.frombuffer(data, dtype='<i2').astype(np.float32)
+        if samples.size == 0:
+            return -120.0, 0.0
+        energy = float(np.dot(samples, samples)) / samples.size
+        level_db = 10.0 * math.log10(energy / (32768.0 ** 2) + 1e-12)
+        signs = np.signbit(samples)
+        zcr = np.count_nonzero(signs[1:] != signs[:-1]) / samples.size
+        return level_db, zcr
+
+    def is_speech(self, data):
+        level_db, zcr = self.level(data)
+        speech = (level_db > self.noise_db + self.threshold_db
+                  and level_db > self.min_level_db
+                  and zcr < self.max_zcr)
+        # В паузах уровень шума следует за фоном, во время речи - медленно
+        adapt = self.noise_adapt if not speech and not self.in_speech else self.speech_adapt
+        self.noise_db += adapt * (level_db - self.noise_db)
+        self._level_db = level_db
+        return speech
+
+    def push(self, data):
+        """Обработка кадра.
+
+        Возвращает (кадры для распознавателя, закончилась ли фраза)."""
+        speech = self.is_speech(data)
+
+        if not self.in_speech:
+            if not speech:
+                self._preroll.append(data)
+                return [], False
+            self.in_speech = True
+            self._hangover = self.hangover_frames
+            self._speech_frames = 0
+            frames = list(self._preroll)
+            frames.append(data)
+            self._preroll.clear()
+            logger.debug("Начало речи")
+            return frames, False
+
+        self._speech_frames += 1
+        if self._speech_frames >= self.max_speech_frames:
+            # Так долго не говорят - вырос фон; переоцениваем уровень шума
+            logger.info(f"Речь дольше {self.max_speech_frames * self.frame_ms / 1000:.0f} с, "
+                        f"уровень шума {self.noise_db:.0f} -> {self._level_db:.0f} дБ")
+            self.noise_db = max(self.noise_db, self._level_db)
+            self.in_speech = False
+            return [data], True
+
+        if speech:
+            self._hangover = self.hangover_frames
+            return [data], False
+
+        self._hangover -= 1
+        if self._hangover > 0:
+            return [data], False
+        self.in_speech = False
+        logger.debug("Конец речи")
+        return [data], True
+
+    def reset(self):
+        self._preroll.clear()
+        self.in_speech = False
+        self._hangover = 0
+        self._speech_frames = 0
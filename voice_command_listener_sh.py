@@ -1,17 +1,13 @@
-import subprocess
 import time
 import logging
 import json
+import threading
+from collections import deque
 from vosk import Model, KaldiRecognizer
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("logs/voice_command_listener.log"),
-        logging.StreamHandler()
-    ]
-)
+from audio_stream import AudioStream
+from log_setup import setup_logging
+from vad import EnergyVAD
+from voice_commands import match_command, build_grammar, get_speech, RESPONSES, UNKNOWN_TOKEN
 
 # Путь к модели vosk
 MODEL_PATH = "vosk_model/vosk-model-small-ru-0.22"
@@ -26,76 +22,140 @@ ARECORD_CMD = [
     "-"
 ]
 
+# Размер кадра, подаваемого в распознаватель (мс), и ёмкость буфера (кадров)
+FRAME_MS = 50
+AUDIO_BUFFER_FRAMES = 40
+# Отсекать тишину до распознавателя
+USE_VAD = True
+# Распознавание только фраз из реестра команд (вместо свободной речи)
+KEYWORD_MODE = True
+
 def handle_command(command):
     if command is None:
         return
 
-    if "поиграй с собакой" in command:
-        logging.info("Запуск скрипта игры с собакой...")
-        subprocess.Popen(["python3", "play_with_dog/detect_dog.py"])
-    elif "остановись" in command:
-        logging.info("Остановка всех скриптов...")
-        subprocess.run(["pkill", "-f", "detect_dog.py"])
-    elif "выйди" in command:
-        logging.info("Завершение работы...")
-        exit()
-    elif "тест" in command:
-        subprocess.run('echo "тест" | RHVoice-test -p Anna -o temp.wav', shell=True, check=True)
-
-        # Конвертируем temp.wav в temp_fixed.wav
-        subprocess.run(["sox", "temp.wav", "--rate", "16000", "--bits", "16", "--channels", "1", "temp_fixed.wav"], check=True)
-
-        # Воспроизводим temp_fixed.wav через bluealsa
-        subprocess.run(["aplay", "-D", "bluealsa:DEV=E5:AF:7E:BA:3E:06,PROFILE=sco", "temp_fixed.wav"], check=True)
-    else:
+    phrase, handler = match_command(command)
+    if handler is None:
         logging.warning(f"Неизвестная команда: {command}")
+        return
+    handler(command)
+
+def create_recognizer(model, keyword_mode=KEYWORD_MODE):
+    """KaldiRecognizer со свободной речью или с грамматикой из реестра команд"""
+    if keyword_mode:
+        return KaldiRecognizer(model, 16000, build_grammar())
+    return KaldiRecognizer(model, 16000)
+
+class LatencyMeter:
+    """Задержка «конец фразы -> действие» по последним командам"""
+
+    def __init__(self, size=50):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return "нет данных"
+        mean = sum(ordered) / len(ordered)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return f"среднее {mean * 1000:.0f} мс, p95 {p95 * 1000:.0f} мс (n={len(ordered)})"
+
+
+class VoiceCommandListener:
+    """Цикл распознавания: кадры из AudioStream -> KaldiRecognizer -> команды"""
+
+    def __init__(self, recognizer, stream, vad=None):
+        self.recognizer = recognizer
+        self.stream = stream
+        self.vad = vad
+        self.latency = LatencyMeter()
+        self.last_partial = ""
+        self._partial_requested = threading.Event()
+        self._partial_ready = threading.Event()
+
+    def partial(self, timeout=1.0):
+        """Промежуточный результат по запросу потребителя (из любого потока)"""
+        self._partial_ready.clear()
+        self._partial_requested.set()
+        self._partial_ready.wait(timeout)
+        return self.last_partial
+
+    def _update_partial(self):
+        self.last_partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+        self._partial_requested.clear()
+        self._partial_ready.set()
+
+    def run(self):
+        while True:
+            item = self.stream.read()
+            if item is None:
+                logging.warning("Нет данных от микрофона. Завершение работы.")
+                break
+            captured_at, data = item
+
+            if self.vad is None:
+                self._accept(data, captured_at)
+                continue
+
+            frames, speech_ended = self.vad.push(data)
+            for frame in frames:
+                self._accept(frame, captured_at)
+            if speech_ended:
+                # Пауза после фразы: забираем окончательный результат сразу
+                self._dispatch(self.recognizer.FinalResult(), captured_at)
+
+    def _accept(self, data, captured_at):
+        if self.recognizer.AcceptWaveform(data):
+            self._dispatch(self.recognizer.Result(), captured_at)
+        elif self._partial_requested.is_set():
+            self._update_partial()
+        elif logging.getLogger().isEnabledFor(logging.DEBUG):
+            self._update_partial()
+            logging.debug(f"Промежуточный результат: {self.last_partial}")
+
+    def _dispatch(self, result_json, captured_at):
+        result = json.loads(result_json)
+        command = result.get('text', '').strip().lower()
+        if not command or command == UNKNOWN_TOKEN:
+            return
+        logging.info(f"Распознано: '{command}'")
+
+        # Задержка от получения последнего кадра фразы до начала действия
+        self.latency.add(time.monotonic() - captured_at)
+        logging.info(f"Задержка команда -> действие: {self.latency.summary()}")
+        handle_command(command)
 
 def main():
+    setup_logging("logs/voice_command_listener.log")
     logging.info("Инициализация модели Vosk...")
     model = Model(MODEL_PATH)
-    recognizer = KaldiRecognizer(model, 16000)
+    recognizer = create_recognizer(model)
+
+    # Ответы синтезируются один раз, дальше играют из кэша
+    get_speech().prerender(RESPONSES)
 
     logging.info("Запуск arecord для захвата аудио...")
+    stream = AudioStream(ARECORD_CMD, sample_rate=16000, frame_ms=FRAME_MS,
+                         max_frames=AUDIO_BUFFER_FRAMES)
     try:
-        process = subprocess.Popen(
-            ARECORD_CMD,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+        stream.start()
     except Exception as e:
         logging.error(f"Ошибка запуска arecord: {e}")
         return
 
-    if process.stdout is None:
-        logging.error("Нет потока stdout от arecord!")
-        return
-
     logging.info("Голосовой ассистент запущен. Ожидание команд...")
 
     try:
-        while True:
-            data = process.stdout.read(4000)
-            if not data:
-                logging.warning("Нет данных от микрофона. Завершение работы.")
-                break
-
-            if recognizer.AcceptWaveform(data):
-                result = json.loads(recognizer.Result())
-                command = result.get('text', '').strip().lower()
-                logging.info(f"Распознано: '{command}'")
-
-                if command:
-                    handle_command(command)
-            else:
-                partial = json.loads(recognizer.PartialResult())
-                logging.debug(f"Промежуточный результат: {partial.get('partial', '')}")
-
-            time.sleep(0.1)  # чтобы не грузить CPU
-
+        vad = EnergyVAD(sample_rate=16000, frame_ms=FRAME_MS) if USE_VAD else None
+        VoiceCommandListener(recognizer, stream, vad=vad).run()
     except KeyboardInterrupt:
         logging.info("Принудительное завершение пользователем (Ctrl+C)")
     finally:
-        process.terminate()
+        stream.stop()
+        get_speech().close()
         logging.info("Процесс arecord остановлен.")
 
 if __name__ == "__main__":
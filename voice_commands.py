@@ -0,0 +1,84 @@
+import sys
+import json
+import socket
+import logging
+import subprocess
+from speech_output import SpeechOutput
+from robot_client import send_command
+
+# Демон не запущен (сокета нет или его никто не слушает). Таймаут сюда не
+# входит: демон владеет камерой и GPIO, второй процесс запускать нельзя
+DAEMON_ABSENT = (FileNotFoundError, ConnectionRefusedError)
+
+# Устройство воспроизведения (bluetooth-гарнитура через bluealsa)
+PLAYBACK_DEVICE = "bluealsa:DEV=E5:AF:7E:BA:3E:06,PROFILE=sco"
+
+# Токен «неизвестное слово» в грамматике Vosk
+UNKNOWN_TOKEN = "[unk]"
+
+# Ответы, которые синтезируются заранее при запуске
+RESPONSES = ["тест"]
+
+_speech = None
+
+def get_speech():
+    """Общий сервис синтеза речи (создаётся при первом обращении)"""
+    global _speech
+    if _speech is None:
+        _speech = SpeechOutput(PLAYBACK_DEVICE)
+    return _speech
+
+def start_dog_game(command):
+    try:
+        logging.info(f"Демон робота: {send_command('start play_with_dog')}")
+    except socket.timeout:
+        logging.error("Демон робота не ответил на запуск игры")
+    except DAEMON_ABSENT:
+        # Демон не запущен - старый путь через отдельный процесс
+        logging.info("Запуск скрипта игры с собакой...")
+        subprocess.Popen(["python3", "play_with_dog/detect_dog.py"])
+    except OSError as e:
+        logging.error(f"Ошибка связи с демоном робота: {e}")
+
+def stop_scripts(command):
+    try:
+        logging.info(f"Демон робота: {send_command('stop')}")
+    except socket.timeout:
+        logging.error("Демон робота не ответил на остановку")
+    except DAEMON_ABSENT:
+        logging.info("Остановка всех скриптов...")
+        subprocess.run(["pkill", "-f", "detect_dog.py"])
+    except OSError as e:
+        logging.error(f"Ошибка связи с демоном робота: {e}")
+
+def exit_listener(command):
+    logging.info("Завершение работы...")
+    sys.exit()
+
+def speak_test(command):
+    get_speech().say("тест")
+
+# Реестр команд: фраза -> обработчик. Порядок задаёт приоритет при поиске подстроки
+COMMANDS = {
+    "поиграй с собакой": start_dog_game,
+    "остановись": stop_scripts,
+    "выйди": exit_listener,
+    "тест": speak_test,
+}
+
+def match_command(text):
+    """Поиск команды в распознанном тексте: (фраза, обработчик) или (None, None)"""
+    if not text:
+        return None, None
+    # В режиме ключевых фраз распознаватель возвращает фразу целиком
+    handler = COMMANDS.get(text)
+    if handler is not None:
+        return text, handler
+    for phrase, handler in COMMANDS.items():
+        if phrase in text:
+            return phrase, handler
+    return None, None
+
+def build_grammar():
+    """Список фраз для KaldiRecognizer: команды реестра и [unk] для всего остального"""
+    return json.dumps(list(COMMANDS) + [UNKNOWN_TOKEN], ensure_ascii=False)